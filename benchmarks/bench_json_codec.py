@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Сравнение JSON кодеков на пачках обновлений реального размера.
+
+Разбор: пачка /updates (100 обновлений message_created с вложениями и
+разметкой, как отдаёт API при limit=100). Сериализация: тело send_message
+с inline-клавиатурой.
+
+Запуск:
+    python benchmarks/bench_json_codec.py [--updates 100] [--repeat 200]
+"""
+
+import sys
+import os
+import json
+import argparse
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from max_api.codec import get_codec, PREFERRED
+from max_api.utils import build_inline_keyboard
+
+
+def make_update(i):
+    """Обновление message_created, близкое по размеру к реальному"""
+    return {
+        "update_type": "message_created",
+        "timestamp": 1737500130100 + i,
+        "message": {
+            "sender": {
+                "user_id": 100000 + i,
+                "name": f"Пользователь {i}",
+                "username": f"user_{i}",
+                "is_bot": False,
+                "last_activity_time": 1737500130000 + i,
+            },
+            "recipient": {"chat_id": -70000000 - i % 50, "chat_type": "chat", "user_id": None},
+            "timestamp": 1737500130100 + i,
+            "body": {
+                "mid": f"mid.0000000000000000{i:08d}",
+                "seq": 113947000000000000 + i,
+                "text": "Привет! Это тестовое сообщение с **разметкой** и ссылкой https://max.ru " * 3,
+                "attachments": [
+                    {
+                        "type": "image",
+                        "payload": {
+                            "photo_id": 1000 + i,
+                            "token": "f9LHodD0cOJkBwtHZ5pN1pB0nLUSpNDWpMI0yAp2A3dUVjeLEP3WYVjOUTe2",
+                            "url": f"https://i.oneme.ru/i?r=BTGBPUwtwgYUeoFhO7rESmr8{i}",
+                        },
+                    }
+                ],
+                "markup": [{"type": "strong", "from": 30, "length": 9}],
+            },
+            "stat": {"views": i},
+            "url": f"https://max.ru/c/-70000000/{i}",
+        },
+        "user_locale": "ru",
+    }
+
+
+def make_batch(size):
+    return {"updates": [make_update(i) for i in range(size)], "marker": 123456789}
+
+
+def make_message():
+    keyboard = build_inline_keyboard([
+        [{"type": "callback", "text": f"Вариант {i}", "payload": f"choice_{i}"} for i in range(3)]
+        for _ in range(4)
+    ])
+    return {"text": "Выберите вариант ответа из списка ниже", "attachments": [keyboard], "format": "markdown"}
+
+
+def available_codecs():
+    codecs = []
+    for name in PREFERRED:
+        try:
+            codecs.append(get_codec(name))
+        except ImportError:
+            print(f"  {name}: не установлен, пропущен")
+    return codecs
+
+
+def bench(func, repeat):
+    # Лучший из 5 прогонов устойчивее к шуму
+    return min(timeit.repeat(func, number=repeat, repeat=5)) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--updates', type=int, default=100, help="обновлений в пачке")
+    parser.add_argument('--repeat', type=int, default=200, help="итераций в одном прогоне")
+    args = parser.parse_args()
+    
+    batch_bytes = json.dumps(make_batch(args.updates), ensure_ascii=False).encode('utf-8')
+    message = make_message()
+    
+    print(f"Пачка /updates: {args.updates} обновлений, {len(batch_bytes) / 1024:.1f} KiB")
+    codecs = available_codecs()
+    
+    # Базовая линия - прежний путь: response.json() = json.loads(content.decode())
+    baseline_decode = bench(lambda: json.loads(batch_bytes.decode('utf-8')), args.repeat)
+    baseline_encode = bench(lambda: json.dumps(message).encode('utf-8'), args.repeat * 10)
+    
+    print()
+    print(f"{'кодек':<10} {'разбор, мс':>12} {'ускорение':>10} {'сериализация, мкс':>19} {'ускорение':>10}")
+    print(f"{'requests':<10} {baseline_decode * 1e3:>12.3f} {'1.00x':>10} {baseline_encode * 1e6:>19.2f} {'1.00x':>10}")
+    
+    for codec in codecs:
+        assert codec.loads(batch_bytes) == json.loads(batch_bytes)
+        decode = bench(lambda: codec.loads(batch_bytes), args.repeat)
+        encode = bench(lambda: codec.dumps(message), args.repeat * 10)
+        print(
+            f"{codec.name:<10} {decode * 1e3:>12.3f} {baseline_decode / decode:>9.2f}x "
+            f"{encode * 1e6:>19.2f} {baseline_encode / encode:>9.2f}x"
+        )
+    
+    print()
+    print(f"По умолчанию используется: {get_codec().name}")
+
+
+if __name__ == '__main__':
+    main()
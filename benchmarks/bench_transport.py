@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Сравнение накладных расходов транспортов MAXClient на один запрос.
+
+Запросы get_me() идут на локальный HTTP/1.1 сервер с keep-alive, поэтому
+сеть почти не влияет на результат и разница между транспортами - это
+CPU на стороне клиента. InMemoryTransport показывает собственные
+расходы клиента (лимитер, кодек, разбор ответа) без HTTP.
+
+Запуск:
+    python benchmarks/bench_transport.py [--requests 2000]
+"""
+
+import sys
+import os
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from max_api import MAXClient
+from max_api.transport import InMemoryTransport
+
+BODY = b'{"user_id":123456,"name":"Test Bot","username":"test_bot","is_bot":true}'
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+    
+    def log_message(self, *args):
+        pass
+
+
+def run(client, count):
+    client.get_me()  # установка соединения не входит в замер
+    started = time.perf_counter()
+    cpu_started = time.process_time()
+    for _ in range(count):
+        client.get_me()
+    elapsed = time.perf_counter() - started
+    cpu = time.process_time() - cpu_started
+    client.close()
+    return elapsed / count, cpu / count
+
+
+def make_client(transport, base_url):
+    return MAXClient(
+        token="bench_token",
+        base_url=base_url,
+        transport=transport,
+        max_requests_per_second=10 ** 9,
+        coalesce_requests=False
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000, help="запросов на транспорт")
+    args = parser.parse_args()
+    
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    
+    memory = InMemoryTransport(record=False)
+    memory.add('GET', '/me', body=BODY)
+    
+    cases = [
+        ('in-memory', memory),
+        ('requests', 'requests'),
+        ('urllib3', 'urllib3'),
+    ]
+    
+    print(f"{args.requests} запросов get_me() на транспорт\n")
+    print(f"{'транспорт':<12} {'время/запрос, мкс':>18} {'CPU/запрос, мкс':>16} {'запросов/с':>11}")
+    
+    results = {}
+    for name, transport in cases:
+        wall, cpu = run(make_client(transport, base_url), args.requests)
+        results[name] = cpu
+        print(f"{name:<12} {wall * 1e6:>18.1f} {cpu * 1e6:>16.1f} {1 / wall:>11.0f}")
+    
+    server.shutdown()
+    
+    print()
+    print(f"urllib3 расходует CPU на запрос в {results['requests'] / results['urllib3']:.2f} раза меньше requests")
+    print("CPU включает и поток локального сервера, который одинаков для всех сетевых транспортов")
+
+
+if __name__ == '__main__':
+    main()
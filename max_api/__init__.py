@@ -1,31 +1,124 @@
 """
 MAX API Library
 Python библиотека для работы с MAX Messenger API
+
+Классы загружаются при первом обращении (например, max_api.MAXClient),
+поэтому import max_api не импортирует requests, aiohttp и другие модули,
+которые процессу не нужны.
 """
 
+from typing import TYPE_CHECKING
+
 __version__ = "0.1.0"
 __author__ = "Your Name"
 __license__ = "MIT"
 
-from .client import MAXClient
-from .exceptions import (
-    MAXAPIException,
-    AuthenticationError,
-    BadRequestError,
-    NotFoundError,
-    RateLimitError,
-    ServiceUnavailableError,
-)
-from .update_manager import UpdateManager, UpdateMode
-
-__all__ = [
-    "MAXClient",
-    "MAXAPIException",
-    "AuthenticationError",
-    "BadRequestError",
-    "NotFoundError",
-    "RateLimitError",
-    "ServiceUnavailableError",
-    "UpdateManager",
-    "UpdateMode",
-]
+# Имя -> модуль пакета, в котором оно определено
+_LAZY_ATTRS = {
+    "MAXClient": ".client",
+    "AsyncMAXClient": ".async_client",
+    "MAXAPIException": ".exceptions",
+    "AuthenticationError": ".exceptions",
+    "BadRequestError": ".exceptions",
+    "NotFoundError": ".exceptions",
+    "RateLimitError": ".exceptions",
+    "ServiceUnavailableError": ".exceptions",
+    "CircuitOpenError": ".exceptions",
+    "RetryPolicy": ".retry",
+    "RetryBudget": ".retry",
+    "HedgePolicy": ".hedging",
+    "CircuitBreaker": ".circuit",
+    "CircuitState": ".circuit",
+    "ResponseCache": ".cache",
+    "UpdateManager": ".update_manager",
+    "UpdateMode": ".update_manager",
+    "Poller": ".poller",
+    "Dispatcher": ".dispatcher",
+    "ShardedExecutor": ".executor",
+    "WebhookReceiver": ".webhook",
+    "UpdatesBatch": ".utils",
+    "AdaptiveRateLimiter": ".utils",
+    "RecipientRateLimiter": ".utils",
+    "Broadcast": ".broadcast",
+    "BroadcastResult": ".broadcast",
+    "PriorityScheduler": ".scheduler",
+    "CheckpointStore": ".checkpoint",
+    "MemoryCheckpointStore": ".checkpoint",
+    "FileCheckpointStore": ".checkpoint",
+    "SQLiteCheckpointStore": ".checkpoint",
+    "Transport": ".transport",
+    "RequestsTransport": ".transport",
+    "Urllib3Transport": ".transport",
+    "InMemoryTransport": ".transport",
+    "SharedRateLimiter": ".shared_limiter",
+    "RateLimitStore": ".shared_limiter",
+    "FileRateLimitStore": ".shared_limiter",
+    "KeyValueRateLimitStore": ".shared_limiter",
+    "KeyValueBackend": ".shared_limiter",
+    "MemoryKeyValueBackend": ".shared_limiter",
+}
+
+__all__ = list(_LAZY_ATTRS)
+
+
+def __getattr__(name: str):
+    """Импорт модуля с классом при первом обращении к нему"""
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    
+    from importlib import import_module
+    value = getattr(import_module(module_name, __name__), name)
+    # Следующие обращения не проходят через __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
+if TYPE_CHECKING:  # pragma: no cover - для IDE и анализаторов типов
+    from .client import MAXClient
+    from .async_client import AsyncMAXClient
+    from .exceptions import (
+        MAXAPIException,
+        AuthenticationError,
+        BadRequestError,
+        NotFoundError,
+        RateLimitError,
+        ServiceUnavailableError,
+        CircuitOpenError,
+    )
+    from .retry import RetryPolicy, RetryBudget
+    from .hedging import HedgePolicy
+    from .circuit import CircuitBreaker, CircuitState
+    from .cache import ResponseCache
+    from .update_manager import UpdateManager, UpdateMode
+    from .poller import Poller
+    from .dispatcher import Dispatcher
+    from .executor import ShardedExecutor
+    from .webhook import WebhookReceiver
+    from .checkpoint import (
+        CheckpointStore,
+        MemoryCheckpointStore,
+        FileCheckpointStore,
+        SQLiteCheckpointStore,
+    )
+    from .transport import (
+        Transport,
+        RequestsTransport,
+        Urllib3Transport,
+        InMemoryTransport,
+    )
+    from .shared_limiter import (
+        SharedRateLimiter,
+        RateLimitStore,
+        FileRateLimitStore,
+        KeyValueRateLimitStore,
+        KeyValueBackend,
+        MemoryKeyValueBackend,
+    )
+    from .scheduler import PriorityScheduler
+    from .broadcast import Broadcast, BroadcastResult
+    from .utils import UpdatesBatch, AdaptiveRateLimiter, RecipientRateLimiter
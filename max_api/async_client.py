@@ -0,0 +1,566 @@
+"""
+Асинхронный клиент для работы с MAX API (asyncio)
+"""
+
+import asyncio
+import logging
+from typing import Optional, Dict, Any, List, Union
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - зависит от окружения
+    aiohttp = None
+
+# Таймаут установки соединения (aiohttp >= 3.10) - это ошибка даже для Long Polling
+_ConnectionTimeoutError = getattr(aiohttp, 'ConnectionTimeoutError', ())
+
+from .exceptions import MAXAPIException
+from .cache import make_key
+from .codec import JSONCodec, get_codec
+from .retry import RetryPolicy, parse_retry_after
+from .singleflight import AsyncSingleFlight
+from .transport import (
+    AsyncHTTPXTransport,
+    TransportError,
+    TransportConnectionError,
+    TransportTimeout,
+    ReadTimeout,
+)
+from .utils import AsyncRateLimiter, UpdatesBatch
+from .client import (
+    _raise_api_error,
+    _build_message_request,
+    _build_edit_body,
+    _build_updates_params,
+    _extract_updates,
+    _build_subscription_body,
+    _extract_subscriptions,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncMAXClient:
+    """
+    Асинхронный клиент для работы с MAX Messenger API.
+    
+    Повторяет API MAXClient, но все методы являются корутинами и
+    выполняются поверх пула соединений aiohttp. Позволяет держать сотни
+    одновременных запросов в одном процессе без потока на каждый запрос.
+    
+    Требует установленного пакета aiohttp (pip install max-api[async]).
+    
+    Example:
+        >>> async with AsyncMAXClient(token="...") as client:
+        ...     bot = await client.get_me()
+        ...     await asyncio.gather(*(
+        ...         client.send_message(chat_id=uid, text="Привет!")
+        ...         for uid in user_ids
+        ...     ))
+    """
+    
+    def __init__(
+        self,
+        token: str,
+        base_url: str = "https://platform-api.max.ru",
+        timeout: int = 30,
+        max_requests_per_second: int = 30,
+        max_connections: int = 100,
+        retry_policy: Optional[RetryPolicy] = None,
+        poll_connect_timeout: float = 5.0,
+        poll_timeout_margin: float = 5.0,
+        poll_requests_per_second: Optional[int] = None,
+        coalesce_requests: bool = True,
+        json_codec: Optional[Union[str, JSONCodec]] = None,
+        http2: bool = False,
+        max_streams: int = 100
+    ):
+        """
+        Инициализация асинхронного клиента MAX API
+        
+        Args:
+            token: Токен бота
+            base_url: Базовый URL API (по умолчанию https://platform-api.max.ru)
+            timeout: Таймаут запросов в секундах
+            max_requests_per_second: Максимальное количество запросов в секунду
+            max_connections: Максимальный размер пула соединений
+            retry_policy: Политика повторных запросов при 429/503 (None - без повторов)
+            poll_connect_timeout: Таймаут установки соединения для Long Polling
+            poll_timeout_margin: Запас к серверному таймауту Long Polling в секундах
+            poll_requests_per_second: Отдельный лимит запросов для Long Polling
+                                      (None - Long Polling не расходует общий лимит)
+            coalesce_requests: Объединять одинаковые одновременные GET запросы
+                               в один (результат получают все вызывающие)
+            json_codec: Кодек JSON ('orjson', 'msgspec', 'ujson', 'json' или JSONCodec;
+                        по умолчанию самый быстрый из установленных)
+            http2: Выполнять запросы через httpx по HTTP/2: одновременные запросы
+                   и Long Polling идут потоками одного соединения (откат на
+                   HTTP/1.1, если сервер не поддерживает HTTP/2)
+            max_streams: Максимум одновременных запросов по HTTP/2
+        """
+        if aiohttp is None and not http2:
+            raise ImportError(
+                "Для AsyncMAXClient требуется пакет aiohttp. "
+                "Установите его: pip install aiohttp"
+            )
+        
+        self.token = token
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.retry_policy = retry_policy
+        self.single_flight = AsyncSingleFlight() if coalesce_requests else None
+        self.codec = get_codec(json_codec)
+        self.poll_connect_timeout = poll_connect_timeout
+        self.poll_timeout_margin = poll_timeout_margin
+        self.rate_limiter = AsyncRateLimiter(max_requests=max_requests_per_second, time_window=1.0)
+        self.poll_rate_limiter = (
+            AsyncRateLimiter(max_requests=poll_requests_per_second, time_window=1.0)
+            if poll_requests_per_second else None
+        )
+        self._headers = {
+            'Authorization': token,
+            'Content-Type': 'application/json'
+        }
+        self._session: Optional["aiohttp.ClientSession"] = None
+        self._poll_session: Optional["aiohttp.ClientSession"] = None
+        self._http2 = (
+            AsyncHTTPXTransport(self._headers, max_streams=max_streams, pool_maxsize=max_connections)
+            if http2 else None
+        )
+    
+    def _get_session(self) -> "aiohttp.ClientSession":
+        """Ленивое создание сессии (должно происходить внутри event loop)"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections)
+            self._session = aiohttp.ClientSession(
+                headers=self._headers,
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        return self._session
+    
+    def _get_poll_session(self) -> "aiohttp.ClientSession":
+        """
+        Ленивое создание отдельной сессии Long Polling
+        
+        Ожидающий /updates держит соединение до серверного таймаута: в общем
+        пуле он занимал бы место отправок. Своё соединение и таймауты Long
+        Polling - как _poll_transport в MAXClient.
+        """
+        if self._poll_session is None or self._poll_session.closed:
+            connector = aiohttp.TCPConnector(limit=1)
+            self._poll_session = aiohttp.ClientSession(
+                headers=self._headers,
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=None, sock_connect=self.poll_connect_timeout)
+            )
+        return self._poll_session
+    
+    async def _make_request(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[Dict[str, Any]] = None,
+        json_data: Optional[Dict[str, Any]] = None,
+        long_poll: bool = False,
+        read_timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Выполнение HTTP запроса к API
+        
+        Args:
+            method: HTTP метод (GET, POST, PUT, DELETE, PATCH)
+            endpoint: Конечная точка API (например, '/me')
+            params: Query параметры
+            json_data: JSON данные для тела запроса
+            long_poll: Запрос Long Polling (истёкшее ожидание - пустой ответ)
+            read_timeout: Таймаут чтения для этого запроса
+        
+        Returns:
+            dict: Ответ от API
+        
+        Raises:
+            MAXAPIException: При ошибке запроса
+        """
+        method = method.upper()
+        
+        if self.single_flight is not None and method == 'GET' and not long_poll:
+            # Одинаковые одновременные GET выполняются одним запросом
+            return await self.single_flight.do(
+                make_key(endpoint, params),
+                lambda: self._request_with_retry(method, endpoint, params, json_data, long_poll, read_timeout)
+            )
+        
+        if self.single_flight is None or method == 'GET':
+            return await self._request_with_retry(method, endpoint, params, json_data, long_poll, read_timeout)
+        
+        try:
+            return await self._request_with_retry(method, endpoint, params, json_data, long_poll, read_timeout)
+        finally:
+            # GET после изменения не должен присоединяться к чтению, начатому до него
+            path = make_key(endpoint)[0]
+            self.single_flight.forget_where(lambda key: key[0] == path)
+    
+    async def _request_with_retry(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[Dict[str, Any]],
+        json_data: Optional[Dict[str, Any]],
+        long_poll: bool,
+        read_timeout: Optional[float]
+    ) -> Dict[str, Any]:
+        """Выполнение запроса с повторами согласно retry_policy"""
+        if self.retry_policy is None:
+            return await self._send_request(method, endpoint, params, json_data, long_poll, read_timeout)
+        
+        deadline = self.retry_policy.start()
+        attempt = 1
+        
+        while True:
+            try:
+                return await self._send_request(method, endpoint, params, json_data, long_poll, read_timeout)
+            except MAXAPIException as e:
+                delay = self.retry_policy.next_delay(method, e, attempt, deadline)
+                if delay is None:
+                    raise
+                
+                logger.warning(
+                    f"{method.upper()} {endpoint}: {e}. "
+                    f"Повтор через {delay:.2f}s (попытка {attempt + 1})"
+                )
+                await asyncio.sleep(delay)
+                attempt += 1
+    
+    async def _send_request(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[Dict[str, Any]] = None,
+        json_data: Optional[Dict[str, Any]] = None,
+        long_poll: bool = False,
+        read_timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Одна попытка HTTP запроса к API (без повторов)
+        
+        Raises:
+            MAXAPIException: При ошибке запроса
+        """
+        # Применяем rate limiting: Long Polling не расходует лимит отправок
+        if not long_poll:
+            await self.rate_limiter.acquire()
+        elif self.poll_rate_limiter is not None:
+            await self.poll_rate_limiter.acquire()
+        
+        url = f"{self.base_url}/{endpoint.lstrip('/')}"
+        
+        if read_timeout is None:
+            read_timeout = self.timeout
+        
+        if self._http2 is not None:
+            return await self._send_http2(method, url, params, json_data, long_poll, read_timeout)
+        
+        session = self._get_poll_session() if long_poll else self._get_session()
+        
+        if long_poll:
+            timeout = aiohttp.ClientTimeout(
+                total=None,
+                sock_connect=self.poll_connect_timeout,
+                sock_read=read_timeout
+            )
+        else:
+            timeout = aiohttp.ClientTimeout(total=read_timeout)
+        
+        # Тело кодируется заранее, Content-Type: application/json задан в сессии
+        data = self.codec.dumps(json_data) if json_data is not None else None
+        
+        try:
+            async with session.request(
+                method.upper(),
+                url,
+                params=_stringify_params(params),
+                data=data,
+                timeout=timeout
+            ) as response:
+                content = await response.read()
+                self._handle_response(response.status, response.reason, response.headers, content)
+                
+                # Возвращаем JSON если есть содержимое
+                if content:
+                    return self.codec.loads(content)
+                return {}
+        
+        except asyncio.TimeoutError as e:
+            # Истёкший Long Polling - это пустой ответ, а не ошибка
+            if long_poll and not isinstance(e, _ConnectionTimeoutError):
+                logger.debug(f"Long Polling {endpoint}: нет ответа за {read_timeout}s")
+                return {}
+            raise MAXAPIException(f"Превышено время ожидания ({read_timeout}s)")
+        except aiohttp.ClientConnectionError:
+            raise MAXAPIException("Ошибка подключения к серверу MAX API")
+        except aiohttp.ClientError as e:
+            raise MAXAPIException(f"Ошибка запроса: {str(e)}")
+        except ValueError as e:
+            raise MAXAPIException(f"Некорректный JSON в ответе: {str(e)}")
+    
+    async def _send_http2(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Dict[str, Any]],
+        json_data: Optional[Dict[str, Any]],
+        long_poll: bool,
+        read_timeout: float
+    ) -> Dict[str, Any]:
+        """Одна попытка запроса через HTTP/2 транспорт"""
+        timeout = (self.poll_connect_timeout, read_timeout) if long_poll else read_timeout
+        data = self.codec.dumps(json_data) if json_data is not None else None
+        
+        try:
+            response = await self._http2.request(method.upper(), url, params, data, timeout)
+            self._handle_response(response.status_code, response.reason, response.headers, response.content)
+            
+            if response.content:
+                return self.codec.loads(response.content)
+            return {}
+        
+        except TransportTimeout as e:
+            # Истёкший Long Polling - это пустой ответ, а не ошибка
+            if long_poll and isinstance(e, ReadTimeout):
+                logger.debug(f"Long Polling {url}: нет ответа за {read_timeout}s")
+                return {}
+            raise MAXAPIException(f"Превышено время ожидания ({read_timeout}s)")
+        except TransportConnectionError:
+            raise MAXAPIException("Ошибка подключения к серверу MAX API")
+        except TransportError as e:
+            raise MAXAPIException(f"Ошибка запроса: {str(e)}")
+        except ValueError as e:
+            raise MAXAPIException(f"Некорректный JSON в ответе: {str(e)}")
+    
+    def _handle_response(self, status: int, reason: Optional[str], headers, content: bytes):
+        """
+        Обработка ответа от API и генерация соответствующих исключений
+        
+        Args:
+            status: HTTP код ответа
+            reason: Текстовое описание кода ответа
+            headers: Заголовки ответа
+            content: Прочитанное тело ответа
+        
+        Raises:
+            MAXAPIException: Соответствующее исключение в зависимости от кода ответа
+        """
+        if status == 200:
+            return
+        
+        # Пытаемся извлечь детали ошибки из ответа
+        error_data = None
+        try:
+            error_data = self.codec.loads(content)
+            error_message = error_data.get('message', '') or error_data.get('error', '')
+        except Exception:
+            error_message = content.decode('utf-8', errors='replace') or reason
+        
+        _raise_api_error(
+            status,
+            error_message,
+            error_data,
+            retry_after=parse_retry_after(headers.get('Retry-After'))
+        )
+    
+    # === Информация о боте ===
+    
+    async def get_me(self) -> Dict[str, Any]:
+        """
+        Получение информации о боте
+        
+        Returns:
+            dict: Информация о боте (user_id, name, username, is_bot, last_activity_time)
+        """
+        return await self._make_request('GET', '/me')
+    
+    # === Работа с сообщениями ===
+    
+    async def send_message(
+        self,
+        chat_id: int,
+        text: str,
+        attachments: Optional[List[Dict[str, Any]]] = None,
+        format: Optional[str] = None,
+        link_preview: bool = True,
+        notify: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Отправка сообщения в чат
+        
+        Args:
+            chat_id: ID получателя (положительный - пользователь, отрицательный - группа)
+            text: Текст сообщения
+            attachments: Список вложений (inline_keyboard, файлы и т.д.)
+            format: Формат текста ('markdown' или 'html')
+            link_preview: Показывать ли превью ссылок
+            notify: Уведомлять ли участников чата
+        
+        Returns:
+            dict: Отправленное сообщение
+        """
+        params, message_body = _build_message_request(
+            chat_id, text, attachments, format, link_preview, notify
+        )
+        
+        return await self._make_request('POST', '/messages', params=params, json_data=message_body)
+    
+    async def get_message(self, message_id: str) -> Dict[str, Any]:
+        """
+        Получение сообщения по ID
+        
+        Args:
+            message_id: ID сообщения
+        
+        Returns:
+            dict: Информация о сообщении
+        """
+        return await self._make_request('GET', f'/messages/{message_id}')
+    
+    async def edit_message(
+        self,
+        message_id: str,
+        text: str,
+        attachments: Optional[List[Dict[str, Any]]] = None,
+        format: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Редактирование сообщения
+        
+        Args:
+            message_id: ID сообщения для редактирования
+            text: Новый текст сообщения
+            attachments: Новые вложения
+            format: Формат текста ('markdown' или 'html')
+        
+        Returns:
+            dict: Обновленное сообщение
+        """
+        message_body = _build_edit_body(text, attachments, format)
+        
+        return await self._make_request('PUT', f'/messages/{message_id}', json_data=message_body)
+    
+    async def delete_message(self, message_id: str) -> Dict[str, Any]:
+        """
+        Удаление сообщения
+        
+        Args:
+            message_id: ID сообщения для удаления
+        
+        Returns:
+            dict: Результат удаления
+        """
+        return await self._make_request('DELETE', f'/messages/{message_id}')
+    
+    # === Получение обновлений (Long Polling) ===
+    
+    async def get_updates(
+        self,
+        limit: Optional[int] = None,
+        timeout: int = 30,
+        marker: Optional[int] = None,
+        update_types: Optional[List[str]] = None
+    ) -> UpdatesBatch:
+        """
+        Получение обновлений через Long Polling
+        
+        Args:
+            limit: Максимальное количество обновлений для получения
+            timeout: Таймаут ожидания в секундах (long polling)
+            marker: Маркер последнего полученного обновления
+            update_types: Список типов обновлений для получения
+        
+        Returns:
+            UpdatesBatch: Список обновлений (пустой, если за timeout обновлений не было)
+                          с маркером для следующего запроса в атрибуте marker
+        """
+        params = _build_updates_params(limit, timeout, marker, update_types)
+        result = await self._make_request(
+            'GET', '/updates', params=params,
+            long_poll=True, read_timeout=(timeout or self.timeout) + self.poll_timeout_margin
+        )
+        return _extract_updates(result)
+    
+    # === Управление подписками (Webhook) ===
+    
+    async def create_subscription(
+        self,
+        url: str,
+        update_types: Optional[List[str]] = None,
+        version: str = "1.0"
+    ) -> Dict[str, Any]:
+        """
+        Создание подписки на обновления (Webhook)
+        
+        Args:
+            url: URL для получения вебхуков (только HTTPS)
+            update_types: Типы обновлений для получения
+            version: Версия API
+        
+        Returns:
+            dict: Информация о созданной подписке
+        """
+        subscription_data = _build_subscription_body(url, update_types, version)
+        
+        return await self._make_request('POST', '/subscriptions', json_data=subscription_data)
+    
+    async def get_subscriptions(self) -> List[Dict[str, Any]]:
+        """
+        Получение списка активных подписок
+        
+        Returns:
+            list: Список подписок
+        """
+        result = await self._make_request('GET', '/subscriptions')
+        return _extract_subscriptions(result)
+    
+    async def delete_subscription(self, url: str) -> Dict[str, Any]:
+        """
+        Удаление подписки
+        
+        Args:
+            url: URL подписки для удаления
+        
+        Returns:
+            dict: Результат удаления
+        """
+        return await self._make_request('DELETE', '/subscriptions', params={'url': url})
+    
+    # === Вспомогательные методы ===
+    
+    async def close(self):
+        """Закрытие сессий"""
+        for session in (self._session, self._poll_session):
+            if session is not None and not session.closed:
+                await session.close()
+        self._session = None
+        self._poll_session = None
+        if self._http2 is not None:
+            await self._http2.close()
+    
+    async def __aenter__(self):
+        """Поддержка асинхронного контекстного менеджера"""
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Закрытие при выходе из контекста"""
+        await self.close()
+
+
+def _stringify_params(params: Optional[Dict[str, Any]]) -> Optional[Dict[str, str]]:
+    """
+    Приведение query-параметров к строкам.
+    
+    aiohttp, в отличие от requests, не принимает bool и int в params,
+    поэтому значения сериализуются так же, как это делает requests.
+    """
+    if not params:
+        return None
+    return {key: str(value) for key, value in params.items()}
@@ -0,0 +1,445 @@
+"""
+Массовая рассылка сообщения с сохранением прогресса
+"""
+
+import time
+import logging
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Optional, Dict, Any, Iterable, Iterator, Set
+
+from .checkpoint import CheckpointStore
+from .exceptions import (
+    MAXAPIException,
+    AuthenticationError,
+    MethodNotAllowedError,
+    RateLimitError,
+    ServiceUnavailableError,
+    CircuitOpenError,
+)
+
+logger = logging.getLogger(__name__)
+
+# Классы ошибок отправки
+PERMANENT = 'permanent'
+TRANSIENT = 'transient'
+FATAL = 'fatal'
+
+
+def classify_error(error: BaseException) -> str:
+    """
+    Класс ошибки отправки одному получателю
+    
+    Args:
+        error: Исключение send_message
+    
+    Returns:
+        str: PERMANENT - ошибка получателя (невалидный chat_id, 400, 403, 404),
+             повтор не поможет; TRANSIENT - временная ошибка (429, 5xx, сеть),
+             повтор позже может пройти; FATAL - ошибка, общая для всех
+             получателей (401, 405, разомкнутая цепь, ошибка в коде),
+             рассылку нужно остановить
+    """
+    if isinstance(error, (AuthenticationError, MethodNotAllowedError, CircuitOpenError)):
+        return FATAL
+    if isinstance(error, (RateLimitError, ServiceUnavailableError)):
+        return TRANSIENT
+    if isinstance(error, MAXAPIException):
+        # Без кода ответа - таймаут или ошибка подключения
+        if error.status_code is None or error.status_code >= 500:
+            return TRANSIENT
+        return PERMANENT
+    if isinstance(error, ValueError):
+        # Невалидный chat_id (полоса проверяется до начала рассылки)
+        return PERMANENT
+    return FATAL
+
+
+class BroadcastResult(namedtuple('BroadcastResult', 'index chat_id message error')):
+    """
+    Результат отправки одному получателю
+    
+    Attributes:
+        index: Номер получателя во входной последовательности
+        chat_id: ID получателя
+        message: Отправленное сообщение (None при ошибке)
+        error: Исключение (None при успехе)
+    """
+    
+    __slots__ = ()
+    
+    @property
+    def ok(self) -> bool:
+        """Сообщение отправлено"""
+        return self.error is None
+
+
+class Broadcast:
+    """
+    Рассылка одного сообщения множеству получателей.
+    
+    Сообщения отправляются параллельно (concurrency потоков) через
+    send_message клиента в полосе bulk, поэтому рассылка укладывается
+    в общий лимит и не задерживает ответы пользователям. Результаты
+    выдаются по мере завершения отправок, не в порядке получателей.
+    
+    Прогресс сохраняется в checkpoint: номер, до которого обработаны все
+    получатели (low-water mark), номера обработанных после него и номера
+    отложенных получателей. Перезапущенная с тем же checkpoint рассылка
+    пропускает обработанных получателей, поэтому chat_ids при перезапуске
+    должны идти в том же порядке. Прогресс сохраняется каждые
+    checkpoint_interval отправок: после падения процесса повторно
+    отправляются не больше checkpoint_interval + concurrency сообщений
+    (at-least-once).
+    
+    Ошибки отправки (см. classify_error):
+    
+    - ошибка получателя (невалидный chat_id, 400, 403, 404) возвращается
+      в BroadcastResult.error, получатель считается обработанным
+    - временная ошибка (429, 5xx, сеть) повторяется с экспоненциальной
+      задержкой до retry_attempts попыток; если они исчерпаны, получатель
+      откладывается: перезапуск с тем же checkpoint отправит ему снова
+    - общая ошибка (401, разомкнутая цепь) останавливает рассылку: начатые
+      отправки завершаются, прогресс сохраняется, исключение выбрасывается
+      из run(); получатель с этой ошибкой не считается обработанным
+    
+    Example:
+        >>> job = client.broadcast(user_ids, "Новости недели",
+        ...                        checkpoint=FileCheckpointStore("news.json"))
+        >>> for result in job:
+        ...     if not result.ok:
+        ...         log.warning("%s: %s", result.chat_id, result.error)
+        >>> job.get_stats()
+        {'total': 250000, 'processed': 249990, 'sent': 249870, 'failed': 120, 'deferred': 10, ...}
+    """
+    
+    def __init__(
+        self,
+        client: Any,
+        chat_ids: Iterable[int],
+        text: str,
+        checkpoint: Optional[CheckpointStore] = None,
+        concurrency: int = 8,
+        lane: Optional[str] = 'bulk',
+        total: Optional[int] = None,
+        checkpoint_interval: int = 100,
+        retry_attempts: int = 3,
+        retry_delay: float = 1.0,
+        max_retry_delay: float = 30.0,
+        **message: Any
+    ):
+        """
+        Args:
+            client: MAXClient
+            chat_ids: Получатели (список или поток, например курсор базы данных)
+            text: Текст сообщения
+            checkpoint: Хранилище прогресса (None - без возобновления)
+            concurrency: Количество одновременных отправок (не больше
+                         pool_maxsize клиента, иначе лишние соединения не переиспользуются)
+            lane: Полоса планировщика клиента
+            total: Количество получателей для расчёта ETA
+                   (по умолчанию len(chat_ids), если он есть)
+            checkpoint_interval: Сохранять прогресс каждые N отправок
+            retry_attempts: Попыток отправки одному получателю при временных ошибках
+            retry_delay: Задержка перед второй попыткой в секундах (далее удваивается)
+            max_retry_delay: Максимальная задержка между попытками (в том числе
+                             из Retry-After)
+            **message: Параметры send_message (attachments, format,
+                       link_preview, notify)
+        
+        Raises:
+            ValueError: Неположительные concurrency / retry_attempts или неизвестная полоса
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency должен быть положительным")
+        if retry_attempts < 1:
+            raise ValueError("retry_attempts должен быть не меньше 1")
+        
+        # Неизвестная полоса - ошибка всей рассылки, а не каждого получателя
+        scheduler = getattr(client, 'scheduler', None)
+        if lane is not None and scheduler is not None and lane not in scheduler.lanes:
+            raise ValueError(f"Неизвестная полоса: {lane}. Доступны: {', '.join(scheduler.lanes)}")
+        
+        self.client = client
+        self.chat_ids = chat_ids
+        self.text = text
+        self.checkpoint = checkpoint
+        self.concurrency = concurrency
+        self.lane = lane
+        self.checkpoint_interval = checkpoint_interval
+        self.retry_attempts = retry_attempts
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.message = message
+        if total is None and hasattr(chat_ids, '__len__'):
+            total = len(chat_ids)
+        self.total = total
+        
+        self._lock = threading.Lock()
+        self._running = False
+        # Остановка рассылки: ожидающие повтора отправки завершаются сразу
+        self._stopping = threading.Event()
+        # Все получатели с номером меньше _mark обработаны или отложены
+        self._mark = 0
+        # Обработанные или отложенные получатели с номером не меньше _mark
+        self._done: Set[int] = set()
+        # Отложенные после временных ошибок получатели (отправляются при перезапуске)
+        self._retry: Set[int] = set()
+        self._sent = 0
+        self._failed = 0
+        self._failures: Dict[str, int] = {}
+        self._skipped = 0
+        self._in_flight = 0
+        self._processed_now = 0
+        self._started: Optional[float] = None
+        self._finished: Optional[float] = None
+    
+    def __iter__(self) -> Iterator[BroadcastResult]:
+        return self.run()
+    
+    def _restore(self) -> None:
+        """Загрузка прогресса из checkpoint"""
+        state = self.checkpoint.load() if self.checkpoint is not None else None
+        if not state:
+            return
+        
+        self._mark = state['next']
+        # Номера меньше _mark покрываются самим _mark
+        self._done = {index for index in state['done'] if index >= self._mark}
+        self._retry = set(state.get('retry', ()))
+        self._sent = state['sent']
+        self._failed = state['failed']
+        self._failures = dict(state['failures'])
+        logger.info(
+            f"Рассылка продолжается: обработано {self._sent + self._failed}, "
+            f"с получателя №{self._mark}, отложено {len(self._retry)}"
+        )
+    
+    def _save(self) -> None:
+        """Сохранение прогресса в checkpoint"""
+        if self.checkpoint is None:
+            return
+        
+        with self._lock:
+            state = {
+                'next': self._mark,
+                'done': sorted(self._done),
+                'retry': sorted(self._retry),
+                'sent': self._sent,
+                'failed': self._failed,
+                'failures': dict(self._failures),
+            }
+        self.checkpoint.save(state)
+    
+    def _is_done(self, index: int) -> bool:
+        """Получатель обработан прошлым запуском и не отложен"""
+        return (index < self._mark or index in self._done) and index not in self._retry
+    
+    def _backoff(self, error: BaseException, attempt: int) -> float:
+        """Задержка перед повтором после временной ошибки"""
+        retry_after = getattr(error, 'retry_after', None)
+        delay = retry_after if retry_after is not None else self.retry_delay * 2 ** (attempt - 1)
+        return min(delay, self.max_retry_delay)
+    
+    def _send(self, index: int, chat_id: int) -> BroadcastResult:
+        """Отправка одному получателю с повторами временных ошибок (в рабочем потоке)"""
+        attempt = 1
+        while True:
+            try:
+                message = self.client.send_message(chat_id, self.text, lane=self.lane, **self.message)
+            except Exception as e:
+                if classify_error(e) != TRANSIENT or attempt >= self.retry_attempts:
+                    return BroadcastResult(index, chat_id, None, e)
+                # Остановленная рассылка не ждёт повтора: получатель будет отложен
+                if self._stopping.wait(self._backoff(e, attempt)):
+                    return BroadcastResult(index, chat_id, None, e)
+                attempt += 1
+            else:
+                return BroadcastResult(index, chat_id, message, None)
+    
+    def _record(self, result: BroadcastResult) -> Optional[BaseException]:
+        """
+        Учёт завершённой отправки
+        
+        Returns:
+            Исключение, если ошибка общая и рассылку нужно остановить
+        """
+        kind = classify_error(result.error) if result.error is not None else None
+        
+        with self._lock:
+            self._in_flight -= 1
+            if result.error is not None:
+                name = type(result.error).__name__
+                self._failures[name] = self._failures.get(name, 0) + 1
+            
+            if kind == FATAL:
+                # Получатель не обработан: перезапуск отправит ему снова
+                return result.error
+            
+            self._processed_now += 1
+            if kind == TRANSIENT:
+                self._retry.add(result.index)
+            else:
+                self._retry.discard(result.index)
+                if kind is None:
+                    self._sent += 1
+                else:
+                    self._failed += 1
+            
+            # Отложенный ранее получатель с номером меньше _mark уже покрыт им
+            if result.index >= self._mark:
+                self._done.add(result.index)
+            while self._mark in self._done:
+                self._done.remove(self._mark)
+                self._mark += 1
+        
+        return None
+    
+    def run(self) -> Iterator[BroadcastResult]:
+        """
+        Выполнение рассылки
+        
+        Yields:
+            BroadcastResult: Результаты в порядке завершения отправок
+        
+        Raises:
+            RuntimeError: Рассылка уже выполняется
+            Exception: Общая ошибка отправки (AuthenticationError, CircuitOpenError и т.д.),
+                       остановившая рассылку
+        """
+        with self._lock:
+            if self._running:
+                raise RuntimeError("Рассылка уже выполняется")
+            self._running = True
+        
+        self._restore()
+        self._skipped = 0
+        self._processed_now = 0
+        self._started = time.monotonic()
+        self._finished = None
+        self._stopping.clear()
+        
+        executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='max-broadcast')
+        pending = set()
+        since_save = 0
+        
+        try:
+            recipients = iter(enumerate(self.chat_ids))
+            exhausted = False
+            
+            while True:
+                # Очередь отправок пополняется из потока получателей по мере освобождения мест
+                while not exhausted and len(pending) < self.concurrency:
+                    try:
+                        index, chat_id = next(recipients)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    if self._is_done(index):
+                        self._skipped += 1
+                        continue
+                    with self._lock:
+                        self._in_flight += 1
+                    pending.add(executor.submit(self._send, index, chat_id))
+                
+                if not pending:
+                    break
+                
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                results = [future.result() for future in finished]
+                fatal = None
+                recorded = []
+                for result in results:
+                    error = self._record(result)
+                    if error is None:
+                        recorded.append(result)
+                    elif fatal is None:
+                        fatal = error
+                if fatal is not None:
+                    # Завершённые в этом же раунде отправки сохраняются и отдаются
+                    # вызывающему до исключения
+                    logger.error(f"Рассылка остановлена: {type(fatal).__name__}: {fatal}")
+                    self._save()
+                    for result in recorded:
+                        yield result
+                    raise fatal
+                
+                since_save += len(results)
+                if since_save >= self.checkpoint_interval:
+                    self._save()
+                    since_save = 0
+                
+                for result in results:
+                    yield result
+        finally:
+            # Прерванная рассылка (break, исключение): ждём начатые отправки,
+            # чтобы сохранить их в checkpoint и не отправить повторно
+            self._stopping.set()
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+            for future in pending:
+                if future.cancelled():
+                    with self._lock:
+                        self._in_flight -= 1
+                else:
+                    self._record(future.result())
+            
+            self._save()
+            self._finished = time.monotonic()
+            with self._lock:
+                self._running = False
+    
+    def wait(self) -> Dict[str, Any]:
+        """
+        Выполнение рассылки до конца без получения результатов
+        
+        Returns:
+            dict: Итоговая статистика (см. get_stats)
+        """
+        for _ in self.run():
+            pass
+        return self.get_stats()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Прогресс рассылки (можно вызывать из другого потока во время рассылки)
+        
+        Returns:
+            dict: total - получателей (None, если неизвестно),
+                  processed / sent / failed - обработано, отправлено, ошибок получателя
+                  (включая прошлые запуски с тем же checkpoint),
+                  deferred - отложено после временных ошибок,
+                  skipped - пропущено как обработанные ранее,
+                  in_flight - отправляются сейчас,
+                  elapsed - длительность запуска в секундах,
+                  rate - сообщений в секунду в этом запуске,
+                  eta - оценка оставшегося времени в секундах (None, если неизвестно),
+                  failures - неудачные отправки по классам исключений {'RateLimitError': 3}
+        """
+        with self._lock:
+            processed = self._sent + self._failed
+            if self._started is None:
+                elapsed = 0.0
+            else:
+                elapsed = (self._finished or time.monotonic()) - self._started
+            rate = self._processed_now / elapsed if elapsed > 0 else 0.0
+            
+            eta = None
+            if self.total is not None and rate > 0:
+                eta = max(self.total - processed - len(self._retry), 0) / rate
+            
+            return {
+                'total': self.total,
+                'processed': processed,
+                'sent': self._sent,
+                'failed': self._failed,
+                'deferred': len(self._retry),
+                'skipped': self._skipped,
+                'in_flight': self._in_flight,
+                'elapsed': elapsed,
+                'rate': rate,
+                'eta': eta,
+                'failures': dict(self._failures),
+            }
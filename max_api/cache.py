@@ -0,0 +1,315 @@
+"""
+Кэш ответов API для читающих запросов (TTL + LRU)
+"""
+
+import copy
+import time
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple, Iterable
+
+# Значение, возвращаемое при промахе кэша
+MISSING = object()
+
+
+def endpoint_group(endpoint: str) -> str:
+    """
+    Группа конечной точки: первый сегмент пути
+    
+    Args:
+        endpoint: Конечная точка API (например, '/messages/mid.123')
+    
+    Returns:
+        str: Группа ('/messages')
+    """
+    path = endpoint.strip('/')
+    return '/' + path.split('/', 1)[0]
+
+
+def make_key(endpoint: str, params: Optional[Dict[str, Any]] = None) -> Tuple[str, Any]:
+    """
+    Ключ запроса: нормализованный путь и отсортированные query параметры
+    
+    Args:
+        endpoint: Конечная точка API
+        params: Query параметры
+    
+    Returns:
+        tuple: Хешируемый ключ
+    """
+    path = '/' + endpoint.strip('/')
+    if not params:
+        return path, None
+    return path, tuple(sorted((k, str(v)) for k, v in params.items()))
+
+
+class TTLCache:
+    """
+    Потокобезопасный LRU-кэш с временем жизни записей.
+    
+    Операции get/set/delete выполняются за O(1). При превышении maxsize
+    вытесняется запись, к которой дольше всего не обращались.
+    """
+    
+    def __init__(self, ttl: float = 30.0, maxsize: int = 1024):
+        """
+        Args:
+            ttl: Время жизни записи в секундах
+            maxsize: Максимальное количество записей
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Any, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def __len__(self) -> int:
+        return len(self._data)
+    
+    def get(self, key: Any) -> Any:
+        """
+        Получение значения
+        
+        Returns:
+            Значение или MISSING
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return MISSING
+            
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return MISSING
+            
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def set(self, key: Any, value: Any) -> None:
+        """Сохранение значения"""
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+    
+    def delete(self, key: Any) -> None:
+        """Удаление значения"""
+        with self._lock:
+            self._data.pop(key, None)
+    
+    def delete_where(self, predicate) -> int:
+        """
+        Удаление всех записей, ключ которых удовлетворяет условию
+        
+        Returns:
+            int: Количество удалённых записей
+        """
+        with self._lock:
+            keys = [key for key in self._data if predicate(key)]
+            for key in keys:
+                del self._data[key]
+            return len(keys)
+    
+    def clear(self) -> None:
+        """Очистка кэша"""
+        with self._lock:
+            self._data.clear()
+    
+    def _after_fork(self) -> None:
+        """Новая блокировка в дочернем процессе"""
+        self._lock = threading.Lock()
+
+
+class ResponseCache:
+    """
+    Кэш ответов GET-запросов MAXClient.
+    
+    Для каждой группы конечных точек ('/me', '/messages', '/subscriptions')
+    используется отдельный TTLCache со своими TTL и лимитом размера.
+    Изменяющие запросы (PUT, POST, DELETE, PATCH) к конечной точке
+    автоматически удаляют закэшированные ответы этой конечной точки:
+    edit_message и delete_message сбрасывают get_message для этого
+    сообщения, create_subscription и delete_subscription - get_subscriptions.
+    Ответ GET-запроса, начатого до сброса его конечной точки, в кэш
+    не сохраняется; сброс других конечных точек (например, POST /messages
+    при отправке сообщения) на него не влияет.
+    
+    /updates никогда не кэшируется.
+    
+    Example:
+        >>> cache = ResponseCache(ttl=30, endpoints={'/me': {'ttl': 3600, 'maxsize': 1}})
+        >>> client = MAXClient(token="...", cache=cache)
+        >>> client.get_message(mid)   # запрос к API
+        >>> client.get_message(mid)   # из кэша
+        >>> cache.get_stats()
+    """
+    
+    DEFAULT_ENDPOINTS = ('/me', '/messages', '/subscriptions')
+    
+    # Сколько последних сброшенных путей помнить для проверки поколения
+    MAX_TRACKED_INVALIDATIONS = 1024
+    
+    def __init__(
+        self,
+        ttl: float = 30.0,
+        maxsize: int = 1024,
+        endpoints: Optional[Dict[str, Dict[str, Any]]] = None,
+        cacheable: Iterable[str] = DEFAULT_ENDPOINTS
+    ):
+        """
+        Args:
+            ttl: Время жизни записи по умолчанию (секунды)
+            maxsize: Лимит записей по умолчанию для каждой группы
+            endpoints: Настройки групп: {'/messages': {'ttl': 10, 'maxsize': 10000}}
+            cacheable: Группы конечных точек, ответы которых кэшируются
+        """
+        endpoints = endpoints or {}
+        self._caches: Dict[str, TTLCache] = {}
+        
+        for group in set(cacheable) | set(endpoints):
+            options = endpoints.get(group, {})
+            self._caches[group] = TTLCache(
+                ttl=options.get('ttl', ttl),
+                maxsize=options.get('maxsize', maxsize)
+            )
+        
+        self._caches.pop('/updates', None)
+        
+        # Номер последнего invalidate и номера сбросов по путям: ответ на запрос,
+        # начатый до сброса своего пути, может быть старше изменения.
+        # Забытые сбросы (сверх MAX_TRACKED_INVALIDATIONS) поднимают _floor:
+        # ответы запросов, начатых до них, не сохраняются для любого пути
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._floor = 0
+        self._invalidated: "OrderedDict[str, int]" = OrderedDict()
+    
+    def get(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """
+        Получение закэшированного ответа
+        
+        Returns:
+            Копия ответа или MISSING
+        """
+        cache = self._caches.get(endpoint_group(endpoint))
+        if cache is None:
+            return MISSING
+        
+        value = cache.get(make_key(endpoint, params))
+        if value is MISSING:
+            return MISSING
+        
+        # Возвращаем копию, чтобы изменения у вызывающего не портили кэш
+        return copy.deepcopy(value)
+    
+    def generation(self, endpoint: str) -> int:
+        """
+        Текущее поколение кэша
+        
+        Считывается перед GET-запросом и передаётся в set() вместе с ответом.
+        
+        Args:
+            endpoint: Конечная точка API
+        
+        Returns:
+            int: Номер последнего вызова invalidate
+        """
+        return self._generation
+    
+    def set(
+        self,
+        endpoint: str,
+        params: Optional[Dict[str, Any]],
+        value: Any,
+        generation: Optional[int] = None
+    ) -> None:
+        """
+        Сохранение ответа
+        
+        Args:
+            endpoint: Конечная точка API
+            params: Query параметры запроса
+            value: Ответ API
+            generation: Поколение, считанное через generation() перед запросом;
+                        если с тех пор был invalidate этого пути, ответ
+                        не сохраняется
+        """
+        cache = self._caches.get(endpoint_group(endpoint))
+        if cache is None:
+            return
+        
+        key = make_key(endpoint, params)
+        value = copy.deepcopy(value)
+        with self._lock:
+            if generation is not None and (
+                generation < self._floor or self._invalidated.get(key[0], 0) > generation
+            ):
+                return
+            cache.set(key, value)
+    
+    def invalidate(self, endpoint: str) -> None:
+        """
+        Удаление закэшированных ответов конечной точки (с любыми параметрами)
+        
+        Args:
+            endpoint: Конечная точка API
+        """
+        cache = self._caches.get(endpoint_group(endpoint))
+        if cache is not None:
+            path = make_key(endpoint)[0]
+            with self._lock:
+                self._generation += 1
+                self._invalidated[path] = self._generation
+                self._invalidated.move_to_end(path)
+                while len(self._invalidated) > self.MAX_TRACKED_INVALIDATIONS:
+                    _, self._floor = self._invalidated.popitem(last=False)
+                cache.delete_where(lambda key: key[0] == path)
+    
+    def clear(self) -> None:
+        """Очистка всего кэша"""
+        for cache in self._caches.values():
+            cache.clear()
+    
+    def _after_fork(self) -> None:
+        """Восстановление в дочернем процессе после os.fork()"""
+        self._lock = threading.Lock()
+        for cache in self._caches.values():
+            cache._after_fork()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Статистика кэша
+        
+        Returns:
+            dict: hits, misses, hit_rate и статистика по группам конечных точек
+                  (size, hits, misses, evictions, expirations)
+        """
+        endpoints = {
+            group: {
+                'size': len(cache),
+                'hits': cache.hits,
+                'misses': cache.misses,
+                'evictions': cache.evictions,
+                'expirations': cache.expirations,
+            }
+            for group, cache in self._caches.items()
+        }
+        hits = sum(s['hits'] for s in endpoints.values())
+        misses = sum(s['misses'] for s in endpoints.values())
+        
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+            'endpoints': endpoints,
+        }
@@ -0,0 +1,159 @@
+"""
+Хранилища маркера обновлений (checkpoint) для UpdateManager
+"""
+
+import os
+import json
+import tempfile
+import threading
+from typing import Optional, Any
+
+
+class CheckpointStore:
+    """
+    Базовый класс хранилища маркера Long Polling.
+    
+    UpdateManager сохраняет маркер только после того, как обработчики
+    закончили обработку пачки обновлений. После перезапуска бот продолжает
+    с сохранённого маркера: необработанные обновления будут получены снова
+    (at-least-once), уже обработанные - нет.
+    """
+    
+    def load(self) -> Optional[Any]:
+        """
+        Загрузка сохранённого маркера
+        
+        Returns:
+            Маркер или None, если он ещё не сохранялся
+        """
+        raise NotImplementedError
+    
+    def save(self, marker: Any) -> None:
+        """
+        Сохранение маркера
+        
+        Args:
+            marker: Маркер из ответа /updates
+        """
+        raise NotImplementedError
+    
+    def close(self) -> None:
+        """Освобождение ресурсов хранилища"""
+
+
+class MemoryCheckpointStore(CheckpointStore):
+    """Хранилище маркера в памяти процесса (для тестов и разработки)"""
+    
+    def __init__(self, marker: Optional[Any] = None):
+        """
+        Args:
+            marker: Начальный маркер
+        """
+        self._marker = marker
+    
+    def load(self) -> Optional[Any]:
+        return self._marker
+    
+    def save(self, marker: Any) -> None:
+        self._marker = marker
+
+
+class FileCheckpointStore(CheckpointStore):
+    """
+    Хранилище маркера в JSON-файле.
+    
+    Запись атомарная: маркер пишется во временный файл в той же директории,
+    сбрасывается на диск (fsync) и подменяет основной файл через os.replace,
+    после чего на диск сбрасывается и директория, чтобы переименование
+    пережило отключение питания. При падении процесса в момент записи
+    остаётся либо старый, либо новый маркер, но не повреждённый файл.
+    """
+    
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Путь к файлу маркера
+        """
+        self.path = os.path.abspath(path)
+        self._lock = threading.Lock()
+    
+    def load(self) -> Optional[Any]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f).get('marker')
+        except FileNotFoundError:
+            return None
+    
+    def save(self, marker: Any) -> None:
+        directory = os.path.dirname(self.path)
+        
+        with self._lock:
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.checkpoint-', suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump({'marker': marker}, f)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
+            
+            # Запись о переименовании хранится в директории; на Windows
+            # директорию нельзя открыть, и NTFS журналирует её сама
+            if os.name != 'nt':
+                dir_fd = os.open(directory, os.O_RDONLY)
+                try:
+                    os.fsync(dir_fd)
+                finally:
+                    os.close(dir_fd)
+
+
+class SQLiteCheckpointStore(CheckpointStore):
+    """
+    Хранилище маркера в SQLite.
+    
+    Одна база может хранить маркеры нескольких ботов (ключ key).
+    Каждое сохранение выполняется в отдельной транзакции.
+    """
+    
+    def __init__(self, path: str, key: str = 'default'):
+        """
+        Args:
+            path: Путь к файлу базы данных
+            key: Ключ маркера (например, имя бота)
+        """
+        # sqlite3 нужен только этому хранилищу
+        import sqlite3
+        
+        self.path = path
+        self.key = key
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS checkpoints ("
+                "key TEXT PRIMARY KEY, "
+                "marker TEXT NOT NULL, "
+                "updated_at REAL NOT NULL DEFAULT (julianday('now')))"
+            )
+    
+    def load(self) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT marker FROM checkpoints WHERE key = ?", (self.key,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+    
+    def save(self, marker: Any) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (key, marker, updated_at) "
+                "VALUES (?, ?, julianday('now'))",
+                (self.key, json.dumps(marker))
+            )
+    
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,290 @@
+"""
+Автоматический выключатель (circuit breaker) для запросов к MAX API
+"""
+
+import time
+import logging
+import threading
+from enum import Enum
+from typing import Optional, Callable, Dict, Any, Tuple, List
+
+from .cache import endpoint_group
+from .exceptions import MAXAPIException, CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitState(Enum):
+    """Состояния цепи"""
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class _Circuit:
+    """Состояние цепи одной пары (метод, конечная точка)"""
+    
+    __slots__ = ('state', 'failures', 'successes', 'opened_at', 'probes', 'rejected')
+    
+    def __init__(self):
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+        self.successes = 0
+        self.opened_at = 0.0
+        self.probes = 0
+        self.rejected = 0
+
+
+def is_failure(error: MAXAPIException) -> bool:
+    """
+    Считается ли ошибка признаком недоступности API
+    
+    Ошибки подключения, таймауты и ответы 5xx - да. Ответы 4xx (в том числе
+    429) означают, что API отвечает, и цепь не размыкают.
+    
+    Args:
+        error: Исключение запроса
+    
+    Returns:
+        bool: True для ошибок недоступности
+    """
+    if isinstance(error, CircuitOpenError):
+        return False
+    return error.status_code is None or error.status_code >= 500
+
+
+class CircuitBreaker:
+    """
+    Автоматический выключатель для MAXClient.
+    
+    Для каждой пары (HTTP метод, группа конечных точек) ведётся своя цепь:
+    
+    - closed: запросы выполняются; после failure_threshold ошибок подряд
+      цепь размыкается
+    - open: запросы сразу завершаются CircuitOpenError без обращения к API;
+      через recovery_timeout цепь переходит в half_open
+    - half_open: пропускается до half_open_max_calls пробных запросов;
+      success_threshold успешных - цепь замыкается, любая ошибка - снова open
+    
+    Example:
+        >>> def on_change(key, old, new):
+        ...     logger.warning(f"{key}: {old.value} -> {new.value}")
+        >>>
+        >>> breaker = CircuitBreaker(failure_threshold=5, recovery_timeout=30, on_state_change=on_change)
+        >>> client = MAXClient(token="...", circuit_breaker=breaker)
+    """
+    
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+        success_threshold: int = 1,
+        on_state_change: Optional[Callable[[Tuple[str, str], CircuitState, CircuitState], Any]] = None
+    ):
+        """
+        Args:
+            failure_threshold: Ошибок подряд до размыкания цепи
+            recovery_timeout: Время в разомкнутом состоянии до пробных запросов (секунды)
+            half_open_max_calls: Одновременных пробных запросов в half_open
+            success_threshold: Успешных пробных запросов для замыкания цепи
+            on_state_change: Обработчик on_state_change(key, old_state, new_state),
+                             key - (метод, группа конечных точек)
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.success_threshold = success_threshold
+        self.on_state_change = on_state_change
+        self._lock = threading.Lock()
+        self._circuits: Dict[Tuple[str, str], _Circuit] = {}
+    
+    @staticmethod
+    def key(method: str, endpoint: str) -> Tuple[str, str]:
+        """Ключ цепи для запроса"""
+        return method.upper(), endpoint_group(endpoint)
+    
+    def state(self, method: str, endpoint: str) -> CircuitState:
+        """
+        Текущее состояние цепи
+        
+        Args:
+            method: HTTP метод
+            endpoint: Конечная точка API
+        
+        Returns:
+            CircuitState
+        """
+        with self._lock:
+            circuit = self._circuits.get(self.key(method, endpoint))
+            return circuit.state if circuit is not None else CircuitState.CLOSED
+    
+    def before_request(self, method: str, endpoint: str) -> None:
+        """
+        Проверка перед запросом
+        
+        Raises:
+            CircuitOpenError: Если цепь разомкнута
+        """
+        key = self.key(method, endpoint)
+        changes = []
+        
+        with self._lock:
+            circuit = self._circuits.get(key)
+            if circuit is None:
+                circuit = self._circuits[key] = _Circuit()
+            
+            if circuit.state is CircuitState.OPEN:
+                remaining = circuit.opened_at + self.recovery_timeout - time.monotonic()
+                if remaining > 0:
+                    circuit.rejected += 1
+                    raise CircuitOpenError(
+                        f"Цепь {key[0]} {key[1]} разомкнута, повтор через {remaining:.1f}s",
+                        retry_after=remaining
+                    )
+                self._transition(key, circuit, CircuitState.HALF_OPEN, changes)
+            
+            if circuit.state is CircuitState.HALF_OPEN:
+                if circuit.probes >= self.half_open_max_calls:
+                    circuit.rejected += 1
+                    raise CircuitOpenError(f"Цепь {key[0]} {key[1]}: выполняется пробный запрос")
+                circuit.probes += 1
+        
+        self._notify(changes)
+    
+    def record_success(self, method: str, endpoint: str) -> None:
+        """Учёт успешного запроса (или ответа API, не означающего недоступность)"""
+        key = self.key(method, endpoint)
+        changes = []
+        
+        with self._lock:
+            circuit = self._circuits.get(key)
+            if circuit is None:
+                return
+            
+            if circuit.state is CircuitState.HALF_OPEN:
+                circuit.probes = max(0, circuit.probes - 1)
+                circuit.successes += 1
+                if circuit.successes >= self.success_threshold:
+                    self._transition(key, circuit, CircuitState.CLOSED, changes)
+            else:
+                circuit.failures = 0
+        
+        self._notify(changes)
+    
+    def record_failure(self, method: str, endpoint: str) -> None:
+        """Учёт ошибки недоступности API"""
+        key = self.key(method, endpoint)
+        changes = []
+        
+        with self._lock:
+            circuit = self._circuits.get(key)
+            if circuit is None:
+                return
+            
+            if circuit.state is CircuitState.HALF_OPEN:
+                circuit.probes = max(0, circuit.probes - 1)
+                self._transition(key, circuit, CircuitState.OPEN, changes)
+            elif circuit.state is CircuitState.CLOSED:
+                circuit.failures += 1
+                if circuit.failures >= self.failure_threshold:
+                    self._transition(key, circuit, CircuitState.OPEN, changes)
+        
+        self._notify(changes)
+    
+    def call(self, method: str, endpoint: str, func: Callable[[], Any]) -> Any:
+        """
+        Выполнение запроса через выключатель
+        
+        Args:
+            method: HTTP метод
+            endpoint: Конечная точка API
+            func: Функция, выполняющая запрос
+        
+        Returns:
+            Результат func()
+        
+        Raises:
+            CircuitOpenError: Если цепь разомкнута
+            MAXAPIException: Ошибка запроса
+        """
+        self.before_request(method, endpoint)
+        succeeded = None
+        try:
+            result = func()
+            succeeded = True
+            return result
+        except MAXAPIException as e:
+            succeeded = not is_failure(e)
+            raise
+        except Exception:
+            succeeded = False
+            raise
+        finally:
+            # Слот пробного запроса освобождается при любом исходе, в том числе
+            # при KeyboardInterrupt и GeneratorExit, иначе цепь не замкнётся
+            if succeeded is None:
+                self._release_probe(method, endpoint)
+            elif succeeded:
+                self.record_success(method, endpoint)
+            else:
+                self.record_failure(method, endpoint)
+    
+    def _release_probe(self, method: str, endpoint: str) -> None:
+        """Освобождение слота прерванного пробного запроса без учёта его исхода"""
+        with self._lock:
+            circuit = self._circuits.get(self.key(method, endpoint))
+            if circuit is not None and circuit.state is CircuitState.HALF_OPEN:
+                circuit.probes = max(0, circuit.probes - 1)
+    
+    def _transition(
+        self,
+        key: Tuple[str, str],
+        circuit: _Circuit,
+        state: CircuitState,
+        changes: List[tuple]
+    ) -> None:
+        """Смена состояния (под блокировкой); обработчики вызываются после её снятия"""
+        changes.append((key, circuit.state, state))
+        circuit.state = state
+        circuit.failures = 0
+        circuit.successes = 0
+        circuit.probes = 0
+        if state is CircuitState.OPEN:
+            circuit.opened_at = time.monotonic()
+    
+    def _notify(self, changes: List[tuple]) -> None:
+        """Логирование и вызов on_state_change"""
+        for key, old, new in changes:
+            logger.warning(f"Цепь {key[0]} {key[1]}: {old.value} -> {new.value}")
+            if self.on_state_change is not None:
+                try:
+                    self.on_state_change(key, old, new)
+                except Exception:
+                    logger.exception("Ошибка в обработчике on_state_change")
+    
+    def reset(self) -> None:
+        """Замыкание всех цепей"""
+        with self._lock:
+            self._circuits.clear()
+    
+    def _after_fork(self) -> None:
+        """Новая блокировка в дочернем процессе"""
+        self._lock = threading.Lock()
+    
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Состояние цепей
+        
+        Returns:
+            dict: {'GET /messages': {'state': 'open', 'failures': 0, 'rejected': 12}, ...}
+        """
+        with self._lock:
+            return {
+                f"{method} {group}": {
+                    'state': circuit.state.value,
+                    'failures': circuit.failures,
+                    'rejected': circuit.rejected,
+                }
+                for (method, group), circuit in self._circuits.items()
+            }
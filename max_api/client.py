@@ -2,10 +2,12 @@
 Основной клиент для работы с MAX API
 """
 
+import os
 import time
-import requests
-from typing import Optional, Dict, Any, List
-from urllib.parse import urljoin
+import logging
+import threading
+import weakref
+from typing import Optional, Dict, Any, List, Tuple, Union, Callable, Iterable, TYPE_CHECKING
 
 from .exceptions import (
     MAXAPIException,
@@ -16,18 +18,88 @@ from .exceptions import (
     RateLimitError,
     ServiceUnavailableError,
 )
-from .utils import RateLimiter, validate_chat_id
+from .cache import ResponseCache, MISSING, make_key
+from .circuit import CircuitBreaker
+from .codec import JSONCodec, get_codec
+from .hedging import HedgePolicy
+from .retry import RetryPolicy, parse_retry_after
+from .scheduler import PriorityScheduler
+from .singleflight import SingleFlight
+from .transport import (
+    Transport,
+    TransportResponse,
+    TransportError,
+    TransportConnectionError,
+    TransportTimeout,
+    ReadTimeout,
+    create_transport,
+)
+from .utils import RateLimiter, RecipientRateLimiter, UpdatesBatch, validate_chat_id
+
+if TYPE_CHECKING:
+    # Нужны только для аннотаций; модули загружаются при использовании
+    # (mmap, sqlite3 и concurrent.futures не нужны каждому процессу с клиентом)
+    from concurrent.futures import ThreadPoolExecutor
+    from .broadcast import Broadcast
+    from .checkpoint import CheckpointStore
+    from .shared_limiter import RateLimitStore
+
+logger = logging.getLogger(__name__)
+
+# Клиенты процесса: после os.fork() дочерний процесс пересоздаёт их пулы соединений
+_clients: "weakref.WeakSet[MAXClient]" = weakref.WeakSet()
+
+
+def _after_fork_in_child() -> None:
+    for client in list(_clients):
+        try:
+            client._after_fork()
+        except Exception:
+            logger.exception("Не удалось восстановить MAXClient после fork")
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
 
 
 class MAXClient:
-    """Клиент для работы с MAX Messenger API"""
+    """
+    Клиент для работы с MAX Messenger API
+    
+    Один клиент можно использовать из многих потоков одновременно: лимитер,
+    кэш и выключатель защищены блокировками, а транспорт requests выдаёт
+    каждому потоку свою сессию поверх общего пула соединений.
+    
+    Клиент, созданный до os.fork() (gunicorn --preload, multiprocessing),
+    в дочернем процессе автоматически получает новые пулы соединений
+    и блокировки: унаследованные сокеты остаются только у родителя.
+    """
     
     def __init__(
         self,
         token: str,
         base_url: str = "https://platform-api.max.ru",
         timeout: int = 30,
-        max_requests_per_second: int = 30
+        max_requests_per_second: int = 30,
+        retry_policy: Optional[RetryPolicy] = None,
+        poll_connect_timeout: float = 5.0,
+        poll_read_timeout: Optional[float] = None,
+        poll_timeout_margin: float = 5.0,
+        poll_requests_per_second: Optional[int] = None,
+        cache: Optional[ResponseCache] = None,
+        coalesce_requests: bool = True,
+        hedge_policy: Optional[HedgePolicy] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        json_codec: Optional[Union[str, JSONCodec]] = None,
+        transport: Union[str, Transport, Callable[[Dict[str, str]], Transport]] = 'requests',
+        pool_maxsize: int = 10,
+        pool_idle_timeout: Optional[float] = None,
+        warm_connections: int = 0,
+        rate_limit_store: Optional['RateLimitStore'] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        priority_lanes: Optional[Dict[str, float]] = None,
+        starvation_timeout: Optional[float] = 5.0,
+        recipient_limiter: Optional[RecipientRateLimiter] = None
     ):
         """
         Инициализация клиента MAX API
@@ -37,23 +109,207 @@ class MAXClient:
             base_url: Базовый URL API (по умолчанию https://platform-api.max.ru)
             timeout: Таймаут запросов в секундах
             max_requests_per_second: Максимальное количество запросов в секунду
+            retry_policy: Политика повторных запросов при 429/503 (None - без повторов)
+            poll_connect_timeout: Таймаут установки соединения для Long Polling
+            poll_read_timeout: Фиксированный таймаут чтения для Long Polling
+                               (по умолчанию - серверный timeout + poll_timeout_margin)
+            poll_timeout_margin: Запас к серверному таймауту Long Polling в секундах
+            poll_requests_per_second: Отдельный лимит запросов для Long Polling
+                                      (None - Long Polling не расходует общий лимит)
+            cache: Кэш ответов для get_me, get_message и get_subscriptions
+                   (None - без кэширования)
+            coalesce_requests: Объединять одинаковые одновременные GET запросы
+                               в один (результат получают все вызывающие)
+            hedge_policy: Политика хеджирования GET запросов (None - без хеджирования)
+            circuit_breaker: Автоматический выключатель: при серии ошибок недоступности
+                             запросы к конечной точке сразу завершаются CircuitOpenError
+            json_codec: Кодек JSON ('orjson', 'msgspec', 'ujson', 'json' или JSONCodec;
+                        по умолчанию самый быстрый из установленных)
+            transport: HTTP транспорт: 'requests' (по умолчанию), 'urllib3',
+                       'http2' (HTTP/2 через httpx с откатом на HTTP/1.1),
+                       экземпляр Transport (общий для всех полос, например
+                       InMemoryTransport) или фабрика factory(headers) -> Transport
+            pool_maxsize: Максимум сохраняемых соединений в пуле транспорта
+            pool_idle_timeout: Переоткрывать соединения, простоявшие в пуле дольше
+                               pool_idle_timeout секунд; значение меньше таймаута
+                               keep-alive сервера исключает неудачную попытку
+                               через закрытое сервером соединение (None - не переоткрывать)
+            warm_connections: Сколько соединений открыть сразу при создании клиента
+                              (см. warm_up)
+            rate_limit_store: Хранилище лимита, общего для всех клиентов с этим токеном
+                              во всех процессах (FileRateLimitStore - на хосте,
+                              KeyValueRateLimitStore - на нескольких хостах);
+                              None - лимит в пределах клиента
+            rate_limiter: Готовый лимитер (например, AdaptiveRateLimiter, подстраивающий
+                          частоту под ответы 429); заменяет max_requests_per_second
+                          и rate_limit_store
+            priority_lanes: Полосы планировщика и их веса (по умолчанию
+                            interactive: 8, callback: 4, bulk: 1; первая полоса -
+                            полоса по умолчанию). Полоса выбирается параметром lane
+                            у send_message и других методов
+            starvation_timeout: Ожидание в очереди полосы, после которого запрос
+                                обслуживается вне очереди (None - без ограничения)
+            recipient_limiter: Лимит сообщений одному получателю (RecipientRateLimiter)
+                               для send_message; None - только общий лимит.
+                               Сообщения разным получателям в одной полосе
+                               чередуются по кругу в любом случае
+        
+        Note:
+            Long Polling (get_updates) использует отдельный пул соединений и
+            отдельный лимитер, поэтому ожидающий /updates не занимает соединение
+            и слот лимита, нужные для отправки ответов.
+            
+            Таймаут чтения для /updates вычисляется из серверного таймаута
+            Long Polling с запасом на сетевые задержки. Если ответ всё же
+            не пришёл вовремя, get_updates() возвращает пустой список
+            вместо исключения.
         """
         self.token = token
         self.base_url = base_url.rstrip('/')
         self.timeout = timeout
-        self.rate_limiter = RateLimiter(max_requests=max_requests_per_second, time_window=1.0)
-        self._session = requests.Session()
-        self._session.headers.update({
-            'Authorization': token,
-            'Content-Type': 'application/json'
-        })
+        self.retry_policy = retry_policy
+        self.cache = cache
+        self.single_flight = SingleFlight() if coalesce_requests else None
+        self.circuit_breaker = circuit_breaker
+        self.codec = get_codec(json_codec)
+        if rate_limiter is not None:
+            self.rate_limiter = rate_limiter
+        elif rate_limit_store is not None:
+            from .shared_limiter import SharedRateLimiter, token_key
+            
+            self.rate_limiter = SharedRateLimiter(
+                max_requests=max_requests_per_second,
+                time_window=1.0,
+                store=rate_limit_store,
+                key=token_key(token)
+            )
+        else:
+            self.rate_limiter = RateLimiter(max_requests=max_requests_per_second, time_window=1.0)
+        self.scheduler = PriorityScheduler(
+            self.rate_limiter,
+            lanes=priority_lanes,
+            starvation_timeout=starvation_timeout
+        )
+        self.recipient_limiter = recipient_limiter
+        self._transport_spec = transport
+        self.pool_maxsize = pool_maxsize
+        self.pool_idle_timeout = pool_idle_timeout
+        
+        # URL постоянных конечных точек вычисляются один раз
+        self._urls = {
+            endpoint: f"{self.base_url}{endpoint}"
+            for endpoint in ('/me', '/messages', '/updates', '/subscriptions')
+        }
+        
+        # Отдельная полоса для Long Polling: свой пул соединений, таймауты и лимит
+        self.poll_connect_timeout = poll_connect_timeout
+        self.poll_read_timeout = poll_read_timeout
+        self.poll_timeout_margin = poll_timeout_margin
+        self.poll_rate_limiter = (
+            RateLimiter(max_requests=poll_requests_per_second, time_window=1.0)
+            if poll_requests_per_second else None
+        )
+        
+        # Хеджирование: копии GET идут через отдельный пул соединений
+        self.hedge_policy = hedge_policy
+        self._hedge_executor: Optional['ThreadPoolExecutor'] = None
+        self._executor_lock = threading.Lock()
+        
+        self._build_transports()
+        _clients.add(self)
+        
+        if warm_connections:
+            self.warm_up(warm_connections)
+    
+    def _build_transports(self) -> None:
+        """Создание транспортов основной полосы, Long Polling и хеджирования"""
+        self._transport = self._create_transport()
+        # По HTTP/2 ожидающий /updates занимает лишь поток, а не соединение.
+        # Согласован ли HTTP/2, известно только после ответа, поэтому отдельный
+        # транспорт создаётся заранее, а выбор делается при каждом запросе
+        self._poll_transport = (
+            self._transport if self._transport.multiplexed else self._create_transport()
+        )
+        self._hedge_transport = self._create_transport() if self.hedge_policy else None
+    
+    def _after_fork(self) -> None:
+        """
+        Восстановление в дочернем процессе после os.fork()
+        
+        Сокеты пулов общие с родителем: их не закрываем (это нарушило бы
+        соединения родителя), а заменяем пулы новыми. Блокировки могли быть
+        захвачены потоками родителя, которых в дочернем процессе нет, поэтому
+        они создаются заново. Транспорт, переданный экземпляром, пересоздать
+        нельзя - он остаётся прежним.
+        """
+        self._executor_lock = threading.Lock()
+        # Потоки пула хеджирования в дочернем процессе не существуют
+        self._hedge_executor = None
+        
+        for component in (
+            self.rate_limiter,
+            self.poll_rate_limiter,
+            self.scheduler,
+            self.recipient_limiter,
+            self.single_flight,
+            self.cache,
+            self.circuit_breaker,
+            self.hedge_policy,
+        ):
+            if component is not None:
+                component._after_fork()
+        
+        self._build_transports()
+        logger.debug(f"MAXClient пересоздал пулы соединений в процессе {os.getpid()}")
+    
+    def _create_transport(self) -> Transport:
+        """Создание транспорта (пула соединений) с заголовками авторизации"""
+        return create_transport(
+            self._transport_spec,
+            {
+                'Authorization': self.token,
+                'Content-Type': 'application/json'
+            },
+            pool_maxsize=self.pool_maxsize,
+            idle_timeout=self.pool_idle_timeout
+        )
+    
+    def warm_up(self, connections: Optional[int] = None) -> int:
+        """
+        Предварительное открытие соединений с API
+        
+        DNS, TCP и TLS выполняются заранее, поэтому первые ответы после
+        запуска (или после долгого простоя) не ждут установки соединения.
+        Соединения открываются в основном пуле; пул Long Polling не прогревается.
+        Ошибки подключения логируются и не прерывают работу.
+        
+        Args:
+            connections: Количество соединений (по умолчанию pool_maxsize)
+        
+        Returns:
+            int: Количество открытых соединений
+        """
+        opened = self._transport.warm_up(self.base_url, connections or self.pool_maxsize)
+        logger.debug(f"Открыто соединений с {self.base_url}: {opened}")
+        return opened
+    
+    def _url(self, endpoint: str) -> str:
+        """Полный URL конечной точки"""
+        url = self._urls.get(endpoint)
+        if url is None:
+            url = f"{self.base_url}/{endpoint.lstrip('/')}"
+        return url
     
     def _make_request(
         self,
         method: str,
         endpoint: str,
         params: Optional[Dict[str, Any]] = None,
-        json_data: Optional[Dict[str, Any]] = None
+        json_data: Optional[Dict[str, Any]] = None,
+        long_poll: bool = False,
+        read_timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+        recipient: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         Выполнение HTTP запроса к API
@@ -63,82 +319,335 @@ class MAXClient:
             endpoint: Конечная точка API (например, '/me')
             params: Query параметры
             json_data: JSON данные для тела запроса
-            
+            long_poll: Выполнить запрос в полосе Long Polling
+            read_timeout: Таймаут чтения для этого запроса (по умолчанию из настроек клиента)
+            lane: Приоритетная полоса планировщика (None - полоса по умолчанию)
+            recipient: Получатель сообщения (chat_id группы или user_id) для
+                       лимита на получателя и чередования получателей в полосе
+        
         Returns:
             dict: Ответ от API
-            
+        
         Raises:
             MAXAPIException: При ошибке запроса
         """
+        method = method.upper()
+        
+        if long_poll:
+            return self._request_with_retry(method, endpoint, params, json_data, long_poll, read_timeout, lane)
+        
+        if method != 'GET':
+            # Изменяющий запрос: сбрасываем кэш после него, чтобы чтение,
+            # выполненное параллельно с изменением, не оставило в кэше старые данные
+            try:
+                return self._request_with_retry(
+                    method, endpoint, params, json_data, long_poll, read_timeout, lane, recipient
+                )
+            finally:
+                if self.cache is not None:
+                    self.cache.invalidate(endpoint)
+                if self.single_flight is not None:
+                    # GET после изменения не должен присоединяться к чтению, начатому до него
+                    path = make_key(endpoint)[0]
+                    self.single_flight.forget_where(lambda key: key[0] == path)
+        
+        if self.cache is not None:
+            cached = self.cache.get(endpoint, params)
+            if cached is not MISSING:
+                return cached
+        
+        if self.single_flight is None:
+            return self._fetch(endpoint, params, read_timeout, lane)
+        
+        # Одинаковые одновременные GET выполняются одним запросом
+        return self.single_flight.do(
+            make_key(endpoint, params),
+            lambda: self._fetch(endpoint, params, read_timeout, lane)
+        )
+    
+    def _fetch(
+        self,
+        endpoint: str,
+        params: Optional[Dict[str, Any]],
+        read_timeout: Optional[float],
+        lane: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """GET запрос с сохранением ответа в кэш"""
+        if self.cache is None:
+            return self._request_with_retry('GET', endpoint, params, None, False, read_timeout, lane)
+        
+        # Поколение до запроса: если во время него изменяющий запрос сбросит
+        # кэш конечной точки, полученный ответ может быть старым и не сохраняется
+        generation = self.cache.generation(endpoint)
+        result = self._request_with_retry('GET', endpoint, params, None, False, read_timeout, lane)
+        self.cache.set(endpoint, params, result, generation=generation)
+        return result
+    
+    def _request_with_retry(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[Dict[str, Any]],
+        json_data: Optional[Dict[str, Any]],
+        long_poll: bool,
+        read_timeout: Optional[float],
+        lane: Optional[str] = None,
+        recipient: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Выполнение запроса с повторами согласно retry_policy"""
+        if self.hedge_policy is not None and method == 'GET' and not long_poll:
+            send = self._send_hedged
+        else:
+            send = self._send_request
+        
+        if self.circuit_breaker is not None:
+            send = self._guard(send)
+        
+        if self.retry_policy is None:
+            return send(method, endpoint, params, json_data, long_poll, read_timeout, lane=lane, recipient=recipient)
+        
+        deadline = self.retry_policy.start()
+        attempt = 1
+        
+        while True:
+            try:
+                return send(method, endpoint, params, json_data, long_poll, read_timeout, lane=lane, recipient=recipient)
+            except MAXAPIException as e:
+                delay = self.retry_policy.next_delay(method, e, attempt, deadline)
+                if delay is None:
+                    raise
+                
+                logger.warning(
+                    f"{method.upper()} {endpoint}: {e}. "
+                    f"Повтор через {delay:.2f}s (попытка {attempt + 1})"
+                )
+                time.sleep(delay)
+                attempt += 1
+    
+    def _guard(self, send):
+        """Обёртка попытки запроса в circuit_breaker"""
+        breaker = self.circuit_breaker
+        
+        def guarded(method, endpoint, params, json_data, long_poll, read_timeout, lane=None, recipient=None):
+            return breaker.call(
+                method, endpoint,
+                lambda: send(method, endpoint, params, json_data, long_poll, read_timeout, lane=lane, recipient=recipient)
+            )
+        
+        return guarded
+    
+    def _send_hedged(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[Dict[str, Any]] = None,
+        json_data: Optional[Dict[str, Any]] = None,
+        long_poll: bool = False,
+        read_timeout: Optional[float] = None,
+        lane: Optional[str] = None,
+        recipient: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Одна попытка GET запроса с хеджированием.
+        
+        Если ответ не пришёл за hedge_policy.delay() с начала выполнения
+        запроса, копия запроса отправляется через отдельный пул соединений.
+        Копия получает разрешение через планировщик без ожидания: только если
+        очереди полос пусты и в лимитере есть свободный токен. Возвращается
+        первый успешный ответ, ответ второй попытки отбрасывается.
+        
+        Raises:
+            MAXAPIException: Если обе попытки завершились ошибкой
+        """
+        from concurrent.futures import TimeoutError as FutureTimeoutError, as_completed
+        
+        policy = self.hedge_policy
+        executor = self._get_hedge_executor()
+        policy.on_request()
+        
+        # Ожидание лимитера не должно учитываться в задержке ответа
+        self.scheduler.acquire(lane, recipient)
+        running = threading.Event()
+        primary = executor.submit(self._send_timed, endpoint, params, read_timeout, self._transport, running)
+        
+        # Задержка отсчитывается с начала запроса, а не с постановки в пул:
+        # ожидание свободного потока не должно порождать лишние копии
+        running.wait()
+        try:
+            return primary.result(timeout=policy.delay(endpoint))
+        except FutureTimeoutError:
+            pass
+        
+        if not self._try_acquire_hedge(lane, recipient):
+            policy.on_rate_limited()
+            return primary.result()
+        
+        policy.on_hedge()
+        logger.debug(f"GET {endpoint}: нет ответа за {policy.delay(endpoint):.3f}s, отправлена копия")
+        hedge = executor.submit(self._send_timed, endpoint, params, read_timeout, self._hedge_transport)
+        
+        error = None
+        for future in as_completed((primary, hedge)):
+            if future.exception() is None:
+                if future is hedge:
+                    policy.on_hedge_win()
+                # Проигравшую попытку requests прервать не может: она завершится
+                # в пуле потоков сама, её результат не используется
+                return future.result()
+            if error is None:
+                error = future.exception()
+        
+        raise error
+    
+    def _try_acquire_hedge(self, lane: Optional[str], recipient: Optional[int]) -> bool:
+        """Разрешение на копию запроса без ожидания (лимит получателя и очередь полосы)"""
+        if recipient is not None and self.recipient_limiter is not None:
+            if not self.recipient_limiter.try_acquire(recipient):
+                return False
+        return self.scheduler.try_acquire(lane, recipient)
+    
+    def _send_timed(
+        self,
+        endpoint: str,
+        params: Optional[Dict[str, Any]],
+        read_timeout: Optional[float],
+        transport: Transport,
+        started_event: Optional[threading.Event] = None
+    ) -> Dict[str, Any]:
+        """GET запрос через заданный транспорт с учётом задержки в hedge_policy"""
+        if started_event is not None:
+            started_event.set()
+        started = time.monotonic()
+        result = self._send_request('GET', endpoint, params, read_timeout=read_timeout, transport=transport)
+        self.hedge_policy.record(endpoint, time.monotonic() - started)
+        return result
+    
+    def _get_hedge_executor(self) -> 'ThreadPoolExecutor':
+        """Ленивое создание пула потоков для хеджирования"""
+        from concurrent.futures import ThreadPoolExecutor
+        
+        with self._executor_lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(
+                    max_workers=self.hedge_policy.max_workers,
+                    thread_name_prefix="max-api-hedge"
+                )
+            return self._hedge_executor
+    
+    def _send_request(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[Dict[str, Any]] = None,
+        json_data: Optional[Dict[str, Any]] = None,
+        long_poll: bool = False,
+        read_timeout: Optional[float] = None,
+        transport: Optional[Transport] = None,
+        lane: Optional[str] = None,
+        recipient: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Одна попытка HTTP запроса к API (без повторов)
+        
+        Args:
+            method: HTTP метод (GET, POST, PUT, DELETE, PATCH)
+            endpoint: Конечная точка API (например, '/me')
+            params: Query параметры
+            json_data: JSON данные для тела запроса
+            long_poll: Выполнить запрос в полосе Long Polling
+            read_timeout: Таймаут чтения для этого запроса (по умолчанию из настроек клиента)
+            transport: Транспорт для запроса; лимит запросов в этом случае
+                       учитывает вызывающий
+            lane: Приоритетная полоса планировщика
+            recipient: Получатель сообщения (chat_id группы или user_id)
+        
+        Returns:
+            dict: Ответ от API
+        
+        Raises:
+            MAXAPIException: При ошибке запроса
+        """
+        if read_timeout is None:
+            read_timeout = self.timeout
+        
         # Применяем rate limiting
-        self.rate_limiter.acquire()
+        if long_poll:
+            transport = self._transport if self._transport.multiplexed else self._poll_transport
+            timeout = (self.poll_connect_timeout, read_timeout)
+            if self.poll_rate_limiter is not None:
+                self.poll_rate_limiter.acquire()
+        elif transport is not None:
+            timeout = read_timeout
+        else:
+            transport = self._transport
+            timeout = read_timeout
+            # Лимит получателя ожидается до очереди полосы: запрос в «горячий» чат
+            # не держит очередь, пока ждёт своей корзины
+            if recipient is not None and self.recipient_limiter is not None:
+                self.recipient_limiter.acquire(recipient)
+            # Разрешения лимитера выдаются по приоритету полос
+            self.scheduler.acquire(lane, recipient)
         
-        # Формируем полный URL
-        url = urljoin(self.base_url, endpoint.lstrip('/'))
+        # Тело кодируется заранее, Content-Type: application/json задан в транспорте
+        data = self.codec.dumps(json_data) if json_data is not None else None
         
         try:
-            response = self._session.request(
-                method=method.upper(),
-                url=url,
-                params=params,
-                json=json_data,
-                timeout=self.timeout
-            )
+            response = transport.request(method.upper(), self._url(endpoint), params, data, timeout)
             
             # Обработка ошибок HTTP
             self._handle_response(response)
             
             # Возвращаем JSON если есть содержимое
             if response.content:
-                return response.json()
+                return self.codec.loads(response.content)
             return {}
-            
-        except requests.exceptions.Timeout:
-            raise MAXAPIException(f"Превышено время ожидания ({self.timeout}s)")
-        except requests.exceptions.ConnectionError:
+        
+        except TransportTimeout as e:
+            # Истёкший Long Polling - это пустой ответ, а не ошибка
+            if long_poll and isinstance(e, ReadTimeout):
+                logger.debug(f"Long Polling {endpoint}: нет ответа за {read_timeout}s")
+                return {}
+            raise MAXAPIException(f"Превышено время ожидания ({read_timeout}s)")
+        except TransportConnectionError:
             raise MAXAPIException("Ошибка подключения к серверу MAX API")
-        except requests.exceptions.RequestException as e:
+        except TransportError as e:
             raise MAXAPIException(f"Ошибка запроса: {str(e)}")
+        except ValueError as e:
+            raise MAXAPIException(f"Некорректный JSON в ответе: {str(e)}")
     
-    def _handle_response(self, response: requests.Response):
+    def _handle_response(self, response: TransportResponse):
         """
         Обработка ответа от API и генерация соответствующих исключений
         
         Args:
-            response: Объект ответа requests
-            
+            response: Ответ транспорта
+        
         Raises:
             MAXAPIException: Соответствующее исключение в зависимости от кода ответа
         """
         if response.status_code == 200:
+            self.rate_limiter.on_success()
             return
         
+        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        if response.status_code == 429:
+            # Обратная связь для адаптивного лимитера
+            self.rate_limiter.on_rate_limited(retry_after)
+        
         # Пытаемся извлечь детали ошибки из ответа
+        error_data = None
         try:
-            error_data = response.json()
+            error_data = self.codec.loads(response.content)
             error_message = error_data.get('message', '') or error_data.get('error', '')
         except:
             error_message = response.text or response.reason
         
-        # Генерируем соответствующее исключение
-        if response.status_code == 400:
-            raise BadRequestError(error_message, response=error_data if 'error_data' in locals() else None)
-        elif response.status_code == 401:
-            raise AuthenticationError(error_message, response=error_data if 'error_data' in locals() else None)
-        elif response.status_code == 404:
-            raise NotFoundError(error_message, response=error_data if 'error_data' in locals() else None)
-        elif response.status_code == 405:
-            raise MethodNotAllowedError(error_message, response=error_data if 'error_data' in locals() else None)
-        elif response.status_code == 429:
-            raise RateLimitError(error_message, response=error_data if 'error_data' in locals() else None)
-        elif response.status_code == 503:
-            raise ServiceUnavailableError(error_message, response=error_data if 'error_data' in locals() else None)
-        else:
-            raise MAXAPIException(
-                f"Ошибка API (HTTP {response.status_code}): {error_message}",
-                status_code=response.status_code,
-                response=error_data if 'error_data' in locals() else None
-            )
+        _raise_api_error(
+            response.status_code,
+            error_message,
+            error_data,
+            retry_after=retry_after
+        )
     
     # === Информация о боте ===
     
@@ -148,7 +657,7 @@ class MAXClient:
         
         Returns:
             dict: Информация о боте (user_id, name, username, is_bot, last_activity_time)
-            
+        
         Example:
             >>> bot = client.get_me()
             >>> print(bot['name'])
@@ -165,7 +674,8 @@ class MAXClient:
         attachments: Optional[List[Dict[str, Any]]] = None,
         format: Optional[str] = None,
         link_preview: bool = True,
-        notify: bool = True
+        notify: bool = True,
+        lane: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Отправка сообщения в чат
@@ -179,10 +689,12 @@ class MAXClient:
             format: Формат текста ('markdown' или 'html')
             link_preview: Показывать ли превью ссылок
             notify: Уведомлять ли участников чата
-            
+            lane: Приоритетная полоса ('interactive', 'callback', 'bulk' или своя;
+                  None - полоса по умолчанию)
+        
         Returns:
             dict: Отправленное сообщение
-            
+        
         Example:
             >>> # Личный чат
             >>> message = client.send_message(
@@ -196,57 +708,40 @@ class MAXClient:
             ...     chat_id=-987654321,
             ...     text="Привет всем!"
             ... )
+            >>> 
+            >>> # Рассылка не задерживает ответы пользователям
+            >>> client.send_message(chat_id=user_id, text="Новости", lane='bulk')
         """
-        chat_id = validate_chat_id(chat_id)
-        
-        # Для групповых чатов (отрицательные) используем chat_id,
-        # для личных (положительные) - user_id
-        if chat_id < 0:
-            params = {
-                "chat_id": chat_id
-            }
-        else:
-            params = {
-                "user_id": chat_id
-            }
-        
-        if not link_preview:
-            params["disable_link_preview"] = True
+        params, message_body = _build_message_request(
+            chat_id, text, attachments, format, link_preview, notify
+        )
         
-        # Тело запроса
-        message_body = {
-            "text": text
-        }
-        
-        if format:
-            message_body["format"] = format
-        
-        if not notify:
-            message_body["notify"] = False
-        
-        if attachments:
-            message_body["attachments"] = attachments
-        
-        return self._make_request('POST', '/messages', params=params, json_data=message_body)
+        recipient = params.get('chat_id', params.get('user_id'))
+        return self._make_request(
+            'POST', '/messages', params=params, json_data=message_body, lane=lane, recipient=recipient
+        )
     
-    def get_message(self, message_id: str) -> Dict[str, Any]:
+    def get_message(self, message_id: str, lane: Optional[str] = None) -> Dict[str, Any]:
         """
         Получение сообщения по ID
         
         Args:
             message_id: ID сообщения
-            
+            lane: Приоритетная полоса ('interactive', 'callback', 'bulk' или своя;
+                  None - полоса по умолчанию)
+        
         Returns:
             dict: Информация о сообщении
         """
-        return self._make_request('GET', f'/messages/{message_id}')
+        return self._make_request('GET', f'/messages/{message_id}', lane=lane)
     
     def edit_message(
         self,
         message_id: str,
         text: str,
         attachments: Optional[List[Dict[str, Any]]] = None,
-        format: Optional[str] = None
+        format: Optional[str] = None,
+        lane: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Редактирование сообщения
@@ -256,31 +751,89 @@ class MAXClient:
             text: Новый текст сообщения
             attachments: Новые вложения
             format: Формат текста ('markdown' или 'html')
-            
+            lane: Приоритетная полоса ('interactive', 'callback', 'bulk' или своя;
+                  None - полоса по умолчанию)
+        
         Returns:
             dict: Обновленное сообщение
         """
-        message_body = {"text": text}
-        
-        if format:
-            message_body["format"] = format
+        message_body = _build_edit_body(text, attachments, format)
         
-        if attachments is not None:
-            message_body["attachments"] = attachments
-        
-        return self._make_request('PUT', f'/messages/{message_id}', json_data=message_body)
+        return self._make_request('PUT', f'/messages/{message_id}', json_data=message_body, lane=lane)
     
-    def delete_message(self, message_id: str) -> Dict[str, Any]:
+    def delete_message(self, message_id: str, lane: Optional[str] = None) -> Dict[str, Any]:
         """
         Удаление сообщения
         
         Args:
             message_id: ID сообщения для удаления
-            
+            lane: Приоритетная полоса ('interactive', 'callback', 'bulk' или своя;
+                  None - полоса по умолчанию)
+        
         Returns:
             dict: Результат удаления
         """
-        return self._make_request('DELETE', f'/messages/{message_id}')
+        return self._make_request('DELETE', f'/messages/{message_id}', lane=lane)
+    
+    def broadcast(
+        self,
+        chat_ids: Iterable[int],
+        text: str,
+        checkpoint: Optional['CheckpointStore'] = None,
+        concurrency: int = 8,
+        lane: Optional[str] = 'bulk',
+        total: Optional[int] = None,
+        retry_attempts: int = 3,
+        retry_delay: float = 1.0,
+        **message: Any
+    ) -> 'Broadcast':
+        """
+        Рассылка сообщения множеству получателей
+        
+        Отправки выполняются параллельно в пределах лимитов клиента;
+        с checkpoint прерванная рассылка продолжается с места остановки.
+        
+        Args:
+            chat_ids: Получатели (список или поток); при возобновлении -
+                      в том же порядке
+            text: Текст сообщения
+            checkpoint: Хранилище прогресса (FileCheckpointStore, SQLiteCheckpointStore)
+            concurrency: Количество одновременных отправок
+            lane: Полоса планировщика (по умолчанию 'bulk')
+            total: Количество получателей для расчёта ETA (если chat_ids - поток)
+            retry_attempts: Попыток отправки одному получателю при временных
+                            ошибках (429, 5xx, сеть); после них получатель
+                            откладывается до перезапуска с тем же checkpoint
+            retry_delay: Задержка перед второй попыткой в секундах (далее удваивается)
+            **message: Параметры send_message (attachments, format,
+                       link_preview, notify)
+        
+        Returns:
+            Broadcast: Рассылка; выполняется при итерации (результаты по мере
+                       отправки) или вызове wait()
+        
+        Raises:
+            ValueError: Неизвестная полоса
+        
+        Example:
+            >>> job = client.broadcast(user_ids, "Новости", checkpoint=FileCheckpointStore("news.json"))
+            >>> for result in job:
+            ...     if not result.ok:
+            ...         print(result.chat_id, result.error)
+            >>> print(job.get_stats()['failures'])
+        """
+        from .broadcast import Broadcast
+        
+        return Broadcast(
+            self, chat_ids, text,
+            checkpoint=checkpoint,
+            concurrency=concurrency,
+            lane=lane,
+            total=total,
+            retry_attempts=retry_attempts,
+            retry_delay=retry_delay,
+            **message
+        )
     
     # === Получение обновлений (Long Polling) ===
     
@@ -290,7 +843,7 @@ class MAXClient:
         timeout: int = 30,
         marker: Optional[int] = None,
         update_types: Optional[List[str]] = None
-    ) -> List[Dict[str, Any]]:
+    ) -> UpdatesBatch:
         """
         Получение обновлений через Long Polling
         
@@ -300,37 +853,30 @@ class MAXClient:
             marker: Маркер последнего полученного обновления
             update_types: Список типов обновлений для получения
                          (message_created, message_callback, bot_started, и т.д.)
-            
+        
         Returns:
-            list: Список обновлений
-            
+            UpdatesBatch: Список обновлений (пустой, если за timeout обновлений не было).
+                          Атрибут marker содержит маркер для следующего запроса.
+        
         Example:
             >>> updates = client.get_updates(timeout=30, limit=10)
             >>> for update in updates:
             ...     if update['update_type'] == 'message_created':
             ...         print(update['message']['body']['text'])
+            >>> updates = client.get_updates(timeout=30, marker=updates.marker)
         """
-        params = {}
-        
-        if limit is not None:
-            params['limit'] = limit
-        
-        if timeout:
-            params['timeout'] = timeout
-        
-        if marker is not None:
-            params['marker'] = marker
-        
-        if update_types:
-            params['types'] = ','.join(update_types)
-        
-        result = self._make_request('GET', '/updates', params=params)
-        
-        # API возвращает {'updates': [...], 'marker': ...}
-        if isinstance(result, dict):
-            return result.get('updates', [])
-        
-        return result if isinstance(result, list) else []
+        params = _build_updates_params(limit, timeout, marker, update_types)
+        result = self._make_request(
+            'GET', '/updates', params=params,
+            long_poll=True, read_timeout=self._poll_read_timeout(timeout)
+        )
+        return _extract_updates(result)
+    
+    def _poll_read_timeout(self, timeout: Optional[int]) -> float:
+        """Таймаут чтения HTTP для Long Polling с серверным таймаутом timeout"""
+        if self.poll_read_timeout is not None:
+            return self.poll_read_timeout
+        return (timeout or self.timeout) + self.poll_timeout_margin
     
     # === Управление подписками (Webhook) ===
     
@@ -347,20 +893,14 @@ class MAXClient:
             url: URL для получения вебхуков (только HTTPS)
             update_types: Типы обновлений для получения
             version: Версия API
-            
+        
         Returns:
             dict: Информация о созданной подписке
-            
+        
         Note:
             URL должен использовать протокол HTTPS
         """
-        subscription_data = {
-            "url": url,
-            "version": version
-        }
-        
-        if update_types:
-            subscription_data["update_types"] = update_types
+        subscription_data = _build_subscription_body(url, update_types, version)
         
         return self._make_request('POST', '/subscriptions', json_data=subscription_data)
     
@@ -372,11 +912,7 @@ class MAXClient:
             list: Список подписок
         """
         result = self._make_request('GET', '/subscriptions')
-        
-        if isinstance(result, dict):
-            return result.get('subscriptions', [])
-        
-        return result if isinstance(result, list) else []
+        return _extract_subscriptions(result)
     
     def delete_subscription(self, url: str) -> Dict[str, Any]:
         """
@@ -384,7 +920,7 @@ class MAXClient:
         
         Args:
             url: URL подписки для удаления
-            
+        
         Returns:
             dict: Результат удаления
         """
@@ -393,9 +929,13 @@ class MAXClient:
     # === Вспомогательные методы ===
     
     def close(self):
-        """Закрытие сессии"""
-        if self._session:
-            self._session.close()
+        """Закрытие соединений"""
+        for transport in {self._transport, self._poll_transport, self._hedge_transport}:
+            if transport is not None:
+                transport.close()
+        if self._hedge_executor is not None:
+            self._hedge_executor.shutdown(wait=False)
+            self._hedge_executor = None
     
     def __enter__(self):
         """Поддержка контекстного менеджера"""
@@ -404,3 +944,165 @@ class MAXClient:
     def __exit__(self, exc_type, exc_val, exc_tb):
         """Закрытие при выходе из контекста"""
         self.close()
+
+
+# === Общие функции для синхронного и асинхронного клиентов ===
+
+def _raise_api_error(
+    status_code: int,
+    error_message: str,
+    error_data: Optional[Dict[str, Any]] = None,
+    retry_after: Optional[float] = None
+):
+    """
+    Генерация исключения по коду ответа API
+    
+    Args:
+        status_code: HTTP код ответа
+        error_message: Текст ошибки
+        error_data: Тело ответа с ошибкой (если удалось разобрать)
+        retry_after: Значение заголовка Retry-After в секундах (для 429 и 503)
+    
+    Raises:
+        MAXAPIException: Соответствующее исключение в зависимости от кода ответа
+    """
+    if status_code == 400:
+        raise BadRequestError(error_message, response=error_data)
+    elif status_code == 401:
+        raise AuthenticationError(error_message, response=error_data)
+    elif status_code == 404:
+        raise NotFoundError(error_message, response=error_data)
+    elif status_code == 405:
+        raise MethodNotAllowedError(error_message, response=error_data)
+    elif status_code == 429:
+        raise RateLimitError(error_message, retry_after=retry_after, response=error_data)
+    elif status_code == 503:
+        raise ServiceUnavailableError(error_message, retry_after=retry_after, response=error_data)
+    else:
+        raise MAXAPIException(
+            f"Ошибка API (HTTP {status_code}): {error_message}",
+            status_code=status_code,
+            response=error_data
+        )
+
+
+def _build_message_request(
+    chat_id: int,
+    text: str,
+    attachments: Optional[List[Dict[str, Any]]] = None,
+    format: Optional[str] = None,
+    link_preview: bool = True,
+    notify: bool = True
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Формирование query-параметров и тела запроса для отправки сообщения
+    
+    Returns:
+        tuple: (params, message_body)
+    """
+    chat_id = validate_chat_id(chat_id)
+    
+    # Для групповых чатов (отрицательные) используем chat_id,
+    # для личных (положительные) - user_id
+    if chat_id < 0:
+        params = {
+            "chat_id": chat_id
+        }
+    else:
+        params = {
+            "user_id": chat_id
+        }
+    
+    if not link_preview:
+        params["disable_link_preview"] = True
+    
+    # Тело запроса
+    message_body = {
+        "text": text
+    }
+    
+    if format:
+        message_body["format"] = format
+    
+    if not notify:
+        message_body["notify"] = False
+    
+    if attachments:
+        message_body["attachments"] = attachments
+    
+    return params, message_body
+
+
+def _build_edit_body(
+    text: str,
+    attachments: Optional[List[Dict[str, Any]]] = None,
+    format: Optional[str] = None
+) -> Dict[str, Any]:
+    """Формирование тела запроса для редактирования сообщения"""
+    message_body = {"text": text}
+    
+    if format:
+        message_body["format"] = format
+    
+    if attachments is not None:
+        message_body["attachments"] = attachments
+    
+    return message_body
+
+
+def _build_updates_params(
+    limit: Optional[int] = None,
+    timeout: int = 30,
+    marker: Optional[int] = None,
+    update_types: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """Формирование query-параметров для /updates"""
+    params = {}
+    
+    if limit is not None:
+        params['limit'] = limit
+    
+    if timeout:
+        params['timeout'] = timeout
+    
+    if marker is not None:
+        params['marker'] = marker
+    
+    if update_types:
+        params['types'] = ','.join(update_types)
+    
+    return params
+
+
+def _extract_updates(result: Any) -> UpdatesBatch:
+    """Извлечение списка обновлений и маркера из ответа /updates"""
+    # API возвращает {'updates': [...], 'marker': ...}
+    if isinstance(result, dict):
+        return UpdatesBatch(result.get('updates', []), marker=result.get('marker'))
+    
+    return UpdatesBatch(result if isinstance(result, list) else [])
+
+
+def _build_subscription_body(
+    url: str,
+    update_types: Optional[List[str]] = None,
+    version: str = "1.0"
+) -> Dict[str, Any]:
+    """Формирование тела запроса для создания подписки"""
+    subscription_data = {
+        "url": url,
+        "version": version
+    }
+    
+    if update_types:
+        subscription_data["update_types"] = update_types
+    
+    return subscription_data
+
+
+def _extract_subscriptions(result: Any) -> List[Dict[str, Any]]:
+    """Извлечение списка подписок из ответа /subscriptions"""
+    if isinstance(result, dict):
+        return result.get('subscriptions', [])
+    
+    return result if isinstance(result, list) else []
@@ -0,0 +1,117 @@
+"""
+Кодеки JSON для тел запросов и ответов
+
+По умолчанию используется самый быстрый из установленных пакетов:
+orjson, msgspec, ujson, иначе стандартный модуль json.
+"""
+
+import json
+from typing import Any, Callable, Optional, Union
+
+Encoder = Callable[[Any], bytes]
+Decoder = Callable[[Union[bytes, str]], Any]
+
+
+class JSONCodec:
+    """
+    Пара функций сериализации JSON
+    
+    dumps(obj) возвращает UTF-8 байты, готовые к отправке как тело запроса,
+    loads(data) принимает байты ответа без предварительного декодирования в str.
+    """
+    
+    __slots__ = ('name', 'dumps', 'loads')
+    
+    def __init__(self, name: str, dumps: Encoder, loads: Decoder):
+        """
+        Args:
+            name: Название кодека
+            dumps: Сериализация объекта в bytes
+            loads: Разбор bytes или str
+        """
+        self.name = name
+        self.dumps = dumps
+        self.loads = loads
+    
+    def __repr__(self) -> str:
+        return f"JSONCodec({self.name!r})"
+
+
+def _stdlib_codec() -> JSONCodec:
+    encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    
+    def dumps(obj: Any) -> bytes:
+        return encoder.encode(obj).encode('utf-8')
+    
+    return JSONCodec('json', dumps, json.loads)
+
+
+def _orjson_codec() -> JSONCodec:
+    import orjson
+    return JSONCodec('orjson', orjson.dumps, orjson.loads)
+
+
+def _msgspec_codec() -> JSONCodec:
+    import msgspec
+    encoder = msgspec.json.Encoder()
+    decoder = msgspec.json.Decoder()
+    return JSONCodec('msgspec', encoder.encode, decoder.decode)
+
+
+def _ujson_codec() -> JSONCodec:
+    import ujson
+    
+    def dumps(obj: Any) -> bytes:
+        return ujson.dumps(obj, ensure_ascii=False).encode('utf-8')
+    
+    return JSONCodec('ujson', dumps, ujson.loads)
+
+
+_FACTORIES = {
+    'orjson': _orjson_codec,
+    'msgspec': _msgspec_codec,
+    'ujson': _ujson_codec,
+    'json': _stdlib_codec,
+}
+
+# Порядок предпочтения при автоматическом выборе
+PREFERRED = ('orjson', 'msgspec', 'ujson', 'json')
+
+_default: Optional[JSONCodec] = None
+
+
+def get_codec(codec: Union[str, JSONCodec, None] = None) -> JSONCodec:
+    """
+    Получение кодека JSON
+    
+    Args:
+        codec: Название ('orjson', 'msgspec', 'ujson', 'json'), готовый JSONCodec
+               или None - самый быстрый из установленных
+    
+    Returns:
+        JSONCodec
+    
+    Raises:
+        ValueError: Неизвестное название кодека
+        ImportError: Запрошенный пакет не установлен
+    """
+    global _default
+    
+    if isinstance(codec, JSONCodec):
+        return codec
+    
+    if codec is not None:
+        factory = _FACTORIES.get(codec)
+        if factory is None:
+            raise ValueError(f"Неизвестный JSON кодек: {codec}. Доступны: {', '.join(PREFERRED)}")
+        return factory()
+    
+    if _default is None:
+        for name in PREFERRED:
+            try:
+                _default = _FACTORIES[name]()
+                break
+            except ImportError:
+                continue
+    
+    return _default
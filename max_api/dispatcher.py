@@ -0,0 +1,326 @@
+"""
+Маршрутизация обновлений по обработчикам (Dispatcher)
+"""
+
+import logging
+import threading
+from typing import Optional, Callable, Dict, Any, Iterable, List
+
+from .exceptions import MAXAPIException
+from .utils import parse_update_type, extract_message_text, extract_callback_payload
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[Dict[str, Any]], Any]
+Middleware = Callable[[Dict[str, Any], Handler], Any]
+
+
+class _PrefixTrie:
+    """Префиксное дерево: поиск самого длинного зарегистрированного префикса за O(длины строки)"""
+    
+    __slots__ = ('_root',)
+    
+    def __init__(self):
+        self._root: Dict[str, Any] = {}
+    
+    def insert(self, prefix: str, value: Any) -> None:
+        node = self._root
+        for char in prefix:
+            node = node.setdefault(char, {})
+        node[None] = value
+    
+    def longest_match(self, key: str) -> Optional[Any]:
+        node = self._root
+        found = node.get(None)
+        for char in key:
+            node = node.get(char)
+            if node is None:
+                break
+            if None in node:
+                found = node[None]
+        return found
+
+
+def _parse_command(text: Optional[str]) -> Optional[str]:
+    """
+    Извлечение команды из текста сообщения
+    
+    Args:
+        text: Текст сообщения
+    
+    Returns:
+        str: Имя команды без '/' в нижнем регистре ('/Start@bot arg' -> 'start') или None
+    """
+    if not text or text[0] != '/':
+        return None
+    command = text[1:].split(maxsplit=1)[0] if len(text) > 1 else ''
+    command = command.split('@', 1)[0]
+    return command.lower() or None
+
+
+class Dispatcher:
+    """
+    Диспетчер обновлений.
+    
+    Обработчики регистрируются по типу обновления, по команде (/start)
+    и по payload callback-кнопки (точно или по префиксу). Маршрут
+    выбирается поиском в словаре (для префиксов - в префиксном дереве),
+    поэтому стоимость маршрутизации не растёт с количеством обработчиков.
+    
+    Порядок выбора обработчика:
+    1. message_created с командой - обработчик команды
+    2. message_callback - обработчик payload (точное совпадение, затем самый длинный префикс)
+    3. обработчик типа обновления
+    4. обработчик по умолчанию
+    
+    Example:
+        >>> dp = Dispatcher()
+        >>>
+        >>> @dp.command('start')
+        ... def start(update):
+        ...     client.send_message(chat_id=..., text="Привет!")
+        >>>
+        >>> @dp.callback(prefix='rating_')
+        ... def rating(update):
+        ...     ...
+        >>>
+        >>> dp.run_polling(manager)
+    """
+    
+    def __init__(self, error_handler: Optional[Callable[[Dict[str, Any], Exception], Any]] = None):
+        """
+        Args:
+            error_handler: Обработчик исключений error_handler(update, exc).
+                           Если задан, ошибка обработчика не прерывает обработку пачки.
+        """
+        self.error_handler = error_handler
+        self._type_handlers: Dict[str, Handler] = {}
+        self._command_handlers: Dict[str, Handler] = {}
+        self._payload_handlers: Dict[str, Handler] = {}
+        self._payload_prefixes = _PrefixTrie()
+        self._default_handler: Optional[Handler] = None
+        self._middlewares: List[Middleware] = []
+        self._chain: Handler = self._route
+    
+    # === Регистрация обработчиков ===
+    
+    def add_handler(self, update_type: str, handler: Handler) -> None:
+        """
+        Регистрация обработчика типа обновления
+        
+        Args:
+            update_type: Тип обновления (message_created, bot_started, и т.д.)
+            handler: Функция handler(update)
+        """
+        self._type_handlers[update_type] = handler
+    
+    def add_command(self, command: str, handler: Handler) -> None:
+        """
+        Регистрация обработчика команды
+        
+        Args:
+            command: Команда ('start' или '/start')
+            handler: Функция handler(update)
+        """
+        self._command_handlers[command.lstrip('/').lower()] = handler
+    
+    def add_callback(
+        self,
+        handler: Handler,
+        payload: Optional[str] = None,
+        prefix: Optional[str] = None
+    ) -> None:
+        """
+        Регистрация обработчика нажатия callback-кнопки
+        
+        Args:
+            handler: Функция handler(update)
+            payload: Точное значение payload
+            prefix: Префикс payload (например, 'rating_' для 'rating_1'...'rating_5')
+        """
+        if (payload is None) == (prefix is None):
+            raise ValueError("Нужно указать ровно один из параметров: payload или prefix")
+        
+        if payload is not None:
+            self._payload_handlers[payload] = handler
+        else:
+            self._payload_prefixes.insert(prefix, handler)
+    
+    def set_default(self, handler: Optional[Handler]) -> None:
+        """
+        Обработчик обновлений, для которых не нашлось маршрута
+        
+        Args:
+            handler: Функция handler(update) или None
+        """
+        self._default_handler = handler
+    
+    def add_middleware(self, middleware: Middleware) -> None:
+        """
+        Добавление middleware.
+        
+        Middleware вызывается как middleware(update, call_next) и должен
+        вызвать call_next(update), чтобы передать обновление дальше.
+        Middleware выполняются в порядке добавления.
+        
+        Args:
+            middleware: Функция middleware(update, call_next)
+        """
+        self._middlewares.append(middleware)
+        
+        # Цепочка собирается один раз при регистрации, а не на каждое обновление
+        chain = self._route
+        for mw in reversed(self._middlewares):
+            chain = self._wrap(mw, chain)
+        self._chain = chain
+    
+    @staticmethod
+    def _wrap(middleware: Middleware, call_next: Handler) -> Handler:
+        def wrapped(update: Dict[str, Any]) -> Any:
+            return middleware(update, call_next)
+        return wrapped
+    
+    # === Декораторы ===
+    
+    def on(self, update_type: str) -> Callable[[Handler], Handler]:
+        """Декоратор для add_handler()"""
+        def decorator(handler: Handler) -> Handler:
+            self.add_handler(update_type, handler)
+            return handler
+        return decorator
+    
+    def command(self, command: str) -> Callable[[Handler], Handler]:
+        """Декоратор для add_command()"""
+        def decorator(handler: Handler) -> Handler:
+            self.add_command(command, handler)
+            return handler
+        return decorator
+    
+    def callback(
+        self,
+        payload: Optional[str] = None,
+        prefix: Optional[str] = None
+    ) -> Callable[[Handler], Handler]:
+        """Декоратор для add_callback()"""
+        def decorator(handler: Handler) -> Handler:
+            self.add_callback(handler, payload=payload, prefix=prefix)
+            return handler
+        return decorator
+    
+    def middleware(self, middleware: Middleware) -> Middleware:
+        """Декоратор для add_middleware()"""
+        self.add_middleware(middleware)
+        return middleware
+    
+    # === Маршрутизация ===
+    
+    def resolve(self, update: Dict[str, Any]) -> Optional[Handler]:
+        """
+        Поиск обработчика для обновления
+        
+        Args:
+            update: Объект обновления
+        
+        Returns:
+            Обработчик или None
+        """
+        update_type = parse_update_type(update)
+        
+        if update_type == 'message_created' and self._command_handlers:
+            command = _parse_command(extract_message_text(update))
+            if command is not None:
+                handler = self._command_handlers.get(command)
+                if handler is not None:
+                    return handler
+        
+        elif update_type == 'message_callback':
+            payload = extract_callback_payload(update)
+            if payload is not None:
+                handler = self._payload_handlers.get(payload)
+                if handler is None:
+                    handler = self._payload_prefixes.longest_match(payload)
+                if handler is not None:
+                    return handler
+        
+        handler = self._type_handlers.get(update_type)
+        if handler is not None:
+            return handler
+        
+        return self._default_handler
+    
+    def _route(self, update: Dict[str, Any]) -> Any:
+        """Последнее звено цепочки middleware - вызов обработчика"""
+        handler = self.resolve(update)
+        if handler is None:
+            logger.debug(f"Нет обработчика для обновления {parse_update_type(update)}")
+            return None
+        return handler(update)
+    
+    def dispatch(self, update: Dict[str, Any]) -> Any:
+        """
+        Обработка одного обновления
+        
+        Args:
+            update: Объект обновления
+        
+        Returns:
+            Результат обработчика (None, если обработчик не найден)
+        """
+        if self.error_handler is None:
+            return self._chain(update)
+        
+        try:
+            return self._chain(update)
+        except Exception as e:
+            logger.exception(f"Ошибка обработки обновления {parse_update_type(update)}")
+            self.error_handler(update, e)
+            return None
+    
+    def feed(self, updates: Iterable[Dict[str, Any]]) -> int:
+        """
+        Обработка пачки обновлений (например, из UpdateManager.get_updates())
+        
+        Args:
+            updates: Обновления
+        
+        Returns:
+            Количество обработанных обновлений
+        """
+        count = 0
+        for update in updates:
+            self.dispatch(update)
+            count += 1
+        return count
+    
+    def run_polling(
+        self,
+        manager,
+        timeout: int = 30,
+        stop_event: Optional[threading.Event] = None,
+        error_delay: float = 5.0
+    ) -> None:
+        """
+        Цикл Long Polling: получение пачек через UpdateManager и их обработка.
+        
+        Маркер фиксируется после обработки каждой пачки (см. UpdateManager.process_updates).
+        Ошибка получения обновлений (API, сеть) не завершает цикл: она
+        записывается в лог, и запрос повторяется через error_delay секунд.
+        
+        Args:
+            manager: UpdateManager в режиме Long Polling
+            timeout: Таймаут Long Polling (секунды)
+            stop_event: Событие для остановки цикла (None - до KeyboardInterrupt)
+            error_delay: Пауза перед повтором после ошибки запроса (секунды)
+        """
+        if stop_event is None:
+            stop_event = threading.Event()
+        
+        while not stop_event.is_set():
+            try:
+                updates = manager.get_updates(timeout=timeout)
+            except MAXAPIException as e:
+                logger.warning(f"Ошибка получения обновлений: {e}. Повтор через {error_delay}s")
+                stop_event.wait(error_delay)
+                continue
+            
+            manager.process_updates(updates, self.dispatch)
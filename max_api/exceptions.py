@@ -44,12 +44,22 @@ class MethodNotAllowedError(MAXAPIException):
 class RateLimitError(MAXAPIException):
     """Превышено количество запросов (429)"""
     
-    def __init__(self, message: str = "Превышено количество запросов. Попробуйте позже.", **kwargs):
+    def __init__(self, message: str = "Превышено количество запросов. Попробуйте позже.", retry_after: float = None, **kwargs):
+        self.retry_after = retry_after
         super().__init__(message, status_code=429, **kwargs)
 
 
 class ServiceUnavailableError(MAXAPIException):
     """Сервис недоступен (503)"""
     
-    def __init__(self, message: str = "Сервис временно недоступен.", **kwargs):
+    def __init__(self, message: str = "Сервис временно недоступен.", retry_after: float = None, **kwargs):
+        self.retry_after = retry_after
         super().__init__(message, status_code=503, **kwargs)
+
+
+class CircuitOpenError(MAXAPIException):
+    """Запрос не выполнен: цепь для конечной точки разомкнута после серии ошибок"""
+    
+    def __init__(self, message: str = "Сервис недоступен, запрос отклонён без обращения к API.", retry_after: float = None, **kwargs):
+        self.retry_after = retry_after
+        super().__init__(message, **kwargs)
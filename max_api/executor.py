@@ -0,0 +1,308 @@
+"""
+Параллельная обработка обновлений с сохранением порядка внутри чата
+"""
+
+import time
+import queue
+import logging
+import itertools
+import threading
+from typing import Optional, Callable, Dict, Any, Iterable, List, Hashable
+
+from .utils import extract_chat_id, extract_user_id
+
+logger = logging.getLogger(__name__)
+
+# Маркер остановки рабочего потока
+_STOP = object()
+
+
+def default_shard_key(update: Dict[str, Any]) -> Optional[Hashable]:
+    """
+    Ключ шардирования обновления: чат, а если его нет - пользователь
+    
+    Args:
+        update: Объект обновления
+    
+    Returns:
+        chat_id, user_id отправителя или None
+    """
+    chat_id = extract_chat_id(update)
+    if chat_id is not None:
+        return chat_id
+    return extract_user_id(update)
+
+
+class _BatchCounter:
+    """Счётчик необработанных обновлений пачки"""
+    
+    __slots__ = ('remaining', 'failed', 'callback', 'lock')
+    
+    def __init__(self, remaining: int, callback: Callable[[], Any]):
+        self.remaining = remaining
+        self.failed = False
+        self.callback = callback
+        self.lock = threading.Lock()
+    
+    def done(self, ok: bool) -> None:
+        """Учёт обработанного обновления; callback вызывается, только если все успешны"""
+        with self.lock:
+            self.remaining -= 1
+            self.failed = self.failed or not ok
+            finished = self.remaining == 0 and not self.failed
+        if finished:
+            self.callback()
+
+
+class _Shard:
+    """Очередь и рабочий поток одного шарда"""
+    
+    def __init__(self, index: int, queue_size: int):
+        self.index = index
+        self.queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self.thread: Optional[threading.Thread] = None
+        self.processed = 0
+        self.errors = 0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+        self.last_lag = 0.0
+
+
+class ShardedExecutor:
+    """
+    Исполнитель обработчиков на фиксированном пуле потоков.
+    
+    Обновления распределяются по шардам по ключу (chat_id, а если его нет -
+    user_id отправителя). У каждого шарда свой рабочий поток и своя
+    ограниченная очередь, поэтому сообщения одного чата обрабатываются
+    строго по порядку, а медленный обработчик в одном чате не задерживает
+    остальные чаты (кроме попавших в тот же шард).
+    
+    on_done вызывается только после успешной обработки: если обработчик
+    хотя бы одного обновления пачки выбросил исключение (даже обработанное
+    error_handler), пачка не подтверждается, и маркер Poller не сдвигается
+    за неё - после перезапуска она будет получена повторно.
+    
+    Example:
+        >>> executor = ShardedExecutor(dispatcher.dispatch, num_workers=16)
+        >>> with executor:
+        ...     for batch in poller:
+        ...         executor.submit_batch(batch, on_done=lambda b=batch: poller.ack(b))
+    """
+    
+    def __init__(
+        self,
+        handler: Callable[[Dict[str, Any]], Any],
+        num_workers: int = 8,
+        queue_size: int = 100,
+        key_func: Callable[[Dict[str, Any]], Optional[Hashable]] = default_shard_key,
+        error_handler: Optional[Callable[[Dict[str, Any], Exception], Any]] = None
+    ):
+        """
+        Args:
+            handler: Обработчик одного обновления (например, Dispatcher.dispatch)
+            num_workers: Количество шардов (рабочих потоков)
+            queue_size: Максимальная длина очереди одного шарда
+            key_func: Функция, возвращающая ключ шардирования обновления
+            error_handler: Обработчик исключений error_handler(update, exc)
+        """
+        if num_workers < 1:
+            raise ValueError("num_workers должен быть не меньше 1")
+        
+        self.handler = handler
+        self.num_workers = num_workers
+        self.key_func = key_func
+        self.error_handler = error_handler
+        self._shards: List[_Shard] = [_Shard(i, queue_size) for i in range(num_workers)]
+        self._round_robin = itertools.count()
+        self._started = False
+    
+    def shard_for(self, update: Dict[str, Any]) -> int:
+        """
+        Номер шарда для обновления
+        
+        Args:
+            update: Объект обновления
+        
+        Returns:
+            int: Номер шарда (обновления без ключа распределяются по кругу)
+        """
+        key = self.key_func(update)
+        if key is None:
+            return next(self._round_robin) % self.num_workers
+        return hash(key) % self.num_workers
+    
+    def start(self) -> "ShardedExecutor":
+        """Запуск рабочих потоков"""
+        if self._started:
+            return self
+        
+        for shard in self._shards:
+            shard.thread = threading.Thread(
+                target=self._worker,
+                args=(shard,),
+                name=f"max-api-shard-{shard.index}",
+                daemon=True
+            )
+            shard.thread.start()
+        
+        self._started = True
+        return self
+    
+    def stop(self, wait: bool = True) -> None:
+        """
+        Остановка рабочих потоков после обработки уже поставленных обновлений
+        
+        Args:
+            wait: Дождаться завершения потоков
+        """
+        if not self._started:
+            return
+        
+        for shard in self._shards:
+            shard.queue.put(_STOP)
+        
+        if wait:
+            for shard in self._shards:
+                shard.thread.join()
+        
+        self._started = False
+    
+    def submit(
+        self,
+        update: Dict[str, Any],
+        timeout: Optional[float] = None,
+        on_done: Optional[Callable[[], Any]] = None
+    ) -> None:
+        """
+        Поставить обновление в очередь его шарда.
+        
+        Если очередь шарда заполнена, вызов блокируется (backpressure).
+        
+        Args:
+            update: Объект обновления
+            timeout: Сколько ждать места в очереди (None - без ограничения)
+            on_done: Функция, вызываемая после успешной обработки обновления
+        
+        Raises:
+            queue.Full: Если за timeout место в очереди не освободилось
+        """
+        self._put(update, _BatchCounter(1, on_done) if on_done is not None else None, timeout)
+    
+    def _put(
+        self,
+        update: Dict[str, Any],
+        counter: Optional[_BatchCounter],
+        timeout: Optional[float] = None
+    ) -> None:
+        """Постановка обновления в очередь шарда со счётчиком пачки"""
+        if not self._started:
+            self.start()
+        
+        shard = self._shards[self.shard_for(update)]
+        shard.queue.put((update, time.monotonic(), counter), timeout=timeout)
+    
+    def submit_batch(
+        self,
+        updates: Iterable[Dict[str, Any]],
+        on_done: Optional[Callable[[], Any]] = None
+    ) -> int:
+        """
+        Поставить пачку обновлений в очереди шардов.
+        
+        Args:
+            updates: Обновления (например, пачка из UpdateManager или Poller)
+            on_done: Функция, вызываемая после успешной обработки всех обновлений
+                     пачки (например, для фиксации маркера); при ошибке обработчика
+                     не вызывается
+        
+        Returns:
+            int: Количество поставленных обновлений
+        """
+        updates = list(updates)
+        if not updates:
+            if on_done is not None:
+                on_done()
+            return 0
+        
+        counter = _BatchCounter(len(updates), on_done) if on_done is not None else None
+        
+        for update in updates:
+            self._put(update, counter)
+        
+        return len(updates)
+    
+    def join(self) -> None:
+        """Дождаться обработки всех поставленных обновлений"""
+        for shard in self._shards:
+            shard.queue.join()
+    
+    def _worker(self, shard: _Shard) -> None:
+        """Цикл рабочего потока шарда"""
+        while True:
+            item = shard.queue.get()
+            try:
+                if item is _STOP:
+                    return
+                
+                update, submitted_at, counter = item
+                lag = time.monotonic() - submitted_at
+                shard.last_lag = lag
+                shard.total_lag += lag
+                if lag > shard.max_lag:
+                    shard.max_lag = lag
+                
+                ok = False
+                try:
+                    self.handler(update)
+                    ok = True
+                except Exception as e:
+                    shard.errors += 1
+                    if self.error_handler is not None:
+                        self.error_handler(update, e)
+                    else:
+                        logger.exception(f"Ошибка обработки обновления в шарде {shard.index}")
+                finally:
+                    shard.processed += 1
+                    if counter is not None:
+                        counter.done(ok)
+            except Exception:
+                logger.exception(f"Ошибка в шарде {shard.index}")
+            finally:
+                shard.queue.task_done()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Метрики исполнителя
+        
+        Returns:
+            dict: queue_depth - всего в очередях, processed, errors,
+                  shards - метрики по шардам (queue_depth, processed, errors,
+                  last_lag / avg_lag / max_lag - задержка от постановки до начала обработки)
+        """
+        shards = []
+        for shard in self._shards:
+            shards.append({
+                'shard': shard.index,
+                'queue_depth': shard.queue.qsize(),
+                'processed': shard.processed,
+                'errors': shard.errors,
+                'last_lag': shard.last_lag,
+                'avg_lag': shard.total_lag / shard.processed if shard.processed else 0.0,
+                'max_lag': shard.max_lag,
+            })
+        
+        return {
+            'queue_depth': sum(s['queue_depth'] for s in shards),
+            'processed': sum(s['processed'] for s in shards),
+            'errors': sum(s['errors'] for s in shards),
+            'shards': shards,
+        }
+    
+    def __enter__(self):
+        """Запуск при входе в контекст"""
+        return self.start()
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Остановка при выходе из контекста"""
+        self.stop()
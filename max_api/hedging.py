@@ -0,0 +1,152 @@
+"""
+Хеджирование идемпотентных запросов (повторная отправка медленного GET)
+"""
+
+import threading
+from collections import deque
+from typing import Optional, Dict, Any, Deque
+
+from .cache import endpoint_group
+
+
+class HedgePolicy:
+    """
+    Политика хеджирования GET-запросов MAXClient.
+    
+    Если ответ на GET не пришёл за задержку, равную заданному перцентилю
+    недавних задержек этой группы конечных точек, клиент отправляет копию
+    запроса через отдельный пул соединений. Используется первый успешный
+    ответ. Разрешение на копию берётся у планировщика полос без ожидания
+    (PriorityScheduler.try_acquire): копия отправляется, только если ни один
+    запрос не ждёт в очередях полос и в лимитере есть свободный токен. Поэтому
+    хеджирование никогда не превышает лимит запросов и не задерживает
+    ожидающие отправки, в том числе интерактивные.
+    
+    Example:
+        >>> client = MAXClient(token="...", hedge_policy=HedgePolicy(percentile=95))
+        >>> client.get_message(mid)
+        >>> client.hedge_policy.get_stats()
+    """
+    
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        initial_delay: float = 1.0,
+        min_delay: float = 0.05,
+        max_delay: Optional[float] = None,
+        window: int = 200,
+        min_samples: int = 20,
+        max_workers: int = 16
+    ):
+        """
+        Args:
+            percentile: Перцентиль задержки, после которого отправляется копия
+            initial_delay: Задержка, пока накоплено меньше min_samples замеров
+            min_delay: Нижняя граница задержки (секунды)
+            max_delay: Верхняя граница задержки (None - без ограничения)
+            window: Количество последних замеров на группу конечных точек
+            min_samples: Минимум замеров для расчёта перцентиля
+            max_workers: Размер пула потоков для параллельных попыток
+        """
+        if not 0 < percentile <= 100:
+            raise ValueError("percentile должен быть в диапазоне (0, 100]")
+        
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.window = window
+        self.min_samples = min_samples
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._samples: Dict[str, Deque[float]] = {}
+        
+        # Метрики
+        self._requests = 0
+        self._hedged = 0
+        self._hedge_wins = 0
+        self._rate_limited = 0
+    
+    def delay(self, endpoint: str) -> float:
+        """
+        Задержка перед отправкой копии запроса
+        
+        Args:
+            endpoint: Конечная точка API
+        
+        Returns:
+            float: Задержка в секундах
+        """
+        with self._lock:
+            samples = self._samples.get(endpoint_group(endpoint))
+            if samples is None or len(samples) < self.min_samples:
+                delay = self.initial_delay
+            else:
+                ordered = sorted(samples)
+                index = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))
+                delay = ordered[index]
+        
+        delay = max(delay, self.min_delay)
+        if self.max_delay is not None:
+            delay = min(delay, self.max_delay)
+        return delay
+    
+    def record(self, endpoint: str, latency: float) -> None:
+        """
+        Учёт задержки успешного запроса
+        
+        Args:
+            endpoint: Конечная точка API
+            latency: Время ответа в секундах
+        """
+        group = endpoint_group(endpoint)
+        with self._lock:
+            samples = self._samples.get(group)
+            if samples is None:
+                samples = self._samples[group] = deque(maxlen=self.window)
+            samples.append(latency)
+    
+    def on_request(self) -> None:
+        """Учёт запроса, для которого возможно хеджирование"""
+        with self._lock:
+            self._requests += 1
+    
+    def on_hedge(self) -> None:
+        """Учёт отправленной копии"""
+        with self._lock:
+            self._hedged += 1
+    
+    def on_hedge_win(self) -> None:
+        """Учёт случая, когда копия ответила первой"""
+        with self._lock:
+            self._hedge_wins += 1
+    
+    def on_rate_limited(self) -> None:
+        """Учёт копии, не отправленной из-за лимита запросов"""
+        with self._lock:
+            self._rate_limited += 1
+    
+    def _after_fork(self) -> None:
+        """Новая блокировка в дочернем процессе"""
+        self._lock = threading.Lock()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Метрики хеджирования
+        
+        Returns:
+            dict: requests - запросов с возможностью хеджирования,
+                  hedged / hedge_rate - отправлено копий и их доля,
+                  hedge_wins / hedge_win_rate - копия ответила первой
+                  (доля от отправленных копий),
+                  rate_limited - копий не отправлено из-за лимита
+        """
+        with self._lock:
+            return {
+                'requests': self._requests,
+                'hedged': self._hedged,
+                'hedge_rate': self._hedged / self._requests if self._requests else 0.0,
+                'hedge_wins': self._hedge_wins,
+                'hedge_win_rate': self._hedge_wins / self._hedged if self._hedged else 0.0,
+                'rate_limited': self._rate_limited,
+            }
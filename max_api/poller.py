@@ -0,0 +1,235 @@
+"""
+Фоновый Long Polling с предзагрузкой следующей пачки обновлений
+"""
+
+import time
+import queue
+import logging
+import threading
+from typing import Optional, Dict, Any, Iterator
+
+from .update_manager import UpdateManager
+from .utils import UpdatesBatch
+
+logger = logging.getLogger(__name__)
+
+
+class Poller:
+    """
+    Фоновый опрос /updates поверх UpdateManager.
+    
+    Long Polling выполняется в отдельном потоке и складывает пачки
+    обновлений в ограниченную очередь. Пока обработчики заняты текущей
+    пачкой, следующая уже запрашивается с сервера. Когда очередь заполнена,
+    поток перестаёт запрашивать новые пачки (backpressure).
+    
+    Маркер сохраняется в checkpoint_store менеджера только через ack():
+    фиксируется маркер последней пачки, для которой обработаны и она сама,
+    и все пачки до неё.
+    
+    Example:
+        >>> with Poller(manager, max_queue_size=4) as poller:
+        ...     for batch in poller:
+        ...         for update in batch:
+        ...             handle(update)
+        ...         poller.ack(batch)
+    """
+    
+    def __init__(
+        self,
+        manager: UpdateManager,
+        timeout: int = 30,
+        max_queue_size: int = 4,
+        error_delay: float = 5.0
+    ):
+        """
+        Args:
+            manager: Менеджер обновлений в режиме Long Polling
+            timeout: Таймаут Long Polling (секунды)
+            max_queue_size: Максимальное количество пачек в очереди
+            error_delay: Пауза перед повтором после ошибки запроса (секунды)
+        """
+        self.manager = manager
+        self.timeout = timeout
+        self.error_delay = error_delay
+        self._queue: "queue.Queue[UpdatesBatch]" = queue.Queue(maxsize=max_queue_size)
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        
+        # Порядок пачек для фиксации маркера: seq -> (marker, обработана ли)
+        self._lock = threading.Lock()
+        self._next_seq = 0
+        self._inflight: Dict[int, list] = {}
+        self._commit_seq = 0
+        
+        # Метрики
+        self._fetched_batches = 0
+        self._fetched_updates = 0
+        self._dispatched_batches = 0
+        self._errors = 0
+        self._total_lag = 0.0
+        self._max_lag = 0.0
+        self._last_lag = 0.0
+    
+    @property
+    def is_running(self) -> bool:
+        """Работает ли фоновый поток"""
+        return self._thread is not None and self._thread.is_alive()
+    
+    @property
+    def queue_depth(self) -> int:
+        """Количество пачек, ожидающих обработки"""
+        return self._queue.qsize()
+    
+    def start(self) -> "Poller":
+        """Запуск фонового потока опроса"""
+        if self.is_running:
+            return self
+        
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="max-api-poller", daemon=True)
+        self._thread.start()
+        logger.info("Poller запущен")
+        return self
+    
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Остановка фонового потока.
+        
+        Текущий запрос Long Polling дожидается завершения, поэтому
+        остановка может занять до timeout Long Polling.
+        
+        Args:
+            timeout: Сколько ждать завершения потока (None - без ограничения)
+        """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        logger.info("Poller остановлен")
+    
+    def _run(self) -> None:
+        """Цикл фонового потока"""
+        while not self._stop_event.is_set():
+            try:
+                batch = self.manager.fetch_updates(timeout=self.timeout)
+            except Exception as e:
+                self._errors += 1
+                logger.warning(f"Ошибка получения обновлений: {e}")
+                self._stop_event.wait(self.error_delay)
+                continue
+            
+            marker = getattr(batch, 'marker', None)
+            if not isinstance(batch, UpdatesBatch):
+                batch = UpdatesBatch(batch, marker=marker)
+            
+            with self._lock:
+                batch.seq = self._next_seq
+                self._next_seq += 1
+                self._inflight[batch.seq] = [marker, False]
+                self._fetched_batches += 1
+                self._fetched_updates += len(batch)
+            
+            # Пустую пачку обрабатывать не нужно - сразу подтверждаем
+            if not batch:
+                self.ack(batch)
+                continue
+            
+            batch.fetched_at = time.monotonic()
+            
+            # Backpressure: ждём места в очереди, не прекращая реагировать на stop()
+            while not self._stop_event.is_set():
+                try:
+                    self._queue.put(batch, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+    
+    def get(self, timeout: Optional[float] = None) -> Optional[UpdatesBatch]:
+        """
+        Получить следующую пачку обновлений
+        
+        Args:
+            timeout: Сколько ждать пачку (None - без ограничения)
+        
+        Returns:
+            UpdatesBatch или None, если за timeout пачка не появилась
+        """
+        try:
+            batch = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        
+        lag = time.monotonic() - batch.fetched_at
+        with self._lock:
+            self._dispatched_batches += 1
+            self._total_lag += lag
+            self._last_lag = lag
+            if lag > self._max_lag:
+                self._max_lag = lag
+        
+        return batch
+    
+    def ack(self, batch: UpdatesBatch) -> None:
+        """
+        Подтвердить обработку пачки.
+        
+        Маркер фиксируется, когда подтверждены все пачки до этой включительно,
+        поэтому пачки можно подтверждать в любом порядке.
+        
+        Args:
+            batch: Пачка, полученная из get()
+        """
+        marker_to_commit = None
+        
+        with self._lock:
+            entry = self._inflight.get(batch.seq)
+            if entry is None:
+                return
+            entry[1] = True
+            
+            while self._commit_seq in self._inflight and self._inflight[self._commit_seq][1]:
+                marker, _ = self._inflight.pop(self._commit_seq)
+                if marker is not None:
+                    marker_to_commit = marker
+                self._commit_seq += 1
+            
+            if marker_to_commit is not None:
+                self.manager.commit(marker_to_commit)
+    
+    def __iter__(self) -> Iterator[UpdatesBatch]:
+        """Итерация по пачкам до вызова stop()"""
+        while not (self._stop_event.is_set() and self._queue.empty()):
+            batch = self.get(timeout=0.1)
+            if batch is not None:
+                yield batch
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Метрики опроса
+        
+        Returns:
+            dict: queue_depth - пачек в очереди,
+                  fetched_batches / fetched_updates - получено с сервера,
+                  dispatched_batches - выдано обработчикам,
+                  errors - ошибок запроса,
+                  last_lag / avg_lag / max_lag - задержка от получения до выдачи (секунды)
+        """
+        with self._lock:
+            return {
+                'queue_depth': self.queue_depth,
+                'fetched_batches': self._fetched_batches,
+                'fetched_updates': self._fetched_updates,
+                'dispatched_batches': self._dispatched_batches,
+                'errors': self._errors,
+                'last_lag': self._last_lag,
+                'avg_lag': self._total_lag / self._dispatched_batches if self._dispatched_batches else 0.0,
+                'max_lag': self._max_lag,
+            }
+    
+    def __enter__(self):
+        """Запуск при входе в контекст"""
+        return self.start()
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Остановка при выходе из контекста"""
+        self.stop()
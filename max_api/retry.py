@@ -0,0 +1,220 @@
+"""
+Политика повторных запросов (retry) для MAX API
+"""
+
+import time
+import random
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Optional, Iterable
+
+from .exceptions import MAXAPIException
+
+
+# HTTP методы, повтор которых не меняет результат
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+
+
+class RetryBudget:
+    """
+    Общий бюджет повторных запросов.
+    
+    Каждый исходный запрос пополняет бюджет на ratio токенов, каждый повтор
+    расходует один токен. Пока API работает, бюджет копится до max_tokens;
+    во время сбоя он быстро исчерпывается, и повторы прекращаются - клиенты
+    не усиливают нагрузку на и так деградировавший сервер (retry storm).
+    
+    Один бюджет можно разделить между несколькими клиентами.
+    """
+    
+    def __init__(self, ratio: float = 0.2, max_tokens: float = 10.0):
+        """
+        Args:
+            ratio: Доля повторов относительно исходных запросов
+            max_tokens: Максимальный запас повторов
+        """
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._lock = threading.Lock()
+    
+    @property
+    def tokens(self) -> float:
+        """Текущий запас повторов"""
+        return self._tokens
+    
+    def deposit(self):
+        """Учесть исходный запрос"""
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+    
+    def try_spend(self) -> bool:
+        """
+        Попытаться потратить токен на повтор
+        
+        Returns:
+            bool: True, если повтор разрешён
+        """
+        with self._lock:
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+
+class RetryPolicy:
+    """
+    Политика повторных запросов с экспоненциальной задержкой.
+    
+    Задержка перед попыткой N: min(backoff_max, backoff_base * 2 ** (N - 1)),
+    при jitter=True выбирается случайно в диапазоне [0, задержка] (full jitter).
+    Если сервер прислал заголовок Retry-After, используется он; если он больше
+    max_retry_after, запрос не повторяется, а ошибка возвращается вызывающему.
+    
+    Example:
+        >>> policy = RetryPolicy(max_attempts=5, total_timeout=30)
+        >>> client = MAXClient(token="...", retry_policy=policy)
+    """
+    
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        total_timeout: Optional[float] = 60.0,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        jitter: bool = True,
+        retry_statuses: Iterable[int] = (429, 503),
+        retry_non_idempotent: bool = False,
+        respect_retry_after: bool = True,
+        budget: Optional[RetryBudget] = None,
+        max_retry_after: Optional[float] = None
+    ):
+        """
+        Args:
+            max_attempts: Максимальное количество попыток (включая первую)
+            total_timeout: Общий лимит времени на все попытки в секундах (None - без лимита)
+            backoff_base: Базовая задержка в секундах
+            backoff_max: Максимальная задержка в секундах
+            jitter: Добавлять ли случайный разброс к задержке
+            retry_statuses: HTTP коды, при которых выполняется повтор
+            retry_non_idempotent: Повторять ли неидемпотентные запросы (POST, PATCH)
+            respect_retry_after: Учитывать ли заголовок Retry-After
+            budget: Общий бюджет повторов (None - без ограничения)
+            max_retry_after: Наибольший Retry-After, который стоит подождать
+                             (по умолчанию backoff_max)
+        """
+        if max_attempts < 1:
+            raise ValueError("max_attempts должен быть не меньше 1")
+        
+        self.max_attempts = max_attempts
+        self.total_timeout = total_timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.retry_statuses = frozenset(retry_statuses)
+        self.retry_non_idempotent = retry_non_idempotent
+        self.respect_retry_after = respect_retry_after
+        self.budget = budget
+        self.max_retry_after = backoff_max if max_retry_after is None else max_retry_after
+    
+    def start(self) -> Optional[float]:
+        """
+        Начало выполнения запроса
+        
+        Returns:
+            float: Момент (time.monotonic), после которого повторы запрещены, или None
+        """
+        if self.budget is not None:
+            self.budget.deposit()
+        if self.total_timeout is None:
+            return None
+        return time.monotonic() + self.total_timeout
+    
+    def backoff(self, attempt: int) -> float:
+        """
+        Задержка после неудачной попытки
+        
+        Args:
+            attempt: Номер неудачной попытки (начиная с 1)
+        
+        Returns:
+            float: Задержка в секундах
+        """
+        delay = min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1)))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
+    
+    def next_delay(
+        self,
+        method: str,
+        error: MAXAPIException,
+        attempt: int,
+        deadline: Optional[float] = None
+    ) -> Optional[float]:
+        """
+        Решение о повторе запроса
+        
+        Args:
+            method: HTTP метод запроса
+            error: Исключение, которым завершилась попытка
+            attempt: Номер неудачной попытки (начиная с 1)
+            deadline: Результат start()
+        
+        Returns:
+            float: Задержка перед следующей попыткой или None, если повторять нельзя
+        """
+        if attempt >= self.max_attempts:
+            return None
+        
+        if error.status_code not in self.retry_statuses:
+            return None
+        
+        if method.upper() not in IDEMPOTENT_METHODS and not self.retry_non_idempotent:
+            return None
+        
+        retry_after = getattr(error, 'retry_after', None)
+        if self.respect_retry_after and retry_after is not None:
+            # Сервер просит ждать дольше, чем разумно держать вызывающего
+            if retry_after > self.max_retry_after:
+                return None
+            delay = retry_after
+        else:
+            delay = self.backoff(attempt)
+        
+        if deadline is not None and time.monotonic() + delay > deadline:
+            return None
+        
+        if self.budget is not None and not self.budget.try_spend():
+            return None
+        
+        return delay
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Разбор заголовка Retry-After
+    
+    Args:
+        value: Значение заголовка (число секунд или HTTP-дата)
+    
+    Returns:
+        float: Задержка в секундах или None
+    """
+    if not value:
+        return None
+    
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    
+    if retry_at is None:
+        return None
+    
+    return max(0.0, retry_at.timestamp() - time.time())
@@ -0,0 +1,333 @@
+"""
+Приоритетный планировщик исходящих запросов (полосы)
+"""
+
+import time
+import threading
+from collections import deque, OrderedDict
+from typing import Optional, Dict, Any, Deque, Hashable
+
+from .utils import RateLimiter
+
+
+class _Ticket:
+    """Ожидающий запрос"""
+    
+    __slots__ = ('lane', 'recipient', 'enqueued', 'event')
+    
+    def __init__(self, lane: '_Lane', recipient: Optional[Hashable] = None):
+        self.lane = lane
+        self.recipient = recipient
+        self.enqueued = time.monotonic()
+        self.event = threading.Event()
+
+
+class _Lane:
+    """
+    Очередь и метрики одной полосы.
+    
+    Ожидающие запросы разложены по получателям; получатели обслуживаются
+    по кругу, по одному запросу за ход, поэтому один «горячий» чат
+    не задерживает сообщения остальным получателям полосы.
+    """
+    
+    __slots__ = ('name', 'weight', 'flows', 'size', 'vtime', 'granted', 'starved', 'total_wait', 'max_wait')
+    
+    def __init__(self, name: str, weight: float):
+        self.name = name
+        self.weight = weight
+        # Получатель -> очередь его запросов, в порядке обхода по кругу
+        self.flows: 'OrderedDict[Optional[Hashable], Deque[_Ticket]]' = OrderedDict()
+        self.size = 0
+        self.vtime = 0.0
+        self.granted = 0
+        self.starved = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+    
+    def push(self, ticket: _Ticket) -> None:
+        """Постановка запроса в очередь его получателя"""
+        flow = self.flows.get(ticket.recipient)
+        if flow is None:
+            flow = self.flows[ticket.recipient] = deque()
+        flow.append(ticket)
+        self.size += 1
+    
+    def head(self) -> _Ticket:
+        """Запрос, который полоса обслужит следующим"""
+        return next(iter(self.flows.values()))[0]
+    
+    def pop(self) -> _Ticket:
+        """Следующий запрос; его получатель уходит в конец круга"""
+        recipient, flow = next(iter(self.flows.items()))
+        ticket = flow.popleft()
+        if flow:
+            self.flows.move_to_end(recipient)
+        else:
+            del self.flows[recipient]
+        self.size -= 1
+        return ticket
+    
+    def remove(self, ticket: _Ticket) -> None:
+        """Удаление запроса из очереди (прерванное ожидание)"""
+        flow = self.flows[ticket.recipient]
+        flow.remove(ticket)
+        if not flow:
+            del self.flows[ticket.recipient]
+        self.size -= 1
+    
+    def clear(self) -> None:
+        """Очистка очереди"""
+        self.flows.clear()
+        self.size = 0
+
+
+class PriorityScheduler:
+    """
+    Выдача разрешений лимитера по приоритетным полосам.
+    
+    RateLimiter выдаёт разрешения в порядке обращения, и рассылка из десятков
+    тысяч сообщений задерживает ответы пользователям на минуты. Планировщик
+    стоит перед лимитером: ожидающие запросы разложены по полосам, и следующее
+    разрешение получает запрос, выбранный взвешенным справедливым планированием
+    (stride scheduling). При занятости всех полос полоса с весом w получает
+    долю w / сумма весов разрешений; свободная доля незанятых полос достаётся
+    остальным.
+    
+    Внутри полосы запросы разных получателей (chat_id / user_id) чередуются
+    по кругу: сотня сообщений в один чат не задерживает сообщение другому.
+    
+    Защита от голодания: если первый запрос полосы ждёт дольше
+    starvation_timeout, он обслуживается вне очереди.
+    
+    Разрешение у лимитера в каждый момент ожидает только один выбранный
+    запрос, поэтому новый запрос приоритетной полосы ждёт не больше одного
+    интервала между разрешениями.
+    
+    Example:
+        >>> client = MAXClient(token="...")
+        >>> client.send_message(chat_id, "Ответ")                    # interactive
+        >>> client.send_message(chat_id, "Новости", lane='bulk')     # рассылка
+        >>> client.scheduler.get_stats()['bulk']['depth']
+    """
+    
+    # Полосы по умолчанию и их веса
+    DEFAULT_LANES = {
+        'interactive': 8.0,
+        'callback': 4.0,
+        'bulk': 1.0,
+    }
+    
+    def __init__(
+        self,
+        limiter: RateLimiter,
+        lanes: Optional[Dict[str, float]] = None,
+        default_lane: Optional[str] = None,
+        starvation_timeout: Optional[float] = 5.0
+    ):
+        """
+        Args:
+            limiter: Лимитер, разрешения которого распределяются
+            lanes: Полосы и их веса (по умолчанию DEFAULT_LANES)
+            default_lane: Полоса для запросов без lane (по умолчанию первая)
+            starvation_timeout: Ожидание, после которого запрос обслуживается
+                                вне очереди (None - без защиты от голодания)
+        """
+        lanes = lanes or self.DEFAULT_LANES
+        if any(weight <= 0 for weight in lanes.values()):
+            raise ValueError("Веса полос должны быть положительными")
+        
+        self.limiter = limiter
+        self.starvation_timeout = starvation_timeout
+        self._lanes = {name: _Lane(name, float(weight)) for name, weight in lanes.items()}
+        self.default_lane = default_lane or next(iter(self._lanes))
+        if self.default_lane not in self._lanes:
+            raise ValueError(f"Неизвестная полоса по умолчанию: {self.default_lane}")
+        
+        self._lock = threading.Lock()
+        self._busy = False
+        self._waiting = 0
+        self._vtime = 0.0
+    
+    @property
+    def lanes(self) -> Dict[str, float]:
+        """Полосы и их веса"""
+        return {name: lane.weight for name, lane in self._lanes.items()}
+    
+    def _lane(self, name: Optional[str]) -> _Lane:
+        lane = self._lanes.get(name or self.default_lane)
+        if lane is None:
+            raise ValueError(f"Неизвестная полоса: {name}. Доступны: {', '.join(self._lanes)}")
+        return lane
+    
+    def acquire(self, lane: Optional[str] = None, recipient: Optional[Hashable] = None) -> None:
+        """
+        Ожидание разрешения лимитера в очереди полосы
+        
+        Args:
+            lane: Название полосы (None - полоса по умолчанию)
+            recipient: Получатель запроса для чередования внутри полосы
+                       (None - общая очередь запросов без получателя)
+        
+        Raises:
+            ValueError: Неизвестная полоса
+        """
+        ticket = _Ticket(self._lane(lane), recipient)
+        
+        with self._lock:
+            if not self._busy and not self._waiting:
+                # Очереди пусты - разрешение запрашивается сразу
+                self._busy = True
+                self._grant(ticket, starved=False)
+            else:
+                if not ticket.lane.size:
+                    # Полоса, простаивавшая в очереди, не копит «кредит» за простой
+                    ticket.lane.vtime = max(ticket.lane.vtime, self._vtime)
+                ticket.lane.push(ticket)
+                self._waiting += 1
+        
+        try:
+            ticket.event.wait()
+        except BaseException:
+            # Прерванное ожидание (KeyboardInterrupt): убираем запрос из очереди
+            # или, если очередь уже передана ему, передаём её дальше
+            with self._lock:
+                granted = ticket.event.is_set()
+                if not granted:
+                    ticket.lane.remove(ticket)
+                    self._waiting -= 1
+            if granted:
+                self._release()
+            raise
+        
+        try:
+            self.limiter.acquire()
+        finally:
+            self._release()
+    
+    def try_acquire(self, lane: Optional[str] = None, recipient: Optional[Hashable] = None) -> bool:
+        """
+        Разрешение без ожидания
+        
+        Выдаётся, только если ни один запрос не ждёт в очередях полос и у
+        лимитера есть свободный токен: необязательный запрос (копия при
+        хеджировании) не обгоняет ожидающих.
+        
+        Args:
+            lane: Название полосы (None - полоса по умолчанию)
+            recipient: Получатель запроса
+        
+        Returns:
+            bool: True, если разрешение получено
+        
+        Raises:
+            ValueError: Неизвестная полоса
+        """
+        ticket = _Ticket(self._lane(lane), recipient)
+        
+        with self._lock:
+            if self._busy or self._waiting:
+                return False
+            self._busy = True
+        
+        try:
+            if not self.limiter.try_acquire():
+                return False
+            with self._lock:
+                self._grant(ticket, starved=False)
+            return True
+        finally:
+            self._release()
+    
+    def _grant(self, ticket: _Ticket, starved: bool) -> None:
+        """Учёт выданной очереди (вызывается под блокировкой)"""
+        lane = ticket.lane
+        waited = time.monotonic() - ticket.enqueued
+        lane.granted += 1
+        lane.total_wait += waited
+        if waited > lane.max_wait:
+            lane.max_wait = waited
+        if starved:
+            lane.starved += 1
+        
+        self._vtime = lane.vtime
+        lane.vtime += 1.0 / lane.weight
+        ticket.event.set()
+    
+    def _release(self) -> None:
+        """Передача очереди следующему выбранному запросу"""
+        with self._lock:
+            if not self._waiting:
+                self._busy = False
+                return
+            
+            lane, starved = self._select()
+            ticket = lane.pop()
+            self._waiting -= 1
+            # _busy остаётся True: очередь передаётся выбранному запросу
+            self._grant(ticket, starved)
+    
+    def _select(self):
+        """Выбор полосы для следующего разрешения (вызывается под блокировкой)"""
+        if self.starvation_timeout is not None:
+            now = time.monotonic()
+            oldest = None
+            for lane in self._lanes.values():
+                if lane.size and now - lane.head().enqueued >= self.starvation_timeout:
+                    if oldest is None or lane.head().enqueued < oldest.head().enqueued:
+                        oldest = lane
+            if oldest is not None:
+                return oldest, True
+        
+        best = None
+        for lane in self._lanes.values():
+            if lane.size and (best is None or lane.vtime < best.vtime):
+                best = lane
+        return best, False
+    
+    def depth(self, lane: Optional[str] = None) -> int:
+        """
+        Количество ожидающих запросов
+        
+        Args:
+            lane: Полоса (None - все полосы)
+        """
+        if lane is None:
+            return self._waiting
+        return self._lane(lane).size
+    
+    def _after_fork(self) -> None:
+        """
+        Восстановление в дочернем процессе после os.fork()
+        
+        Ожидавшие потоки родителя в дочернем процессе не существуют.
+        """
+        self._lock = threading.Lock()
+        self._busy = False
+        self._waiting = 0
+        for lane in self._lanes.values():
+            lane.clear()
+    
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Метрики полос
+        
+        Returns:
+            dict: {'bulk': {'weight': 1.0, 'depth': 120, 'granted': 3000,
+                   'avg_wait': 2.4, 'max_wait': 5.0, 'starved': 12}, ...}
+                  depth - ожидают сейчас, granted - получили разрешение,
+                  avg_wait / max_wait - ожидание в очереди полосы (секунды),
+                  starved - обслужены вне очереди из-за долгого ожидания
+        """
+        with self._lock:
+            return {
+                name: {
+                    'weight': lane.weight,
+                    'depth': lane.size,
+                    'granted': lane.granted,
+                    'avg_wait': lane.total_wait / lane.granted if lane.granted else 0.0,
+                    'max_wait': lane.max_wait,
+                    'starved': lane.starved,
+                }
+                for name, lane in self._lanes.items()
+            }
@@ -0,0 +1,338 @@
+"""
+Общий для нескольких процессов (и хостов) лимит запросов
+
+Лимит MAX API задан на токен бота, а не на процесс: восемь воркеров
+gunicorn с отдельными RateLimiter суммарно превышают его в восемь раз.
+SharedRateLimiter хранит состояние лимита во внешнем хранилище:
+
+- FileRateLimitStore - файл в памяти (mmap) с блокировкой flock, общий
+  для всех процессов одного хоста
+- KeyValueRateLimitStore - сетевое хранилище (Redis, etcd, memcached)
+  через адаптер KeyValueBackend с операцией compare-and-set
+
+Лимит считается алгоритмом GCRA: состояние - одно число, теоретическое
+время прибытия следующего запроса (TAT), поэтому обновление атомарно
+и одинаково выражается в любом хранилище.
+"""
+
+import os
+import mmap
+import time
+import struct
+import hashlib
+import tempfile
+import threading
+from typing import Optional, Dict, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+from .utils import RateLimiter
+
+_TAT = struct.Struct('d')
+
+
+def _gcra(
+    tat: Optional[float],
+    now: float,
+    interval: float,
+    tolerance: float,
+    block: bool
+) -> Tuple[Optional[float], Optional[float]]:
+    """
+    Шаг GCRA
+    
+    Args:
+        tat: Сохранённое теоретическое время прибытия (None - нет состояния)
+        now: Текущее время
+        interval: Интервал между запросами (time_window / max_requests)
+        tolerance: Допустимое опережение TAT (размер всплеска)
+        block: Резервировать запрос, даже если придётся ждать
+    
+    Returns:
+        (новый TAT, ожидание в секундах) или (None, None), если block=False
+        и запрос сейчас не разрешён
+    """
+    tat = max(tat or 0.0, now)
+    wait = tat - tolerance - now
+    if wait > 0 and not block:
+        return None, None
+    return tat + interval, max(wait, 0.0)
+
+
+class RateLimitStore:
+    """
+    Базовый класс хранилища состояния лимита.
+    
+    Реализация должна выполнять шаг GCRA атомарно относительно всех
+    процессов, использующих то же хранилище и тот же ключ.
+    """
+    
+    def reserve(self, key: str, interval: float, tolerance: float, block: bool = True) -> Optional[float]:
+        """
+        Резервирование запроса
+        
+        Args:
+            key: Ключ лимита (один на токен бота)
+            interval: Интервал между запросами в секундах
+            tolerance: Допустимый всплеск в секундах ((max_requests - 1) * interval)
+            block: Резервировать, даже если придётся ждать
+        
+        Returns:
+            Время ожидания перед запросом в секундах или None,
+            если block=False и запрос сейчас не разрешён
+        """
+        raise NotImplementedError
+    
+    def close(self) -> None:
+        """Освобождение ресурсов хранилища"""
+
+
+class FileRateLimitStore(RateLimitStore):
+    """
+    Лимит, общий для всех процессов хоста.
+    
+    Для каждого ключа создаётся файл из 8 байт (TAT), отображённый в память.
+    Чтение и запись TAT выполняются под flock, поэтому обновление атомарно
+    между процессами; потоки одного процесса дополнительно сериализуются
+    блокировкой. Имя файла - хэш ключа, токен бота на диск не попадает.
+    
+    После os.fork() дочерний процесс открывает файлы заново: flock,
+    унаследованный через общий дескриптор, не разделял бы родителя и потомка.
+    
+    Время - time.time(), поэтому часы процессов совпадают.
+    """
+    
+    def __init__(self, directory: Optional[str] = None):
+        """
+        Args:
+            directory: Каталог файлов лимита (по умолчанию <tmp>/max_api_ratelimit)
+        
+        Raises:
+            ImportError: Платформа без fcntl (Windows)
+        """
+        if fcntl is None:
+            raise ImportError("FileRateLimitStore требует модуль fcntl (Linux, macOS)")
+        
+        self.directory = directory or os.path.join(tempfile.gettempdir(), 'max_api_ratelimit')
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._files: Dict[str, Tuple[int, mmap.mmap]] = {}
+        self._pid = os.getpid()
+    
+    def _path(self, key: str) -> str:
+        """Путь к файлу ключа"""
+        name = hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]
+        return os.path.join(self.directory, name)
+    
+    def _open(self, key: str) -> Tuple[int, mmap.mmap]:
+        """Открытие (или создание) файла ключа"""
+        fd = os.open(self._path(key), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if os.fstat(fd).st_size < _TAT.size:
+                # Нули - TAT 0.0, то есть «состояния нет»; повторное расширение безопасно
+                os.ftruncate(fd, _TAT.size)
+            mapping = mmap.mmap(fd, _TAT.size)
+        except BaseException:
+            os.close(fd)
+            raise
+        self._files[key] = (fd, mapping)
+        return fd, mapping
+    
+    def _check_fork(self) -> None:
+        """Переоткрытие файлов в дочернем процессе"""
+        if self._pid != os.getpid():
+            self._lock = threading.Lock()
+            files, self._files = self._files, {}
+            self._pid = os.getpid()
+            for fd, mapping in files.values():
+                mapping.close()
+                os.close(fd)
+    
+    def reserve(self, key, interval, tolerance, block=True) -> Optional[float]:
+        self._check_fork()
+        with self._lock:
+            fd, mapping = self._files.get(key) or self._open(key)
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                tat, = _TAT.unpack_from(mapping, 0)
+                new_tat, wait = _gcra(tat, time.time(), interval, tolerance, block)
+                if new_tat is not None:
+                    _TAT.pack_into(mapping, 0, new_tat)
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        return wait
+    
+    def close(self) -> None:
+        with self._lock:
+            for fd, mapping in self._files.values():
+                mapping.close()
+                os.close(fd)
+            self._files.clear()
+
+
+class KeyValueBackend:
+    """
+    Адаптер сетевого хранилища для KeyValueRateLimitStore.
+    
+    Достаточно двух операций, которые есть у Redis (WATCH/MULTI или Lua),
+    etcd (транзакции), memcached (gets/cas) и большинства баз данных.
+    """
+    
+    def get(self, key: str) -> Optional[float]:
+        """
+        Чтение значения
+        
+        Returns:
+            Значение или None, если ключа нет
+        """
+        raise NotImplementedError
+    
+    def compare_and_set(self, key: str, expected: Optional[float], value: float, ttl: float) -> bool:
+        """
+        Запись value, только если текущее значение равно expected
+        
+        Args:
+            key: Ключ
+            expected: Ожидаемое значение (None - ключа нет)
+            value: Новое значение
+            ttl: Через сколько секунд ключ можно удалить (состояние устарело)
+        
+        Returns:
+            bool: True, если значение записано
+        """
+        raise NotImplementedError
+
+
+class MemoryKeyValueBackend(KeyValueBackend):
+    """
+    Хранилище в памяти процесса - локальная замена сетевого хранилища
+    для тестов и разработки
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data: Dict[str, Tuple[float, float]] = {}
+    
+    def get(self, key: str) -> Optional[float]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[1] < time.time():
+                return None
+            return item[0]
+    
+    def compare_and_set(self, key: str, expected: Optional[float], value: float, ttl: float) -> bool:
+        with self._lock:
+            item = self._data.get(key)
+            current = item[0] if item is not None and item[1] >= time.time() else None
+            if current != expected:
+                return False
+            self._data[key] = (value, time.time() + ttl)
+            return True
+
+
+class KeyValueRateLimitStore(RateLimitStore):
+    """
+    Лимит, общий для нескольких хостов, через сетевое хранилище.
+    
+    Шаг GCRA выполняется оптимистично: чтение TAT, расчёт и запись через
+    compare-and-set; при конфликте с другим процессом шаг повторяется.
+    Время - time.time(), часы хостов должны быть синхронизированы (NTP).
+    
+    Example:
+        >>> store = KeyValueRateLimitStore(MyRedisBackend(redis_client))
+        >>> client = MAXClient(token="...", rate_limit_store=store)
+    """
+    
+    def __init__(self, backend: KeyValueBackend, max_attempts: int = 100):
+        """
+        Args:
+            backend: Адаптер хранилища
+            max_attempts: Максимум попыток compare-and-set при конфликтах
+        """
+        self.backend = backend
+        self.max_attempts = max_attempts
+        self.conflicts = 0
+    
+    def reserve(self, key, interval, tolerance, block=True) -> Optional[float]:
+        for _ in range(self.max_attempts):
+            tat = self.backend.get(key)
+            now = time.time()
+            new_tat, wait = _gcra(tat, now, interval, tolerance, block)
+            if new_tat is None:
+                return None
+            # После new_tat состояние не влияет на лимит и может истечь
+            if self.backend.compare_and_set(key, tat, new_tat, ttl=new_tat - now + interval):
+                return wait
+            self.conflicts += 1
+        
+        raise RuntimeError(f"Не удалось обновить лимит {key}: {self.max_attempts} конфликтов подряд")
+
+
+class SharedRateLimiter(RateLimiter):
+    """
+    RateLimiter с состоянием во внешнем хранилище.
+    
+    Все лимитеры с одним хранилищем и ключом делят один лимит
+    max_requests / time_window, в каких бы процессах они ни работали.
+    Всплеск - до max_requests запросов, как у RateLimiter.
+    
+    Example:
+        >>> limiter = SharedRateLimiter(30, 1.0, store=FileRateLimitStore(), key="bot-1")
+        >>> limiter.acquire()
+    """
+    
+    def __init__(
+        self,
+        max_requests: int = 30,
+        time_window: float = 1.0,
+        store: Optional[RateLimitStore] = None,
+        key: str = 'default'
+    ):
+        """
+        Args:
+            max_requests: Максимальное количество запросов
+            time_window: Временное окно в секундах
+            store: Хранилище состояния (по умолчанию FileRateLimitStore)
+            key: Ключ лимита; лимитеры с одинаковым ключом делят лимит
+        """
+        super().__init__(max_requests, time_window)
+        self.store = store if store is not None else FileRateLimitStore()
+        self.key = key
+        self._interval = time_window / max_requests
+        self._tolerance = time_window - self._interval
+    
+    def _reserve(self) -> float:
+        wait = self.store.reserve(self.key, self._interval, self._tolerance)
+        
+        with self._lock:
+            self._acquired += 1
+            if wait > 0:
+                self._delayed += 1
+                self._total_wait += wait
+                if wait > self._max_wait:
+                    self._max_wait = wait
+        
+        return wait
+    
+    def try_acquire(self) -> bool:
+        if self.store.reserve(self.key, self._interval, self._tolerance, block=False) is None:
+            return False
+        with self._lock:
+            self._acquired += 1
+        return True
+
+
+def token_key(token: str) -> str:
+    """
+    Ключ лимита для токена бота (хэш, сам токен в хранилище не попадает)
+    
+    Args:
+        token: Токен бота
+    
+    Returns:
+        str: Ключ вида 'max-api:<hash>'
+    """
+    return 'max-api:' + hashlib.sha256(token.encode('utf-8')).hexdigest()[:24]
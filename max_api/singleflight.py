@@ -0,0 +1,207 @@
+"""
+Объединение одинаковых одновременных запросов (single-flight)
+"""
+
+import copy
+import threading
+from typing import Callable, Dict, Any, Hashable, Awaitable, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import asyncio
+
+
+class _Call:
+    """Выполняющийся запрос и его результат"""
+    
+    __slots__ = ('event', 'result', 'error')
+    
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Объединение одинаковых одновременных вызовов (потокобезопасно).
+    
+    Первый вызов с данным ключом выполняет функцию, остальные вызовы с тем же
+    ключом, пришедшие до её завершения, ждут и получают тот же результат
+    (копию) или то же исключение. Результат не запоминается: следующий
+    вызов после завершения снова выполнит функцию.
+    
+    Example:
+        >>> flight = SingleFlight()
+        >>> flight.do(('GET', '/messages/mid.1'), lambda: client._send_request(...))
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.executed = 0
+        self.shared = 0
+    
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """
+        Выполнить func() или присоединиться к уже выполняющемуся вызову
+        
+        Args:
+            key: Ключ вызова
+            func: Функция без аргументов
+        
+        Returns:
+            Результат func()
+        
+        Raises:
+            Исключение, выброшенное func()
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                leader = True
+                self.executed += 1
+            else:
+                leader = False
+                self.shared += 1
+        
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            # Копия, чтобы вызывающие не делили один изменяемый объект
+            return copy.deepcopy(call.result)
+        
+        try:
+            call.result = func()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                # Запись могла быть удалена forget_where и заменена новым вызовом
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            call.event.set()
+    
+    def forget_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """
+        Отсоединение выполняющихся вызовов, ключ которых удовлетворяет условию
+        
+        Уже ожидающие получат результат этих вызовов, а новые вызовы с тем же
+        ключом выполнят функцию заново. Используется после изменяющего запроса:
+        чтение, начатое до изменения, не должно отдаваться пришедшим после него.
+        
+        Args:
+            predicate: Функция predicate(key) -> bool
+        
+        Returns:
+            int: Количество отсоединённых вызовов
+        """
+        with self._lock:
+            keys = [key for key in self._calls if predicate(key)]
+            for key in keys:
+                del self._calls[key]
+            return len(keys)
+    
+    @property
+    def in_flight(self) -> int:
+        """Количество выполняющихся вызовов"""
+        return len(self._calls)
+    
+    def _after_fork(self) -> None:
+        """
+        Восстановление в дочернем процессе после os.fork()
+        
+        Вызовы, выполнявшиеся другими потоками родителя, в дочернем процессе
+        никогда не завершатся: ожидание их результата заблокировало бы поток.
+        """
+        self._lock = threading.Lock()
+        self._calls = {}
+    
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Статистика
+        
+        Returns:
+            dict: executed - выполнено вызовов, shared - вызовов, получивших
+                  чужой результат, in_flight - выполняется сейчас
+        """
+        return {
+            'executed': self.executed,
+            'shared': self.shared,
+            'in_flight': self.in_flight,
+        }
+
+
+class AsyncSingleFlight(SingleFlight):
+    """
+    Асинхронная версия SingleFlight для одного event loop.
+    
+    Вызов выполняется в отдельной задаче, поэтому отмена одного из ожидающих
+    не отменяет запрос для остальных.
+    """
+    
+    def __init__(self):
+        super().__init__()
+        self._tasks: Dict[Hashable, 'asyncio.Task'] = {}
+    
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Выполнить await func() или присоединиться к уже выполняющемуся вызову
+        
+        Args:
+            key: Ключ вызова
+            func: Функция без аргументов, возвращающая корутину
+        
+        Returns:
+            Результат func()
+        
+        Raises:
+            Исключение, выброшенное func()
+        """
+        # asyncio уже загружен работающим event loop; импорт здесь не замедляет
+        # import max_api.client для синхронных процессов
+        import asyncio
+        
+        task = self._tasks.get(key)
+        if task is not None:
+            self.shared += 1
+            result = await asyncio.shield(task)
+            return copy.deepcopy(result)
+        
+        self.executed += 1
+        task = asyncio.ensure_future(func())
+        self._tasks[key] = task
+        task.add_done_callback(lambda t: self._forget(key, t))
+        return await asyncio.shield(task)
+    
+    def forget_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """
+        Отсоединение выполняющихся вызовов, ключ которых удовлетворяет условию
+        
+        Args:
+            predicate: Функция predicate(key) -> bool
+        
+        Returns:
+            int: Количество отсоединённых вызовов
+        """
+        keys = [key for key in self._tasks if predicate(key)]
+        for key in keys:
+            del self._tasks[key]
+        return len(keys)
+    
+    def _forget(self, key: Hashable, task: 'asyncio.Task') -> None:
+        """Удаление завершённой задачи"""
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        # Исключение получено ожидающими; помечаем его как обработанное,
+        # даже если все ожидающие были отменены
+        if not task.cancelled():
+            task.exception()
+    
+    @property
+    def in_flight(self) -> int:
+        """Количество выполняющихся вызовов"""
+        return len(self._tasks)
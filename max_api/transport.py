@@ -0,0 +1,858 @@
+"""
+Транспортный слой MAXClient: выполнение HTTP запросов
+
+Клиент формирует URL, тело и таймауты, а транспорт только отправляет
+запрос и возвращает TransportResponse. Ошибки библиотек HTTP приводятся
+к исключениям этого модуля, чтобы клиент обрабатывал их одинаково.
+
+Доступные транспорты:
+- RequestsTransport - requests.Session (по умолчанию)
+- Urllib3Transport - urllib3.PoolManager без накладных расходов requests
+  (хуки, cookie, слияние заголовков)
+- HTTPXTransport - httpx с HTTP/2: все запросы идут потоками одного
+  соединения (нужен pip install httpx[http2])
+- InMemoryTransport - ответы без сети, для тестов и бенчмарков
+
+Транспорты на пуле соединений urllib3 (requests, urllib3) умеют заранее
+открывать соединения (warm_up) и переоткрывать соединения, простоявшие
+в пуле дольше idle_timeout, до того как их закроет сервер.
+"""
+
+import json as jsonlib
+import time
+import logging
+import threading
+from collections import namedtuple
+from collections.abc import MutableMapping
+from typing import Optional, Dict, Any, Callable, List, Tuple, Union, TYPE_CHECKING
+from urllib.parse import urlencode
+
+if TYPE_CHECKING:
+    import asyncio
+
+# HTTP библиотеки импортируются при создании первого транспорта на них
+# (_import_requests, _import_urllib3, _import_httpx), а не при импорте модуля
+requests = None
+urllib3 = None
+httpx = None
+
+logger = logging.getLogger(__name__)
+
+# Таймаут: общий или (connect, read)
+Timeout = Union[float, Tuple[float, float]]
+
+
+class TransportError(Exception):
+    """Ошибка выполнения запроса транспортом"""
+
+
+class TransportConnectionError(TransportError):
+    """Не удалось установить соединение или оно было разорвано"""
+
+
+class TransportTimeout(TransportError):
+    """Превышен таймаут"""
+
+
+class ConnectTimeout(TransportTimeout):
+    """Превышен таймаут установки соединения"""
+
+
+class ReadTimeout(TransportTimeout):
+    """Превышен таймаут ожидания ответа"""
+
+
+class CaseInsensitiveDict(MutableMapping):
+    """
+    Заголовки с поиском без учёта регистра (как requests.structures.CaseInsensitiveDict,
+    но без импорта requests)
+    """
+    
+    def __init__(self, data: Optional[Any] = None, **kwargs):
+        # нижний регистр ключа -> (исходный ключ, значение)
+        self._store: Dict[str, Tuple[str, Any]] = {}
+        self.update(data or {}, **kwargs)
+    
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._store[key.lower()] = (key, value)
+    
+    def __getitem__(self, key: str) -> Any:
+        return self._store[key.lower()][1]
+    
+    def __delitem__(self, key: str) -> None:
+        del self._store[key.lower()]
+    
+    def __iter__(self):
+        return (key for key, _ in self._store.values())
+    
+    def __len__(self) -> int:
+        return len(self._store)
+    
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
+
+
+class TransportResponse:
+    """Ответ сервера"""
+    
+    __slots__ = ('status_code', 'content', 'headers', 'reason')
+    
+    def __init__(
+        self,
+        status_code: int,
+        content: bytes = b'',
+        headers: Optional[Any] = None,
+        reason: str = ''
+    ):
+        """
+        Args:
+            status_code: HTTP код ответа
+            content: Тело ответа
+            headers: Заголовки (поиск без учёта регистра)
+            reason: Текстовое описание кода ответа
+        """
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers if headers is not None else CaseInsensitiveDict()
+        self.reason = reason
+    
+    @property
+    def text(self) -> str:
+        """Тело ответа как строка"""
+        return self.content.decode('utf-8', errors='replace')
+
+
+TransportRequest = namedtuple('TransportRequest', 'method url params data timeout')
+
+
+class Transport:
+    """
+    Базовый класс транспорта.
+    
+    Один экземпляр транспорта соответствует одному пулу соединений.
+    Методы должны быть потокобезопасными.
+    
+    Если multiplexed равен True, запросы не занимают соединение целиком
+    (HTTP/2), и клиент использует один транспорт и для обычных запросов,
+    и для Long Polling. Значение может стать True после первого ответа,
+    когда станет известен согласованный протокол.
+    """
+    
+    multiplexed = False
+    
+    def request(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        data: Optional[bytes] = None,
+        timeout: Optional[Timeout] = None
+    ) -> TransportResponse:
+        """
+        Выполнение запроса
+        
+        Args:
+            method: HTTP метод в верхнем регистре
+            url: Полный URL без query
+            params: Query параметры (None-значения пропускаются)
+            data: Тело запроса
+            timeout: Таймаут в секундах или (connect, read)
+        
+        Returns:
+            TransportResponse
+        
+        Raises:
+            TransportError: При ошибке соединения или таймауте
+        """
+        raise NotImplementedError
+    
+    def warm_up(self, url: str, connections: int = 1) -> int:
+        """
+        Предварительное открытие соединений с хостом url
+        
+        DNS, TCP и TLS выполняются заранее, и первые запросы после запуска
+        используют готовые соединения. Транспорт без пула соединений
+        ничего не делает.
+        
+        Args:
+            url: URL хоста (например, базовый URL API)
+            connections: Количество соединений
+        
+        Returns:
+            int: Количество открытых соединений
+        """
+        return 0
+    
+    def close(self) -> None:
+        """Закрытие соединений"""
+
+
+class _PoolStats:
+    """Счётчики пула соединений"""
+    
+    __slots__ = ('recycled',)
+    
+    def __init__(self):
+        self.recycled = 0
+
+
+def _recycling_pool_classes(idle_timeout: float, stats: _PoolStats) -> Dict[str, type]:
+    """
+    Классы пулов urllib3, закрывающие соединения, простоявшие без дела
+    дольше idle_timeout
+    
+    Сервер закрывает keep-alive соединение после своего таймаута простоя,
+    и запрос через такое соединение завершается ошибкой до переподключения.
+    Пул отмечает время возврата соединения и перед выдачей закрывает
+    устаревшее: запрос откроет новое соединение сразу, без неудачной попытки.
+    """
+    
+    class RecyclingPoolMixin:
+        def _get_conn(self, timeout=None):
+            conn = super()._get_conn(timeout=timeout)
+            released = getattr(conn, '_max_api_released', None)
+            if (
+                released is not None
+                and getattr(conn, 'sock', None) is not None
+                and time.monotonic() - released > idle_timeout
+            ):
+                conn.close()
+                stats.recycled += 1
+            return conn
+        
+        def _put_conn(self, conn):
+            if conn is not None:
+                conn._max_api_released = time.monotonic()
+            super()._put_conn(conn)
+    
+    return {
+        'http': type('RecyclingHTTPConnectionPool', (RecyclingPoolMixin, urllib3.HTTPConnectionPool), {}),
+        'https': type('RecyclingHTTPSConnectionPool', (RecyclingPoolMixin, urllib3.HTTPSConnectionPool), {}),
+    }
+
+
+def _import_requests():
+    """
+    Импорт requests (и urllib3) при создании первого RequestsTransport
+    
+    Raises:
+        ImportError: Пакет requests не установлен
+    """
+    global requests
+    if requests is None:
+        try:
+            import requests as module
+        except ImportError:
+            raise ImportError(
+                "Для транспорта 'requests' требуется пакет requests. "
+                "Установите его: pip install requests"
+            )
+        _import_urllib3()
+        requests = module
+    return requests
+
+
+def _import_urllib3():
+    """
+    Импорт urllib3 при создании первого транспорта на его пуле соединений
+    
+    Raises:
+        ImportError: Пакет urllib3 не установлен
+    """
+    global urllib3
+    if urllib3 is None:
+        try:
+            import urllib3 as module
+        except ImportError:
+            raise ImportError(
+                "Для транспорта 'urllib3' требуется пакет urllib3. "
+                "Установите его: pip install urllib3"
+            )
+        urllib3 = module
+    return urllib3
+
+
+def _warm_pool(pool, connections: int) -> int:
+    """
+    Открытие соединений в пуле urllib3
+    
+    Соединения забираются из пула, открываются параллельно и возвращаются
+    обратно. Уже открытые соединения не переоткрываются.
+    """
+    connections = min(connections, pool.pool.maxsize if pool.pool is not None else connections)
+    taken = []
+    opened = []
+    
+    def connect(conn):
+        try:
+            conn.connect()
+            opened.append(conn)
+        except Exception as e:
+            logger.warning(f"Не удалось открыть соединение с {pool.host}: {e}")
+    
+    try:
+        for _ in range(connections):
+            taken.append(pool._get_conn())
+        
+        threads = [
+            threading.Thread(target=connect, args=(conn,), daemon=True)
+            for conn in taken
+            if getattr(conn, 'sock', None) is None
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        for conn in taken:
+            pool._put_conn(conn)
+    
+    return len(opened)
+
+
+# Класс адаптера создаётся вместе с импортом requests (_pool_adapter)
+_PoolAdapter = None
+
+
+def _pool_adapter(pool_classes: Optional[Dict[str, type]] = None, **kwargs):
+    """HTTPAdapter с заданными классами пулов urllib3"""
+    global _PoolAdapter
+    if _PoolAdapter is None:
+        from requests.adapters import HTTPAdapter
+        
+        class PoolAdapter(HTTPAdapter):
+            def __init__(self, pool_classes=None, **kwargs):
+                self._pool_classes = pool_classes
+                super().__init__(**kwargs)
+            
+            def init_poolmanager(self, *args, **kwargs):
+                super().init_poolmanager(*args, **kwargs)
+                if self._pool_classes:
+                    self.poolmanager.pool_classes_by_scheme = self._pool_classes
+        
+        _PoolAdapter = PoolAdapter
+    return _PoolAdapter(pool_classes=pool_classes, **kwargs)
+
+
+class RequestsTransport(Transport):
+    """
+    Транспорт на requests.Session.
+    
+    requests.Session не гарантирует потокобезопасность (cookie jar, слияние
+    настроек), поэтому каждый поток получает свою сессию. Все сессии
+    используют один HTTPAdapter, то есть общий потокобезопасный пул
+    соединений urllib3.
+    """
+    
+    def __init__(
+        self,
+        headers: Optional[Dict[str, str]] = None,
+        pool_maxsize: int = 10,
+        idle_timeout: Optional[float] = None,
+        pool_connections: int = 10
+    ):
+        """
+        Args:
+            headers: Заголовки каждого запроса
+            pool_maxsize: Максимум сохраняемых соединений к одному хосту
+            idle_timeout: Закрывать соединения, простоявшие в пуле дольше
+                          idle_timeout секунд (None - не закрывать)
+            pool_connections: Количество хостов, для которых хранятся пулы
+        """
+        _import_requests()
+        self.pool_maxsize = pool_maxsize
+        self.idle_timeout = idle_timeout
+        self._headers = dict(headers or {})
+        self._stats = _PoolStats()
+        self._local = threading.local()
+        self.adapter = _pool_adapter(
+            pool_classes=_recycling_pool_classes(idle_timeout, self._stats) if idle_timeout else None,
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize
+        )
+    
+    @property
+    def session(self) -> 'requests.Session':
+        """Сессия текущего потока (создаётся при первом обращении)"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(self._headers)
+            session.mount('https://', self.adapter)
+            session.mount('http://', self.adapter)
+            self._local.session = session
+        return session
+    
+    @property
+    def recycled(self) -> int:
+        """Количество соединений, закрытых из-за простоя"""
+        return self._stats.recycled
+    
+    def request(self, method, url, params=None, data=None, timeout=None) -> TransportResponse:
+        try:
+            response = self.session.request(
+                method=method,
+                url=url,
+                params=params,
+                data=data,
+                timeout=timeout
+            )
+        except requests.exceptions.ConnectTimeout as e:
+            raise ConnectTimeout(str(e))
+        except requests.exceptions.Timeout as e:
+            raise ReadTimeout(str(e))
+        except requests.exceptions.ConnectionError as e:
+            raise TransportConnectionError(str(e))
+        except requests.exceptions.RequestException as e:
+            raise TransportError(str(e))
+        
+        return TransportResponse(response.status_code, response.content, response.headers, response.reason)
+    
+    def warm_up(self, url: str, connections: int = 1) -> int:
+        adapter = self.session.get_adapter(url)
+        prepared = requests.Request('GET', url).prepare()
+        # Параметры TLS и прокси с учётом окружения (REQUESTS_CA_BUNDLE и т.п.),
+        # как при запросе: от них зависит ключ пула urllib3
+        settings = self.session.merge_environment_settings(url, {}, None, None, None)
+        try:
+            if hasattr(adapter, 'get_connection_with_tls_context'):
+                pool = adapter.get_connection_with_tls_context(
+                    prepared,
+                    verify=settings['verify'],
+                    proxies=settings['proxies'],
+                    cert=settings['cert']
+                )
+            else:  # pragma: no cover - requests < 2.32
+                pool = adapter.get_connection(url)
+        except Exception as e:
+            logger.warning(f"Не удалось подготовить пул соединений для {url}: {e}")
+            return 0
+        return _warm_pool(pool, connections)
+    
+    def close(self) -> None:
+        # Сессии других потоков держат только cookie и настройки; соединения - в адаптере
+        self.adapter.close()
+
+
+class Urllib3Transport(Transport):
+    """
+    Транспорт на urllib3.PoolManager.
+    
+    Обходит слой requests (хуки, cookie jar, слияние заголовков сессии
+    и запроса, подготовку PreparedRequest), поэтому расходует меньше
+    CPU на запрос при том же пуле соединений urllib3.
+    """
+    
+    def __init__(
+        self,
+        headers: Optional[Dict[str, str]] = None,
+        pool_maxsize: int = 10,
+        idle_timeout: Optional[float] = None
+    ):
+        """
+        Args:
+            headers: Заголовки каждого запроса
+            pool_maxsize: Максимум сохраняемых соединений к одному хосту
+            idle_timeout: Закрывать соединения, простоявшие в пуле дольше
+                          idle_timeout секунд (None - не закрывать)
+        """
+        _import_urllib3()
+        self.pool_maxsize = pool_maxsize
+        self.idle_timeout = idle_timeout
+        self._stats = _PoolStats()
+        self.pool = urllib3.PoolManager(headers=headers or {}, maxsize=pool_maxsize, retries=False)
+        if idle_timeout:
+            self.pool.pool_classes_by_scheme = _recycling_pool_classes(idle_timeout, self._stats)
+    
+    @property
+    def recycled(self) -> int:
+        """Количество соединений, закрытых из-за простоя"""
+        return self._stats.recycled
+    
+    def request(self, method, url, params=None, data=None, timeout=None) -> TransportResponse:
+        if params:
+            query = urlencode([(k, v) for k, v in params.items() if v is not None])
+            if query:
+                url = f"{url}?{query}"
+        
+        if isinstance(timeout, tuple):
+            timeout = urllib3.Timeout(connect=timeout[0], read=timeout[1])
+        elif timeout is not None:
+            # Как в requests: число - отдельные таймауты соединения и чтения
+            timeout = urllib3.Timeout(connect=timeout, read=timeout)
+        
+        try:
+            response = self.pool.request(
+                method,
+                url,
+                body=data,
+                timeout=timeout,
+                retries=False,
+                redirect=False
+            )
+        except urllib3.exceptions.NewConnectionError as e:
+            raise TransportConnectionError(str(e))
+        except urllib3.exceptions.ConnectTimeoutError as e:
+            raise ConnectTimeout(str(e))
+        except (urllib3.exceptions.ReadTimeoutError, urllib3.exceptions.TimeoutError) as e:
+            raise ReadTimeout(str(e))
+        except (urllib3.exceptions.ProtocolError, urllib3.exceptions.SSLError, urllib3.exceptions.ProxyError) as e:
+            raise TransportConnectionError(str(e))
+        except urllib3.exceptions.HTTPError as e:
+            raise TransportError(str(e))
+        
+        return TransportResponse(response.status, response.data, response.headers, response.reason or '')
+    
+    def warm_up(self, url: str, connections: int = 1) -> int:
+        return _warm_pool(self.pool.connection_from_url(url), connections)
+    
+    def close(self) -> None:
+        self.pool.clear()
+
+
+def _import_httpx():
+    """
+    Импорт httpx при первом использовании
+    
+    Raises:
+        ImportError: Пакет httpx не установлен
+    """
+    global httpx
+    if httpx is None:
+        try:
+            import httpx as module
+        except ImportError:
+            raise ImportError(
+                "Для HTTP/2 транспорта требуется пакет httpx. "
+                "Установите его: pip install max-api[http2]"
+            )
+        httpx = module
+    return httpx
+
+
+def _h2_available() -> bool:
+    """Установлен ли пакет h2, нужный httpx для HTTP/2"""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _filter_params(params: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Query параметры без None-значений (как в requests)"""
+    if not params:
+        return None
+    return {k: v for k, v in params.items() if v is not None}
+
+
+def _httpx_timeout(timeout: Optional[Timeout]):
+    """Таймаут в формате httpx"""
+    if isinstance(timeout, tuple):
+        return httpx.Timeout(timeout[1], connect=timeout[0])
+    return httpx.Timeout(timeout)
+
+
+def _httpx_error(error: Exception) -> TransportError:
+    """Приведение исключения httpx к исключению транспорта"""
+    if isinstance(error, httpx.ConnectTimeout):
+        return ConnectTimeout(str(error))
+    if isinstance(error, httpx.TimeoutException):
+        return ReadTimeout(str(error))
+    if isinstance(error, httpx.TransportError):
+        return TransportConnectionError(str(error))
+    return TransportError(str(error))
+
+
+class _HTTPXBase:
+    """Общая настройка синхронного и асинхронного транспортов httpx"""
+    
+    def _setup(
+        self,
+        http2: bool,
+        max_streams: int,
+        pool_maxsize: int,
+        idle_timeout: Optional[float]
+    ) -> None:
+        _import_httpx()
+        
+        if http2 and not _h2_available():
+            logger.warning("Пакет h2 не установлен - HTTPX транспорт использует HTTP/1.1")
+            http2 = False
+        
+        self.http2 = http2
+        self.max_streams = max_streams
+        self.http_version: Optional[str] = None
+        self._limits = httpx.Limits(
+            max_connections=pool_maxsize,
+            max_keepalive_connections=pool_maxsize,
+            keepalive_expiry=idle_timeout
+        )
+    
+    @property
+    def multiplexed(self) -> bool:
+        """
+        Запросы идут потоками одного соединения: только после того, как
+        сервер действительно согласовал HTTP/2 (для http:// URL и серверов
+        без HTTP/2 остаётся HTTP/1.1)
+        """
+        return self.http2 and self.http_version == 'HTTP/2'
+    
+    def _response(self, response) -> TransportResponse:
+        # Протокол, согласованный с сервером (HTTP/2 или откат на HTTP/1.1)
+        self.http_version = response.http_version
+        return TransportResponse(
+            response.status_code, response.content, response.headers, response.reason_phrase
+        )
+
+
+class HTTPXTransport(_HTTPXBase, Transport):
+    """
+    Транспорт на httpx с поддержкой HTTP/2.
+    
+    По HTTP/2 одновременные запросы (send_message, edit_message, Long Polling)
+    идут параллельными потоками одного TCP+TLS соединения. Количество
+    одновременных потоков ограничено max_streams.
+    
+    Если сервер не поддерживает HTTP/2 (ALPN не согласован, http:// URL)
+    или пакет h2 не установлен, используется HTTP/1.1 с пулом
+    из pool_maxsize соединений. Согласованный протокол - http_version.
+    """
+    
+    def __init__(
+        self,
+        headers: Optional[Dict[str, str]] = None,
+        http2: bool = True,
+        max_streams: int = 100,
+        pool_maxsize: int = 10,
+        idle_timeout: Optional[float] = None
+    ):
+        """
+        Args:
+            headers: Заголовки каждого запроса
+            http2: Использовать HTTP/2, если сервер его поддерживает
+            max_streams: Максимум одновременных запросов
+            pool_maxsize: Максимум соединений (для HTTP/1.1)
+            idle_timeout: Закрывать соединения, простоявшие дольше idle_timeout
+                          секунд (None - по умолчанию httpx, 5 секунд)
+        """
+        self._setup(http2, max_streams, pool_maxsize, idle_timeout or 5.0)
+        self._streams = threading.BoundedSemaphore(max_streams)
+        self.client = httpx.Client(headers=headers, http2=self.http2, limits=self._limits)
+    
+    def request(self, method, url, params=None, data=None, timeout=None) -> TransportResponse:
+        with self._streams:
+            try:
+                response = self.client.request(
+                    method,
+                    url,
+                    params=_filter_params(params),
+                    content=data,
+                    timeout=_httpx_timeout(timeout)
+                )
+            except httpx.HTTPError as e:
+                raise _httpx_error(e)
+        
+        return self._response(response)
+    
+    def warm_up(self, url: str, connections: int = 1) -> int:
+        # Публичного доступа к пулу httpx нет: соединение открывает запрос HEAD,
+        # код ответа не важен. По HTTP/2 достаточно одного соединения
+        if self.http2:
+            connections = 1
+        
+        def head():
+            try:
+                self.request('HEAD', url, timeout=10.0)
+                return True
+            except TransportError as e:
+                logger.warning(f"Не удалось открыть соединение с {url}: {e}")
+                return False
+        
+        threads = []
+        results: List[bool] = []
+        for _ in range(min(connections, self._limits.max_connections)):
+            thread = threading.Thread(target=lambda: results.append(head()), daemon=True)
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+        return sum(results)
+    
+    def close(self) -> None:
+        self.client.close()
+
+
+class AsyncHTTPXTransport(_HTTPXBase):
+    """
+    Асинхронный транспорт на httpx с поддержкой HTTP/2 для AsyncMAXClient.
+    
+    Поведение то же, что у HTTPXTransport; клиент httpx и ограничение
+    потоков создаются в event loop при первом запросе.
+    """
+    
+    def __init__(
+        self,
+        headers: Optional[Dict[str, str]] = None,
+        http2: bool = True,
+        max_streams: int = 100,
+        pool_maxsize: int = 100,
+        idle_timeout: Optional[float] = None
+    ):
+        """
+        Args:
+            headers: Заголовки каждого запроса
+            http2: Использовать HTTP/2, если сервер его поддерживает
+            max_streams: Максимум одновременных запросов
+            pool_maxsize: Максимум соединений (для HTTP/1.1)
+            idle_timeout: Закрывать соединения, простоявшие дольше idle_timeout
+                          секунд (None - по умолчанию httpx, 5 секунд)
+        """
+        self._setup(http2, max_streams, pool_maxsize, idle_timeout or 5.0)
+        self._headers = headers
+        self._streams: Optional['asyncio.Semaphore'] = None
+        self.client = None
+    
+    async def request(self, method, url, params=None, data=None, timeout=None) -> TransportResponse:
+        """Выполнение запроса (см. Transport.request)"""
+        if self.client is None:
+            # asyncio уже загружен работающим event loop
+            import asyncio
+            
+            self.client = httpx.AsyncClient(headers=self._headers, http2=self.http2, limits=self._limits)
+            self._streams = asyncio.Semaphore(self.max_streams)
+        
+        async with self._streams:
+            try:
+                response = await self.client.request(
+                    method,
+                    url,
+                    params=_filter_params(params),
+                    content=data,
+                    timeout=_httpx_timeout(timeout)
+                )
+            except httpx.HTTPError as e:
+                raise _httpx_error(e)
+        
+        return self._response(response)
+    
+    async def close(self) -> None:
+        """Закрытие соединений"""
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+
+class InMemoryTransport(Transport):
+    """
+    Транспорт без сети: ответы задаются заранее или функцией-обработчиком.
+    
+    Выполненные запросы сохраняются в calls (TransportRequest).
+    
+    Example:
+        >>> transport = InMemoryTransport()
+        >>> transport.add('GET', '/me', json={'user_id': 1, 'name': 'Bot'})
+        >>> client = MAXClient(token="test", transport=transport)
+        >>> client.get_me()
+        {'user_id': 1, 'name': 'Bot'}
+    """
+    
+    def __init__(
+        self,
+        handler: Optional[Callable[[TransportRequest], TransportResponse]] = None,
+        record: bool = True
+    ):
+        """
+        Args:
+            handler: Функция handler(request) -> TransportResponse для запросов
+                     без заданного через add() ответа
+            record: Сохранять запросы в calls
+        """
+        self.handler = handler
+        self.record = record
+        self.calls: List[TransportRequest] = []
+        self._routes: Dict[Tuple[str, str], TransportResponse] = {}
+        self._lock = threading.Lock()
+    
+    def add(
+        self,
+        method: str,
+        path: str,
+        status: int = 200,
+        json: Any = None,
+        body: bytes = b'',
+        headers: Optional[Dict[str, str]] = None
+    ) -> None:
+        """
+        Задать ответ на запрос
+        
+        Args:
+            method: HTTP метод
+            path: Путь запроса (например, '/me')
+            status: HTTP код ответа
+            json: Тело ответа как объект JSON
+            body: Тело ответа в байтах (если json не задан)
+            headers: Заголовки ответа
+        """
+        if json is not None:
+            body = jsonlib.dumps(json).encode('utf-8')
+        
+        self._routes[(method.upper(), '/' + path.strip('/'))] = TransportResponse(
+            status, body, CaseInsensitiveDict(headers or {})
+        )
+    
+    def request(self, method, url, params=None, data=None, timeout=None) -> TransportResponse:
+        request = TransportRequest(method, url, params, data, timeout)
+        if self.record:
+            with self._lock:
+                self.calls.append(request)
+        
+        path = '/' + url.split('://', 1)[-1].split('/', 1)[-1].split('?', 1)[0]
+        response = self._routes.get((method, path))
+        if response is not None:
+            return response
+        
+        if self.handler is not None:
+            return self.handler(request)
+        
+        return TransportResponse(404, b'{"message": "Not found"}', CaseInsensitiveDict(), 'Not Found')
+
+
+_TRANSPORTS = {
+    'requests': RequestsTransport,
+    'urllib3': Urllib3Transport,
+    'http2': HTTPXTransport,
+}
+
+
+def create_transport(
+    transport: Union[str, Transport, Callable[[Dict[str, str]], Transport]],
+    headers: Dict[str, str],
+    **options: Any
+) -> Transport:
+    """
+    Создание транспорта
+    
+    Args:
+        transport: Название ('requests', 'urllib3', 'http2'), готовый экземпляр
+                   или фабрика factory(headers) -> Transport
+        headers: Заголовки каждого запроса
+        **options: Параметры пула для транспорта, заданного названием
+                   (pool_maxsize, idle_timeout)
+    
+    Returns:
+        Transport
+    
+    Raises:
+        ValueError: Неизвестное название транспорта
+    """
+    if isinstance(transport, Transport):
+        return transport
+    
+    if isinstance(transport, str):
+        factory = _TRANSPORTS.get(transport)
+        if factory is None:
+            raise ValueError(f"Неизвестный транспорт: {transport}. Доступны: {', '.join(_TRANSPORTS)}")
+        return factory(headers, **options)
+    
+    return transport(headers)
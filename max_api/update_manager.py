@@ -6,6 +6,8 @@ from enum import Enum
 from typing import Optional, Callable, Dict, Any
 import logging
 
+from .checkpoint import CheckpointStore
+
 logger = logging.getLogger(__name__)
 
 
@@ -24,19 +26,42 @@ class UpdateManager:
     - Webhook: для production окружения
     
     Использовать одновременно Long Polling и Webhook нельзя.
+    
+    Маркер Long Polling можно сохранять в хранилище (checkpoint_store), чтобы
+    после перезапуска продолжить с того же места. Маркер пачки сохраняется
+    только после её обработки: явным вызовом commit(), при следующем вызове
+    get_updates() (auto_commit) или автоматически в handle_updates().
     """
     
-    def __init__(self, client, mode: UpdateMode = UpdateMode.LONG_POLLING):
+    def __init__(
+        self,
+        client,
+        mode: UpdateMode = UpdateMode.LONG_POLLING,
+        checkpoint_store: Optional[CheckpointStore] = None,
+        auto_commit: bool = True
+    ):
         """
         Args:
             client: Экземпляр MAXClient
             mode: Режим получения обновлений (по умолчанию Long Polling)
+            checkpoint_store: Хранилище маркера (None - маркер хранится только в памяти)
+            auto_commit: Сохранять маркер предыдущей пачки при следующем вызове get_updates()
         """
         self.client = client
         self._mode = mode
         self._webhook_url: Optional[str] = None
         self._webhook_subscription_id: Optional[int] = None
+        self._checkpoint_store = checkpoint_store
+        self._auto_commit = auto_commit
         self._last_marker: Optional[str] = None
+        self._pending_marker: Optional[str] = None
+        self._committed_marker: Optional[str] = None
+        
+        if checkpoint_store is not None:
+            self._committed_marker = checkpoint_store.load()
+            self._last_marker = self._committed_marker
+            if self._last_marker is not None:
+                logger.info(f"Маркер восстановлен из хранилища: {self._last_marker}")
     
     @property
     def mode(self) -> UpdateMode:
@@ -58,6 +83,16 @@ class UpdateManager:
         """URL webhook'а (если настроен)"""
         return self._webhook_url
     
+    @property
+    def last_marker(self) -> Optional[str]:
+        """Маркер для следующего запроса /updates"""
+        return self._last_marker
+    
+    @property
+    def committed_marker(self) -> Optional[str]:
+        """Последний сохранённый маркер (все обновления до него обработаны)"""
+        return self._committed_marker
+    
     def switch_to_long_polling(self) -> None:
         """
         Переключиться на режим Long Polling.
@@ -146,26 +181,143 @@ class UpdateManager:
         Note:
             Timeout - это нормальное поведение Long Polling.
             Если нет новых сообщений, запрос завершится по таймауту.
+            
+            При auto_commit=True вызов get_updates() означает, что предыдущая
+            пачка обработана, и её маркер сохраняется в checkpoint_store.
+        """
+        self._ensure_long_polling('get_updates')
+        
+        # Предыдущая пачка обработана - фиксируем её маркер
+        if self._auto_commit:
+            self.commit()
+        
+        return self.fetch_updates(timeout=timeout, marker=marker)
+    
+    def fetch_updates(
+        self,
+        timeout: int = 30,
+        marker: Optional[str] = None
+    ) -> list:
         """
+        Получить пачку обновлений без фиксации маркера предыдущей пачки.
+        
+        Маркер для следующего запроса сдвигается, но в checkpoint_store
+        сохраняется только через commit(). Используется фоновым Poller,
+        который запрашивает следующую пачку до окончания обработки текущей.
+        
+        Args:
+            timeout: Таймаут ожидания новых обновлений (секунды)
+            marker: Маркер последнего обработанного обновления
+        
+        Returns:
+            Список обновлений (UpdatesBatch с атрибутом marker)
+        
+        Raises:
+            RuntimeError: Если вызван в режиме Webhook
+            MAXAPIException: При ошибке API
+        """
+        self._ensure_long_polling('fetch_updates')
+        
+        # Используем сохранённый маркер, если не передан явно
+        if marker is None:
+            marker = self._last_marker
+        
+        updates = self.client.get_updates(timeout=timeout, marker=marker)
+        
+        # Маркер приходит на верхнем уровне ответа /updates
+        new_marker = getattr(updates, 'marker', None)
+        if new_marker is None:
+            for update in updates:
+                if 'marker' in update:
+                    new_marker = update['marker']
+        
+        if new_marker is not None:
+            self._last_marker = new_marker
+            self._pending_marker = new_marker
+        
+        return updates
+    
+    def _ensure_long_polling(self, method_name: str) -> None:
+        """Проверка, что менеджер работает в режиме Long Polling"""
         if self._mode != UpdateMode.LONG_POLLING:
             raise RuntimeError(
-                "get_updates() доступен только в режиме Long Polling. "
+                f"{method_name}() доступен только в режиме Long Polling. "
                 "Текущий режим: Webhook. Используйте switch_to_long_polling() "
                 "для переключения."
             )
+    
+    def commit(self, marker: Optional[str] = None) -> None:
+        """
+        Зафиксировать обработку пачки обновлений.
         
-        # Используем сохранённый маркер, если не передан явно
+        Сохраняет маркер в checkpoint_store. Вызывайте после того, как
+        обработчики закончили работу с пачкой, полученной из get_updates().
+        
+        Args:
+            marker: Маркер для сохранения (по умолчанию - маркер последней пачки)
+        """
         if marker is None:
-            marker = self._last_marker
+            marker = self._pending_marker
+        if marker is None or marker == self._committed_marker:
+            return
         
-        updates = self.client.get_updates(timeout=timeout, marker=marker)
+        if self._checkpoint_store is not None:
+            self._checkpoint_store.save(marker)
+        
+        self._committed_marker = marker
+        if marker == self._pending_marker:
+            self._pending_marker = None
+    
+    def handle_updates(
+        self,
+        handler: Callable[[Dict[str, Any]], Any],
+        timeout: int = 30
+    ) -> int:
+        """
+        Получить пачку обновлений, обработать и зафиксировать маркер.
         
-        # Обновляем маркер
-        for update in updates:
-            if 'marker' in update:
-                self._last_marker = update['marker']
+        Маркер сохраняется только если обработчик завершился без исключения
+        для всех обновлений пачки, иначе пачка будет получена повторно.
         
-        return updates
+        Args:
+            handler: Функция-обработчик одного обновления
+            timeout: Таймаут ожидания новых обновлений (секунды)
+        
+        Returns:
+            Количество обработанных обновлений
+        """
+        updates = self.get_updates(timeout=timeout)
+        return self.process_updates(updates, handler)
+    
+    def process_updates(
+        self,
+        updates: list,
+        handler: Callable[[Dict[str, Any]], Any]
+    ) -> int:
+        """
+        Обработать полученную пачку обновлений и зафиксировать маркер.
+        
+        При исключении обработчика маркер откатывается к последнему
+        сохранённому, и пачка будет получена повторно.
+        
+        Args:
+            updates: Пачка из get_updates()
+            handler: Функция-обработчик одного обновления
+        
+        Returns:
+            Количество обработанных обновлений
+        """
+        try:
+            for update in updates:
+                handler(update)
+        except Exception:
+            # Возвращаемся к последнему сохранённому маркеру
+            self._last_marker = self._committed_marker
+            self._pending_marker = None
+            raise
+        
+        self.commit()
+        return len(updates)
     
     def get_webhook_info(self) -> Optional[Dict[str, Any]]:
         """
@@ -214,6 +366,7 @@ class UpdateManager:
             })
         else:
             status['last_marker'] = self._last_marker
+            status['committed_marker'] = self._committed_marker
         
         return status
     
@@ -3,12 +3,22 @@
 """
 
 import time
-from typing import Optional, Dict, Any
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Hashable, List
 from functools import wraps
 
 
 class RateLimiter:
-    """Ограничитель частоты запросов (Rate Limiter)"""
+    """
+    Ограничитель частоты запросов (Rate Limiter)
+    
+    Реализован как token bucket: ёмкость корзины равна max_requests,
+    корзина пополняется со скоростью max_requests / time_window токенов
+    в секунду. Каждый вызов acquire() выполняется за O(1) и резервирует
+    токен под блокировкой, поэтому один лимитер можно безопасно
+    использовать из множества потоков - суммарно они не превысят лимит.
+    """
     
     def __init__(self, max_requests: int = 30, time_window: float = 1.0):
         """
@@ -18,25 +28,408 @@ class RateLimiter:
         """
         self.max_requests = max_requests
         self.time_window = time_window
-        self.requests = []
+        self._rate = max_requests / time_window
+        self._tokens = float(max_requests)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        
+        # Статистика ожидания
+        self._acquired = 0
+        self._delayed = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+    
+    def _refill(self) -> None:
+        """Пополнение корзины за прошедшее время (вызывается под блокировкой)"""
+        now = time.monotonic()
+        self._tokens = min(
+            float(self.max_requests),
+            self._tokens + (now - self._updated) * self._rate
+        )
+        self._updated = now
+    
+    def _reserve(self) -> float:
+        """
+        Резервирование токена
+        
+        Returns:
+            float: Время (в секундах), которое нужно подождать перед запросом
+        """
+        with self._lock:
+            self._refill()
+            
+            # Токен может уйти в минус: это резерв под уже ожидающие запросы
+            self._tokens -= 1
+            wait = -self._tokens / self._rate if self._tokens < 0 else 0.0
+            
+            self._acquired += 1
+            if wait > 0:
+                self._delayed += 1
+                self._total_wait += wait
+                if wait > self._max_wait:
+                    self._max_wait = wait
+            
+            return wait
     
     def acquire(self):
         """Ожидает, если достигнут лимит запросов"""
-        now = time.time()
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+    
+    def try_acquire(self) -> bool:
+        """
+        Взять токен без ожидания и без резервирования
+        
+        Returns:
+            bool: True, если токен был доступен сразу
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            self._acquired += 1
+            return True
+    
+    def on_success(self) -> None:
+        """Обратная связь: запрос выполнен успешно (у RateLimiter ничего не делает)"""
+    
+    def on_rate_limited(self, retry_after: Optional[float] = None) -> None:
+        """Обратная связь: API ответил 429 (у RateLimiter ничего не делает)"""
+    
+    def _after_fork(self) -> None:
+        """Новая блокировка в дочернем процессе (унаследованная могла быть захвачена)"""
+        self._lock = threading.Lock()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Статистика ожидания в лимитере
+        
+        Returns:
+            dict: acquired - всего выданных разрешений,
+                  delayed - сколько из них пришлось ждать,
+                  total_wait_time / max_wait_time / avg_wait_time - время ожидания в секундах
+        """
+        with self._lock:
+            return {
+                'acquired': self._acquired,
+                'delayed': self._delayed,
+                'total_wait_time': self._total_wait,
+                'max_wait_time': self._max_wait,
+                'avg_wait_time': self._total_wait / self._acquired if self._acquired else 0.0,
+            }
+
+
+class AdaptiveRateLimiter(RateLimiter):
+    """
+    Ограничитель с частотой, подстраивающейся под ответы API (AIMD).
+    
+    - ответ 429: частота умножается на decrease_factor (не чаще одного раза
+      за decrease_cooldown, чтобы пачка одновременных 429 от одной перегрузки
+      не обрушила частоту), накопленный запас токенов сбрасывается
+    - increase_interval секунд без 429 при нагрузке не меньше половины
+      текущей частоты: частота растёт на increase_step
+    
+    Частота остаётся в границах [min_rate, max_rate] запросов в секунду.
+    Без нагрузки частота не растёт: иначе после простоя первый всплеск
+    пришёлся бы на завышенный лимит.
+    
+    Example:
+        >>> limiter = AdaptiveRateLimiter(30, min_rate=5, max_rate=60)
+        >>> client = MAXClient(token="...", rate_limiter=limiter)
+        >>> limiter.rate
+        30.0
+    """
+    
+    def __init__(
+        self,
+        max_requests: int = 30,
+        time_window: float = 1.0,
+        min_rate: float = 1.0,
+        max_rate: Optional[float] = None,
+        decrease_factor: float = 0.5,
+        increase_step: float = 1.0,
+        increase_interval: float = 1.0,
+        decrease_cooldown: float = 1.0
+    ):
+        """
+        Args:
+            max_requests: Начальное количество запросов за time_window
+            time_window: Временное окно в секундах
+            min_rate: Нижняя граница частоты (запросов в секунду)
+            max_rate: Верхняя граница частоты (по умолчанию - начальная частота)
+            decrease_factor: Множитель частоты при ответе 429
+            increase_step: Прирост частоты после increase_interval без 429
+            increase_interval: Длительность успешной работы до прироста (секунды)
+            decrease_cooldown: Минимальный интервал между снижениями (секунды)
+        """
+        super().__init__(max_requests, time_window)
+        if not 0 < decrease_factor < 1:
+            raise ValueError("decrease_factor должен быть в диапазоне (0, 1)")
+        
+        self.min_rate = min_rate
+        self.max_rate = max_rate if max_rate is not None else self._rate
+        self.decrease_factor = decrease_factor
+        self.increase_step = increase_step
+        self.increase_interval = increase_interval
+        self.decrease_cooldown = decrease_cooldown
+        
+        now = time.monotonic()
+        self._window_start = now
+        self._window_successes = 0
+        self._last_decrease = float('-inf')
+        self._increases = 0
+        self._decreases = 0
+    
+    @property
+    def rate(self) -> float:
+        """Текущая частота (запросов в секунду)"""
+        return self._rate
+    
+    def _set_rate(self, rate: float) -> None:
+        """Смена частоты (вызывается под блокировкой)"""
+        # Токены за прошедшее время начисляются по старой частоте
+        self._refill()
+        self._rate = min(max(rate, self.min_rate), self.max_rate)
+        self.max_requests = max(1, int(self._rate * self.time_window))
+        self._tokens = min(self._tokens, float(self.max_requests))
+    
+    def on_success(self) -> None:
+        with self._lock:
+            self._window_successes += 1
+            now = time.monotonic()
+            elapsed = now - self._window_start
+            if elapsed < self.increase_interval:
+                return
+            
+            if self._window_successes >= self._rate * elapsed / 2 and self._rate < self.max_rate:
+                self._set_rate(self._rate + self.increase_step)
+                self._increases += 1
+            self._window_start = now
+            self._window_successes = 0
+    
+    def on_rate_limited(self, retry_after: Optional[float] = None) -> None:
+        with self._lock:
+            now = time.monotonic()
+            # Окно успешной работы начинается заново в любом случае
+            self._window_start = now
+            self._window_successes = 0
+            if now - self._last_decrease < self.decrease_cooldown:
+                return
+            
+            self._last_decrease = now
+            self._set_rate(self._rate * self.decrease_factor)
+            self._decreases += 1
+            # Запас токенов израсходован сверх реального лимита - всплеска не будет
+            self._tokens = min(self._tokens, 0.0)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Статистика ожидания и текущая частота
+        
+        Returns:
+            dict: поля RateLimiter.get_stats, а также rate - текущая частота
+                  (запросов в секунду), increases / decreases - количество
+                  повышений и снижений частоты
+        """
+        stats = super().get_stats()
+        with self._lock:
+            stats.update({
+                'rate': self._rate,
+                'increases': self._increases,
+                'decreases': self._decreases,
+            })
+        return stats
+
+
+class RecipientRateLimiter:
+    """
+    Ограничитель частоты сообщений одному получателю.
+    
+    Кроме общего лимита мессенджер ограничивает всплески в один чат:
+    у каждого получателя своя корзина token bucket ёмкостью max_requests,
+    пополняемая за time_window. Обработчик, засыпающий сообщениями один
+    групповой чат, ждёт своей корзины и не расходует общий лимит,
+    нужный остальным получателям.
+    
+    Корзины хранятся в порядке последнего обращения. Корзина, успевшая
+    наполниться, неотличима от новой и удаляется при следующем обращении
+    к лимитеру, если все корзины перед ней тоже наполнились. Ненаполненная
+    корзина в начале очереди задерживает удаление следующих за ней до тех
+    пор, пока не наполнится сама (через time_window после последнего
+    сообщения её получателю, с учётом ожидающих). Поэтому в памяти остаются
+    получатели, которым писали после последнего обращения к самой старой
+    ненаполненной корзине.
+    
+    Example:
+        >>> limiter = RecipientRateLimiter(max_requests=20, time_window=60)
+        >>> client = MAXClient(token="...", recipient_limiter=limiter)
+    """
+    
+    def __init__(self, max_requests: int = 1, time_window: float = 1.0):
+        """
+        Args:
+            max_requests: Максимальное количество сообщений одному получателю
+                          за time_window
+            time_window: Временное окно в секундах
+        """
+        if max_requests < 1 or time_window <= 0:
+            raise ValueError("max_requests и time_window должны быть положительными")
+        
+        self.max_requests = max_requests
+        self.time_window = time_window
+        self._rate = max_requests / time_window
+        # Получатель -> [токены, время обновления]
+        self._buckets: 'OrderedDict[Hashable, List[float]]' = OrderedDict()
+        self._lock = threading.Lock()
         
-        # Удаляем старые запросы за пределами временного окна
-        self.requests = [req_time for req_time in self.requests 
-                        if now - req_time < self.time_window]
+        # Статистика
+        self._acquired = 0
+        self._delayed = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._evicted = 0
+    
+    def _bucket(self, key: Hashable, now: float) -> List[float]:
+        """Пополненная корзина получателя (вызывается под блокировкой)"""
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [float(self.max_requests), now]
+        else:
+            bucket[0] = min(float(self.max_requests), bucket[0] + (now - bucket[1]) * self._rate)
+            bucket[1] = now
+            self._buckets.move_to_end(key)
         
-        # Если достигнут лимит, ждём
-        if len(self.requests) >= self.max_requests:
-            sleep_time = self.time_window - (now - self.requests[0])
-            if sleep_time > 0:
-                time.sleep(sleep_time)
-            self.requests.pop(0)
+        self._evict(now)
+        return bucket
+    
+    def _evict(self, now: float) -> None:
+        """
+        Удаление наполнившихся корзин (вызывается под блокировкой)
         
-        # Записываем текущий запрос
-        self.requests.append(now)
+        Корзины упорядочены по времени обращения; просмотр останавливается
+        на первой ненаполненной, поэтому в среднем стоит O(1) на вызов.
+        Наполнившиеся корзины за ней остаются в памяти, пока она не
+        наполнится или не будет удалена.
+        """
+        buckets = self._buckets
+        while len(buckets) > 1:
+            key, (tokens, updated) = next(iter(buckets.items()))
+            if tokens + (now - updated) * self._rate < self.max_requests:
+                break
+            del buckets[key]
+            self._evicted += 1
+    
+    def _reserve(self, key: Hashable) -> float:
+        """
+        Резервирование токена получателя
+        
+        Returns:
+            float: Время (в секундах), которое нужно подождать перед запросом
+        """
+        with self._lock:
+            bucket = self._bucket(key, time.monotonic())
+            
+            # Как и в RateLimiter, токены уходят в минус под ожидающие запросы
+            bucket[0] -= 1
+            wait = -bucket[0] / self._rate if bucket[0] < 0 else 0.0
+            
+            self._acquired += 1
+            if wait > 0:
+                self._delayed += 1
+                self._total_wait += wait
+                if wait > self._max_wait:
+                    self._max_wait = wait
+            
+            return wait
+    
+    def acquire(self, key: Hashable) -> None:
+        """
+        Ожидает, если достигнут лимит сообщений получателю
+        
+        Args:
+            key: Получатель (chat_id группы или user_id)
+        """
+        wait = self._reserve(key)
+        if wait > 0:
+            time.sleep(wait)
+    
+    def try_acquire(self, key: Hashable) -> bool:
+        """
+        Взять токен получателя без ожидания и без резервирования
+        
+        Args:
+            key: Получатель (chat_id группы или user_id)
+        
+        Returns:
+            bool: True, если токен был доступен сразу
+        """
+        with self._lock:
+            bucket = self._bucket(key, time.monotonic())
+            if bucket[0] < 1:
+                return False
+            bucket[0] -= 1
+            self._acquired += 1
+            return True
+    
+    def __len__(self) -> int:
+        """Количество получателей, корзины которых хранятся в памяти"""
+        return len(self._buckets)
+    
+    def _after_fork(self) -> None:
+        """Новая блокировка в дочернем процессе (унаследованная могла быть захвачена)"""
+        self._lock = threading.Lock()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Статистика лимитера
+        
+        Returns:
+            dict: поля RateLimiter.get_stats, а также recipients - корзин в памяти,
+                  evicted - удалено наполнившихся корзин
+        """
+        with self._lock:
+            return {
+                'acquired': self._acquired,
+                'delayed': self._delayed,
+                'total_wait_time': self._total_wait,
+                'max_wait_time': self._max_wait,
+                'avg_wait_time': self._total_wait / self._acquired if self._acquired else 0.0,
+                'recipients': len(self._buckets),
+                'evicted': self._evicted,
+            }
+
+
+class AsyncRateLimiter(RateLimiter):
+    """Асинхронный ограничитель частоты запросов для asyncio-клиента"""
+    
+    async def acquire(self):
+        """Ожидает (не блокируя event loop), если достигнут лимит запросов"""
+        wait = self._reserve()
+        if wait > 0:
+            # asyncio уже загружен работающим event loop; импорт здесь не замедляет
+            # import max_api.utils для синхронных процессов
+            import asyncio
+            await asyncio.sleep(wait)
+
+
+class UpdatesBatch(list):
+    """
+    Пачка обновлений из /updates
+    
+    Ведёт себя как обычный список обновлений, дополнительно хранит
+    маркер, который нужно передать в следующий запрос /updates.
+    """
+    
+    def __init__(self, updates=(), marker: Optional[int] = None):
+        """
+        Args:
+            updates: Обновления
+            marker: Маркер из ответа API (None, если сервер его не вернул)
+        """
+        super().__init__(updates)
+        self.marker = marker
 
 
 def rate_limited(max_requests: int = 30, time_window: float = 1.0):
@@ -199,3 +592,38 @@ def extract_chat_id(update: Dict[str, Any]) -> Optional[int]:
     message = update.get("message", {})
     recipient = message.get("recipient", {})
     return recipient.get("chat_id")
+
+
+def extract_callback_payload(update: Dict[str, Any]) -> Optional[str]:
+    """
+    Извлечение payload нажатой callback-кнопки из обновления
+    
+    Args:
+        update: Объект обновления (message_callback)
+        
+    Returns:
+        str: payload или None
+    """
+    callback = update.get("callback") or {}
+    return callback.get("payload")
+
+
+def extract_user_id(update: Dict[str, Any]) -> Optional[int]:
+    """
+    Извлечение user_id пользователя, вызвавшего обновление
+    
+    Args:
+        update: Объект обновления
+        
+    Returns:
+        int: user_id отправителя сообщения, нажавшего кнопку
+             или запустившего бота; None, если его нет
+    """
+    message = update.get("message") or {}
+    sender = message.get("sender") or {}
+    if sender.get("user_id"):
+        return sender["user_id"]
+    
+    callback = update.get("callback") or {}
+    user = callback.get("user") or update.get("user") or {}
+    return user.get("user_id")
@@ -0,0 +1,448 @@
+"""
+Приём обновлений через Webhook: встроенный asyncio HTTP-сервер и ASGI-приложение
+"""
+
+import json
+import asyncio
+import inspect
+import logging
+from typing import Optional, Callable, Dict, Any, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+_REASONS = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    411: 'Length Required',
+    413: 'Payload Too Large',
+    431: 'Request Header Fields Too Large',
+    503: 'Service Unavailable',
+}
+
+
+def parse_webhook_payload(body: bytes) -> List[Dict[str, Any]]:
+    """
+    Разбор тела webhook-запроса
+    
+    Args:
+        body: Тело POST-запроса
+    
+    Returns:
+        list: Обновления (одно обновление, список или {'updates': [...]})
+    
+    Raises:
+        ValueError: Если тело не является JSON с обновлениями
+    """
+    try:
+        data = json.loads(body)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Невалидный JSON: {e}")
+    
+    if isinstance(data, dict) and isinstance(data.get('updates'), list):
+        updates = data['updates']
+    elif isinstance(data, dict):
+        updates = [data]
+    elif isinstance(data, list):
+        updates = data
+    else:
+        raise ValueError("Ожидался объект обновления или список обновлений")
+    
+    if not all(isinstance(update, dict) for update in updates):
+        raise ValueError("Каждое обновление должно быть JSON-объектом")
+    
+    return updates
+
+
+class WebhookReceiver:
+    """
+    Приёмник webhook-обновлений MAX.
+    
+    Запрос подтверждается сразу после того, как обновления поставлены
+    в ограниченную очередь; обработка выполняется фоновыми задачами вне
+    обработки HTTP-запроса. Если очередь заполнена, сервер отвечает 503,
+    и платформа доставит обновление повторно.
+    
+    Обработчик может быть корутиной или обычной функцией (например,
+    Dispatcher.dispatch или ShardedExecutor.submit) - обычные функции
+    выполняются в пуле потоков, чтобы не блокировать event loop.
+    
+    Example:
+        >>> receiver = WebhookReceiver(dispatcher.dispatch, path='/webhook')
+        >>> asyncio.run(receiver.serve(host='0.0.0.0', port=8443, ssl=ssl_context))
+        >>>
+        >>> # или внутри существующего ASGI-сервера
+        >>> app = receiver.asgi_app()
+    """
+    
+    # Ограничения встроенного HTTP-сервера: количество заголовков запроса
+    # и длина строки запроса или заголовка в байтах
+    MAX_HEADERS = 100
+    MAX_LINE_SIZE = 8192
+    
+    def __init__(
+        self,
+        handler: Callable[[Dict[str, Any]], Any],
+        path: str = '/webhook',
+        max_queue_size: int = 1000,
+        workers: int = 4,
+        max_body_size: int = 1024 * 1024
+    ):
+        """
+        Args:
+            handler: Обработчик одного обновления
+            path: Путь, на который MAX отправляет обновления
+            max_queue_size: Максимальное количество обновлений в очереди
+            workers: Количество фоновых задач-обработчиков
+            max_body_size: Максимальный размер тела запроса в байтах
+        """
+        self.handler = handler
+        self.path = path
+        self.max_queue_size = max_queue_size
+        self.workers = workers
+        self.max_body_size = max_body_size
+        self._is_coroutine = inspect.iscoroutinefunction(handler)
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_tasks: List[asyncio.Task] = []
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections = set()
+        self._stopping = False
+        
+        # Метрики
+        self._received = 0
+        self._accepted = 0
+        self._rejected = 0
+        self._processed = 0
+        self._errors = 0
+    
+    # === Очередь и обработчики ===
+    
+    def _ensure_workers(self) -> None:
+        """Создание очереди и фоновых задач в текущем event loop"""
+        if self._queue is not None:
+            return
+        
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._worker_tasks = [
+            asyncio.ensure_future(self._worker()) for _ in range(self.workers)
+        ]
+    
+    async def _worker(self) -> None:
+        """Фоновая обработка обновлений из очереди"""
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            update = await self._queue.get()
+            try:
+                if self._is_coroutine:
+                    await self.handler(update)
+                else:
+                    await loop.run_in_executor(None, self.handler, update)
+                self._processed += 1
+            except Exception:
+                self._errors += 1
+                logger.exception("Ошибка обработки webhook-обновления")
+            finally:
+                self._queue.task_done()
+    
+    async def accept(self, method: str, path: str, body: bytes) -> Tuple[int, Dict[str, Any]]:
+        """
+        Обработка webhook-запроса (общая для HTTP-сервера и ASGI)
+        
+        Args:
+            method: HTTP метод
+            path: Путь запроса (без query)
+            body: Тело запроса
+        
+        Returns:
+            tuple: (HTTP код ответа, тело ответа)
+        """
+        if self._stopping:
+            return 503, {'ok': False, 'error': 'shutting down'}
+        
+        self._ensure_workers()
+        
+        if path != self.path:
+            return 404, {'ok': False, 'error': 'not found'}
+        if method != 'POST':
+            return 405, {'ok': False, 'error': 'method not allowed'}
+        if len(body) > self.max_body_size:
+            return 413, {'ok': False, 'error': 'payload too large'}
+        
+        try:
+            updates = parse_webhook_payload(body)
+        except ValueError as e:
+            return 400, {'ok': False, 'error': str(e)}
+        
+        self._received += len(updates)
+        
+        # Либо ставим в очередь всю пачку, либо ничего - иначе при повторной
+        # доставке часть обновлений будет обработана дважды
+        if self._queue.maxsize - self._queue.qsize() < len(updates):
+            self._rejected += len(updates)
+            logger.warning("Очередь webhook-обновлений заполнена, запрос отклонён")
+            return 503, {'ok': False, 'error': 'queue is full'}
+        
+        for update in updates:
+            self._queue.put_nowait(update)
+        self._accepted += len(updates)
+        
+        return 200, {'ok': True}
+    
+    async def join(self) -> None:
+        """Дождаться обработки всех принятых обновлений"""
+        if self._queue is not None:
+            await self._queue.join()
+    
+    # === Встроенный HTTP-сервер ===
+    
+    async def start(self, host: str = '0.0.0.0', port: int = 8443, ssl=None) -> None:
+        """
+        Запуск встроенного HTTP(S)-сервера
+        
+        Args:
+            host: Адрес для прослушивания
+            port: Порт (0 - выбрать свободный)
+            ssl: ssl.SSLContext для HTTPS (MAX принимает только HTTPS URL;
+                 без него сервер подходит для работы за TLS-прокси)
+        """
+        self._ensure_workers()
+        self._server = await asyncio.start_server(self._handle_connection, host, port, ssl=ssl)
+        logger.info(f"Webhook-сервер запущен: {self.address}")
+    
+    @property
+    def address(self) -> Optional[Tuple[str, int]]:
+        """Адрес, на котором слушает сервер (host, port)"""
+        if self._server is None or not self._server.sockets:
+            return None
+        return self._server.sockets[0].getsockname()[:2]
+    
+    async def serve(self, host: str = '0.0.0.0', port: int = 8443, ssl=None) -> None:
+        """Запуск сервера и обслуживание запросов до отмены"""
+        await self.start(host, port, ssl=ssl)
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.stop()
+    
+    async def stop(self, timeout: Optional[float] = 30.0) -> None:
+        """
+        Остановка сервера и фоновых задач
+        
+        Новые запросы перестают приниматься, затем обновления, уже
+        подтверждённые ответом 200, дообрабатываются: платформа не доставит
+        их повторно.
+        
+        Args:
+            timeout: Максимальное ожидание обработки очереди в секундах
+                     (None - без ограничения)
+        """
+        self._stopping = True
+        try:
+            if self._server is not None:
+                self._server.close()
+                # Открытые keep-alive соединения закрываем сами, иначе wait_closed() будет их ждать
+                for writer in list(self._connections):
+                    writer.close()
+                await self._server.wait_closed()
+                self._server = None
+            
+            if self._queue is not None and self._worker_tasks:
+                try:
+                    await asyncio.wait_for(self._queue.join(), timeout)
+                except asyncio.TimeoutError:
+                    logger.warning(
+                        f"Webhook: за {timeout}s не обработано {self._queue.qsize()} обновлений, "
+                        f"они будут потеряны"
+                    )
+        finally:
+            self._stopping = False
+        
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        self._queue = None
+    
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Обслуживание одного соединения (HTTP/1.1 с keep-alive)"""
+        self._connections.add(writer)
+        try:
+            while True:
+                request_line = await self._read_line(reader)
+                if request_line == b'':
+                    break
+                
+                try:
+                    if request_line is None:
+                        raise ValueError("Строка запроса длиннее MAX_LINE_SIZE")
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await self._write_response(writer, 400, {'ok': False, 'error': 'bad request'}, False)
+                    break
+                
+                headers = await self._read_headers(reader)
+                if headers is None:
+                    await self._write_response(
+                        writer, 431, {'ok': False, 'error': 'request header fields too large'}, False
+                    )
+                    break
+                
+                # Тело читается только по Content-Length: chunked и другие
+                # кодировки передачи не поддерживаются
+                if 'transfer-encoding' in headers:
+                    await self._write_response(writer, 411, {'ok': False, 'error': 'length required'}, False)
+                    break
+                
+                length = headers.get('content-length') or '0'
+                if not (length.isascii() and length.isdigit()):
+                    await self._write_response(writer, 400, {'ok': False, 'error': 'invalid content-length'}, False)
+                    break
+                length = int(length)
+                if length > self.max_body_size:
+                    await self._write_response(writer, 413, {'ok': False, 'error': 'payload too large'}, False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+                
+                keep_alive = (
+                    headers.get('connection', '').lower() != 'close'
+                    and version == 'HTTP/1.1'
+                )
+                status, payload = await self.accept(method.upper(), target.split('?', 1)[0], body)
+                await self._write_response(writer, status, payload, keep_alive)
+                
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+    
+    async def _read_line(self, reader: asyncio.StreamReader) -> Optional[bytes]:
+        """
+        Чтение строки запроса или заголовка
+        
+        Returns:
+            bytes: Строка (b'' при закрытом соединении) или None, если строка
+                   длиннее MAX_LINE_SIZE
+        """
+        try:
+            line = await reader.readline()
+        except ValueError:
+            # Строка не поместилась в буфер StreamReader
+            return None
+        if len(line) > self.MAX_LINE_SIZE:
+            return None
+        return line
+    
+    async def _read_headers(self, reader: asyncio.StreamReader) -> Optional[Dict[str, str]]:
+        """
+        Чтение заголовков запроса
+        
+        Returns:
+            dict: Заголовки с именами в нижнем регистре или None, если заголовков
+                  больше MAX_HEADERS или строка заголовка длиннее MAX_LINE_SIZE
+        """
+        headers = {}
+        for _ in range(self.MAX_HEADERS + 1):
+            line = await self._read_line(reader)
+            if line is None:
+                return None
+            if line in (b'\r\n', b'\n', b''):
+                return headers
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        return None
+    
+    @staticmethod
+    async def _write_response(
+        writer: asyncio.StreamWriter,
+        status: int,
+        payload: Dict[str, Any],
+        keep_alive: bool
+    ) -> None:
+        """Отправка HTTP-ответа"""
+        body = json.dumps(payload).encode('utf-8')
+        head = (
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            f"\r\n"
+        )
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+    
+    # === ASGI ===
+    
+    def asgi_app(self) -> Callable:
+        """
+        ASGI-приложение для подключения к существующему серверу
+        (uvicorn, hypercorn или как под-приложение Starlette/FastAPI)
+        
+        Returns:
+            ASGI callable app(scope, receive, send)
+        """
+        async def app(scope, receive, send):
+            if scope['type'] == 'lifespan':
+                while True:
+                    message = await receive()
+                    if message['type'] == 'lifespan.startup':
+                        self._ensure_workers()
+                        await send({'type': 'lifespan.startup.complete'})
+                    elif message['type'] == 'lifespan.shutdown':
+                        await self.stop()
+                        await send({'type': 'lifespan.shutdown.complete'})
+                        return
+            
+            if scope['type'] != 'http':
+                return
+            
+            chunks = []
+            size = 0
+            while True:
+                message = await receive()
+                chunk = message.get('body', b'')
+                size += len(chunk)
+                if size <= self.max_body_size:
+                    chunks.append(chunk)
+                if not message.get('more_body'):
+                    break
+            
+            if size > self.max_body_size:
+                status, payload = 413, {'ok': False, 'error': 'payload too large'}
+            else:
+                status, payload = await self.accept(scope['method'].upper(), scope['path'], b''.join(chunks))
+            
+            response = json.dumps(payload).encode('utf-8')
+            await send({
+                'type': 'http.response.start',
+                'status': status,
+                'headers': [
+                    (b'content-type', b'application/json'),
+                    (b'content-length', str(len(response)).encode('latin-1')),
+                ],
+            })
+            await send({'type': 'http.response.body', 'body': response})
+        
+        return app
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Метрики приёмника
+        
+        Returns:
+            dict: received / accepted / rejected - обновлений получено, принято и отклонено,
+                  processed / errors - обработано и завершилось ошибкой,
+                  queue_depth - ожидают обработки
+        """
+        return {
+            'received': self._received,
+            'accepted': self._accepted,
+            'rejected': self._rejected,
+            'processed': self._processed,
+            'errors': self._errors,
+            'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+        }
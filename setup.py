@@ -31,4 +31,9 @@ setup(
     ],
     python_requires=">=3.8",
     install_requires=requirements,
+    extras_require={
+        "async": ["aiohttp>=3.9.0"],
+        "fast": ["orjson>=3.9.0"],
+        "http2": ["httpx[http2]>=0.25.0"],
+    },
 )
@@ -0,0 +1,190 @@
+"""
+Тесты для AsyncMAXClient
+"""
+
+import asyncio
+import pytest
+
+aiohttp = pytest.importorskip("aiohttp")
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from max_api import AsyncMAXClient
+from max_api.exceptions import (
+    MAXAPIException,
+    AuthenticationError,
+    BadRequestError,
+    RateLimitError,
+)
+
+
+def run_with_server(routes, scenario, **client_kwargs):
+    """Запуск сценария против локального aiohttp-сервера"""
+    async def runner():
+        app = web.Application()
+        app.add_routes(routes)
+        server = TestServer(app)
+        await server.start_server()
+        try:
+            base_url = str(server.make_url('')).rstrip('/')
+            async with AsyncMAXClient(token="test_token", base_url=base_url, **client_kwargs) as client:
+                return await scenario(client)
+        finally:
+            await server.close()
+    
+    return asyncio.run(runner())
+
+
+class TestAsyncMAXClient:
+    """Тесты для класса AsyncMAXClient"""
+    
+    def test_client_initialization(self):
+        """Тест инициализации клиента"""
+        client = AsyncMAXClient(token="test_token")
+        assert client.token == "test_token"
+        assert client.base_url == "https://platform-api.max.ru"
+        assert client.timeout == 30
+    
+    def test_get_me_success(self):
+        """Тест успешного получения информации о боте"""
+        async def handler(request):
+            assert request.headers['Authorization'] == "test_token"
+            return web.json_response({"user_id": 1, "name": "Test Bot"})
+        
+        async def scenario(client):
+            return await client.get_me()
+        
+        result = run_with_server([web.get('/me', handler)], scenario)
+        assert result['name'] == "Test Bot"
+    
+    def test_send_message_params(self):
+        """Тест параметров при отправке сообщения в личный и групповой чат"""
+        seen = []
+        
+        async def handler(request):
+            body = await request.json()
+            seen.append((dict(request.query), body))
+            return web.json_response({"message_id": "msg_1"})
+        
+        async def scenario(client):
+            await client.send_message(chat_id=123, text="Hi", link_preview=False)
+            await client.send_message(chat_id=-456, text="All")
+        
+        run_with_server([web.post('/messages', handler)], scenario)
+        assert seen[0] == ({"user_id": "123", "disable_link_preview": "True"}, {"text": "Hi"})
+        assert seen[1] == ({"chat_id": "-456"}, {"text": "All"})
+    
+    def test_concurrent_sends(self):
+        """Тест одновременной отправки множества сообщений"""
+        async def handler(request):
+            await asyncio.sleep(0.05)
+            return web.json_response({"message_id": request.query['user_id']})
+        
+        async def scenario(client):
+            return await asyncio.gather(*(
+                client.send_message(chat_id=uid, text="Hi") for uid in range(1, 21)
+            ))
+        
+        results = run_with_server([web.post('/messages', handler)], scenario)
+        assert [r['message_id'] for r in results] == [str(uid) for uid in range(1, 21)]
+    
+    def test_get_updates_success(self):
+        """Тест получения обновлений"""
+        async def handler(request):
+            assert request.query['timeout'] == "5"
+            return web.json_response({
+                "updates": [{"update_type": "message_created"}],
+                "marker": 100
+            })
+        
+        async def scenario(client):
+            return await client.get_updates(timeout=5)
+        
+        result = run_with_server([web.get('/updates', handler)], scenario)
+        assert result == [{"update_type": "message_created"}]
+    
+    def test_expired_poll_returns_empty_batch(self):
+        """Тест: истёкший Long Polling возвращает пустой список вместо исключения"""
+        async def handler(request):
+            await asyncio.sleep(1)
+            return web.json_response({"updates": [{"update_type": "late"}]})
+        
+        async def scenario(client):
+            return await client.get_updates(timeout=0)
+        
+        result = run_with_server(
+            [web.get('/updates', handler)], scenario,
+            timeout=0.2, poll_timeout_margin=0.1
+        )
+        assert result == []
+    
+    def test_poll_does_not_block_sends(self):
+        """Тест: ожидающий /updates не расходует лимит и не занимает соединение отправок"""
+        release = asyncio.Event()
+        
+        async def updates(request):
+            await release.wait()
+            return web.json_response({"updates": [], "marker": 1})
+        
+        async def messages(request):
+            return web.json_response({"message_id": "msg_1"})
+        
+        async def scenario(client):
+            poll = asyncio.ensure_future(client.get_updates(timeout=5))
+            await asyncio.sleep(0.05)
+            started = asyncio.get_running_loop().time()
+            await client.send_message(chat_id=1, text="Hi")
+            elapsed = asyncio.get_running_loop().time() - started
+            release.set()
+            await poll
+            return elapsed
+        
+        elapsed = run_with_server(
+            [web.get('/updates', updates), web.post('/messages', messages)], scenario,
+            max_requests_per_second=1, max_connections=1
+        )
+        assert elapsed < 0.5
+    
+    @pytest.mark.parametrize("status, exception", [
+        (400, BadRequestError),
+        (401, AuthenticationError),
+        (429, RateLimitError),
+    ])
+    def test_error_mapping(self, status, exception):
+        """Тест генерации тех же исключений, что и в MAXClient"""
+        async def handler(request):
+            return web.json_response({"error": "boom"}, status=status)
+        
+        async def scenario(client):
+            with pytest.raises(exception) as exc_info:
+                await client.get_me()
+            return exc_info.value
+        
+        error = run_with_server([web.get('/me', handler)], scenario)
+        assert error.message == "boom"
+        assert error.status_code == status
+    
+    def test_connection_error(self):
+        """Тест ошибки подключения"""
+        async def scenario():
+            async with AsyncMAXClient(token="t", base_url="http://127.0.0.1:9") as client:
+                with pytest.raises(MAXAPIException, match="подключения"):
+                    await client.get_me()
+        
+        asyncio.run(scenario())
+    
+    def test_concurrent_gets_coalesced(self):
+        """Тест: одновременные одинаковые GET выполняются одним запросом"""
+        calls = []
+        
+        async def handler(request):
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return web.json_response({"body": {"text": "hi"}})
+        
+        async def scenario(client):
+            return await asyncio.gather(*(client.get_message("mid.1") for _ in range(10)))
+        
+        results = run_with_server([web.get('/messages/mid.1', handler)], scenario)
+        assert results == [{"body": {"text": "hi"}}] * 10
+        assert len(calls) == 1
@@ -0,0 +1,287 @@
+"""
+Тесты для массовой рассылки
+"""
+
+import json
+import time
+import threading
+import pytest
+
+from max_api import MAXClient, InMemoryTransport, MemoryCheckpointStore, FileCheckpointStore
+from max_api.exceptions import AuthenticationError
+from max_api.broadcast import Broadcast, BroadcastResult
+from max_api.transport import TransportResponse
+
+
+class _Recipients:
+    """Обработчик /messages: запоминает получателей и одновременность отправок"""
+    
+    def __init__(self, delay=0.0, errors=None):
+        self.delay = delay
+        self.errors = errors or {}
+        self.sent = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+    
+    def __call__(self, request):
+        chat_id = request.params.get('user_id', request.params.get('chat_id'))
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+            self.sent.append(chat_id)
+        
+        status = self.errors.get(chat_id, 200)
+        if isinstance(status, list):
+            # Коды ответов на последовательные попытки, затем успех
+            status = status.pop(0) if status else 200
+        body = {'message': {'recipient': chat_id}} if status == 200 else {'message': 'error'}
+        return TransportResponse(status, json.dumps(body).encode('utf-8'))
+
+
+def _client(handler):
+    return MAXClient(token="test", transport=InMemoryTransport(handler), max_requests_per_second=10000)
+
+
+class TestBroadcast:
+    """Тесты для Broadcast"""
+    
+    def test_sends_to_all(self):
+        """Тест: сообщение отправлено каждому получателю"""
+        recipients = _Recipients()
+        client = _client(recipients)
+        
+        results = list(client.broadcast(range(1, 51), "Новости"))
+        
+        assert len(results) == 50
+        assert all(isinstance(result, BroadcastResult) and result.ok for result in results)
+        assert sorted(recipients.sent) == list(range(1, 51))
+        assert sorted(result.chat_id for result in results) == list(range(1, 51))
+        
+        stats = client.broadcast([], "").wait()
+        assert stats['processed'] == 0
+    
+    def test_concurrency(self):
+        """Тест: отправки идут параллельно, не больше concurrency одновременно"""
+        recipients = _Recipients(delay=0.02)
+        client = _client(recipients)
+        
+        start = time.monotonic()
+        stats = client.broadcast(range(1, 41), "Новости", concurrency=8).wait()
+        elapsed = time.monotonic() - start
+        
+        assert stats['sent'] == 40
+        assert 1 < recipients.max_active <= 8
+        # Последовательно: 40 * 0.02 = 0.8 с
+        assert elapsed < 0.5
+    
+    def test_bulk_lane(self):
+        """Тест: рассылка идёт в полосе bulk"""
+        client = _client(_Recipients())
+        
+        client.broadcast(range(1, 6), "Новости").wait()
+        
+        assert client.scheduler.get_stats()['bulk']['granted'] == 5
+    
+    def test_failure_breakdown(self):
+        """Тест: ошибки не останавливают рассылку и группируются по классам"""
+        recipients = _Recipients(errors={3: 404, 5: 404, 7: 400})
+        client = _client(recipients)
+        
+        job = client.broadcast([1, 2, 3, 0, 5, 6, 7], "Новости")
+        results = list(job)
+        
+        failed = {result.chat_id: type(result.error).__name__ for result in results if not result.ok}
+        assert failed == {3: 'NotFoundError', 5: 'NotFoundError', 7: 'BadRequestError', 0: 'ValueError'}
+        assert job.get_stats()['failures'] == {'NotFoundError': 2, 'BadRequestError': 1, 'ValueError': 1}
+        assert sorted(recipients.sent) == [1, 2, 3, 5, 6, 7]
+    
+    def test_stats(self):
+        """Тест: статистика с разбивкой ошибок, скоростью и ETA"""
+        recipients = _Recipients(errors={2: 404})
+        job = _client(recipients).broadcast([1, 2, 3, 4], "Новости")
+        
+        assert job.get_stats()['eta'] is None
+        job.wait()
+        
+        stats = job.get_stats()
+        assert stats['total'] == 4
+        assert stats['processed'] == 4
+        assert stats['sent'] == 3
+        assert stats['failed'] == 1
+        assert stats['failures'] == {'NotFoundError': 1}
+        assert stats['in_flight'] == 0
+        assert stats['rate'] > 0
+        assert stats['eta'] == 0
+    
+    def test_stream_eta(self):
+        """Тест: для потока получателей ETA считается по total"""
+        recipients = _Recipients()
+        job = _client(recipients).broadcast((i for i in range(1, 11)), "Новости", total=20)
+        
+        for _ in job:
+            stats = job.get_stats()
+        
+        assert stats['total'] == 20
+        assert stats['processed'] == 10
+        assert stats['eta'] > 0
+        assert _client(recipients).broadcast(iter([1]), "").get_stats()['total'] is None
+    
+    def test_transient_retry(self):
+        """Тест: временная ошибка повторяется внутри рассылки"""
+        recipients = _Recipients(errors={2: [429, 503]})
+        client = _client(recipients)
+        
+        stats = client.broadcast([1, 2, 3], "Новости", retry_delay=0.001).wait()
+        
+        assert stats['sent'] == 3
+        assert stats['deferred'] == 0
+        assert sorted(recipients.sent) == [1, 2, 2, 2, 3]
+    
+    def test_unknown_lane(self):
+        """Тест: неизвестная полоса - ошибка до начала рассылки"""
+        client = MAXClient(token="test", transport=InMemoryTransport(_Recipients()), priority_lanes={'fast': 1})
+        
+        with pytest.raises(ValueError):
+            client.broadcast([1, 2], "Новости")
+    
+    def test_fatal_error_stops(self):
+        """Тест: общая ошибка (401) останавливает рассылку, получатель не считается обработанным"""
+        recipients = _Recipients(errors={i: 401 for i in range(1, 101)})
+        checkpoint = MemoryCheckpointStore()
+        job = _client(recipients).broadcast(range(1, 101), "Новости", checkpoint=checkpoint, concurrency=2)
+        
+        with pytest.raises(AuthenticationError):
+            job.wait()
+        
+        assert len(recipients.sent) <= 2
+        assert checkpoint.load()['next'] == 0
+        assert job.get_stats()['processed'] == 0
+    
+    def test_fatal_error_keeps_round_results(self):
+        """Тест: успешные отправки того же раунда, что и общая ошибка, отдаются и сохраняются"""
+        def handler(request):
+            chat_id = request.params['user_id']
+            if chat_id == 1:
+                return TransportResponse(200, b'{"message": {}}')
+            time.sleep(0.05)
+            if chat_id == 3:
+                return TransportResponse(401, b'{"message": "unauthorized"}')
+            return TransportResponse(200, b'{"message": {}}')
+        
+        checkpoint = MemoryCheckpointStore()
+        job = _client(handler).broadcast([1, 2, 3], "Новости", checkpoint=checkpoint, concurrency=3)
+        results = []
+        
+        with pytest.raises(AuthenticationError):
+            for result in job:
+                results.append(result.chat_id)
+                # Пока вызывающий занят, обе оставшиеся отправки завершаются
+                time.sleep(0.2)
+        
+        assert results == [1, 2]
+        assert checkpoint.load()['next'] == 2
+        assert checkpoint.load()['sent'] == 2
+    
+    def test_invalid_concurrency(self):
+        """Тест: неположительная concurrency - ошибка"""
+        with pytest.raises(ValueError):
+            _client(_Recipients()).broadcast([1], "Новости", concurrency=0)
+
+
+class TestBroadcastResume:
+    """Тесты возобновления рассылки"""
+    
+    def test_resume_after_interrupt(self):
+        """Тест: прерванная рассылка продолжается без повторных отправок"""
+        recipients = _Recipients(delay=0.005)
+        client = _client(recipients)
+        checkpoint = MemoryCheckpointStore()
+        
+        for count, _ in enumerate(client.broadcast(range(1, 101), "Новости", checkpoint=checkpoint), 1):
+            if count == 30:
+                break
+        
+        interrupted = len(recipients.sent)
+        assert 30 <= interrupted < 100
+        
+        job = client.broadcast(range(1, 101), "Новости", checkpoint=checkpoint)
+        job.wait()
+        
+        assert sorted(recipients.sent) == list(range(1, 101))
+        stats = job.get_stats()
+        assert stats['skipped'] == interrupted
+        assert stats['processed'] == 100
+        assert checkpoint.load()['next'] == 100
+    
+    def test_completed_job_is_not_resent(self):
+        """Тест: повторный запуск завершённой рассылки ничего не отправляет"""
+        recipients = _Recipients()
+        client = _client(recipients)
+        checkpoint = MemoryCheckpointStore()
+        
+        client.broadcast([1, 2, 3], "Новости", checkpoint=checkpoint).wait()
+        client.broadcast([1, 2, 3], "Новости", checkpoint=checkpoint).wait()
+        
+        assert len(recipients.sent) == 3
+    
+    def test_low_water_mark(self):
+        """Тест: пропускаются получатели до отметки и обработанные после неё"""
+        recipients = _Recipients()
+        checkpoint = MemoryCheckpointStore({
+            'next': 3, 'done': [5], 'sent': 3, 'failed': 1, 'failures': {'NotFoundError': 1},
+        })
+        
+        stats = _client(recipients).broadcast(range(10), "Новости", checkpoint=checkpoint).wait()
+        
+        # Номера 0-2 и 5 обработаны прошлым запуском (chat_id совпадает с номером)
+        assert sorted(recipients.sent) == [3, 4, 6, 7, 8, 9]
+        assert stats['skipped'] == 4
+        assert stats['processed'] == 10
+        assert stats['failures'] == {'NotFoundError': 1}
+        assert checkpoint.load()['next'] == 10
+        assert checkpoint.load()['done'] == []
+    
+    def test_file_checkpoint(self, tmp_path):
+        """Тест: прогресс сохраняется в файл по ходу рассылки"""
+        recipients = _Recipients()
+        checkpoint = FileCheckpointStore(str(tmp_path / "broadcast.json"))
+        job = Broadcast(_client(recipients), range(1, 26), "Новости", checkpoint=checkpoint, checkpoint_interval=10)
+        
+        saved = []
+        for _ in job:
+            state = checkpoint.load()
+            saved.append(state['sent'] if state else 0)
+        
+        # Сохранение каждые 10 отправок, а не после каждой
+        assert 0 < len(set(saved)) < 25
+        assert FileCheckpointStore(checkpoint.path).load()['sent'] == 25
+    
+    def test_resume_after_transient_failures(self):
+        """Тест: получатели с исчерпанными повторами отправляются при перезапуске"""
+        recipients = _Recipients(errors={3: 503, 7: [429, 429], 8: 502})
+        client = _client(recipients)
+        checkpoint = MemoryCheckpointStore()
+        
+        stats = client.broadcast(range(1, 11), "Новости", checkpoint=checkpoint,
+                                 retry_attempts=2, retry_delay=0.001).wait()
+        
+        assert stats['sent'] == 7
+        assert stats['deferred'] == 3
+        assert stats['processed'] == 7
+        assert checkpoint.load()['retry'] == [2, 6, 7]
+        
+        recipients.errors.clear()
+        recipients.sent.clear()
+        stats = client.broadcast(range(1, 11), "Новости", checkpoint=checkpoint).wait()
+        
+        assert sorted(recipients.sent) == [3, 7, 8]
+        assert stats['sent'] == 10
+        assert stats['deferred'] == 0
+        assert stats['skipped'] == 7
+        assert checkpoint.load()['retry'] == []
+        # Повторённые получатели ниже отметки не остаются в done
+        assert checkpoint.load()['done'] == []
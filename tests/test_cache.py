@@ -0,0 +1,255 @@
+"""
+Тесты для кэша ответов API
+"""
+
+import json
+import time
+import threading
+import pytest
+import responses
+from max_api import MAXClient, ResponseCache, InMemoryTransport
+from max_api.cache import TTLCache, MISSING, endpoint_group
+from max_api.transport import TransportResponse
+
+
+API = "https://platform-api.max.ru"
+
+
+@pytest.fixture
+def cache():
+    """Фикстура кэша ответов"""
+    return ResponseCache(ttl=60)
+
+
+@pytest.fixture
+def client(cache):
+    """Фикстура клиента с кэшем"""
+    return MAXClient(token="test_token", cache=cache)
+
+
+class TestTTLCache:
+    """Тесты для TTLCache"""
+    
+    def test_get_set(self):
+        """Тест сохранения и получения значения"""
+        cache = TTLCache(ttl=60, maxsize=10)
+        assert cache.get('a') is MISSING
+        cache.set('a', 1)
+        assert cache.get('a') == 1
+        assert cache.hits == 1
+        assert cache.misses == 1
+    
+    def test_expiration(self):
+        """Тест истечения TTL"""
+        cache = TTLCache(ttl=0.01, maxsize=10)
+        cache.set('a', 1)
+        time.sleep(0.02)
+        assert cache.get('a') is MISSING
+        assert cache.expirations == 1
+        assert len(cache) == 0
+    
+    def test_lru_eviction(self):
+        """Тест вытеснения давно не использованной записи"""
+        cache = TTLCache(ttl=60, maxsize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        assert cache.get('b') is MISSING
+        assert cache.get('a') == 1
+        assert cache.get('c') == 3
+        assert cache.evictions == 1
+
+
+class TestResponseCache:
+    """Тесты для ResponseCache"""
+    
+    def test_endpoint_group(self):
+        """Тест определения группы конечной точки"""
+        assert endpoint_group('/messages/mid.1') == '/messages'
+        assert endpoint_group('/me') == '/me'
+    
+    def test_per_endpoint_settings(self):
+        """Тест отдельных настроек TTL и размера для группы"""
+        cache = ResponseCache(ttl=60, maxsize=100, endpoints={'/messages': {'maxsize': 1}})
+        cache.set('/messages/1', None, {'id': 1})
+        cache.set('/messages/2', None, {'id': 2})
+        cache.set('/me', None, {'user_id': 1})
+        
+        assert cache.get('/messages/1') is MISSING
+        assert cache.get('/messages/2') == {'id': 2}
+        assert cache.get('/me') == {'user_id': 1}
+    
+    def test_updates_never_cached(self):
+        """Тест: /updates не кэшируется"""
+        cache = ResponseCache(endpoints={'/updates': {'ttl': 60}})
+        cache.set('/updates', None, {'updates': []})
+        assert cache.get('/updates') is MISSING
+    
+    def test_returns_copy(self, cache):
+        """Тест: изменение полученного ответа не портит кэш"""
+        cache.set('/me', None, {'user_id': 1})
+        cache.get('/me')['user_id'] = 2
+        assert cache.get('/me') == {'user_id': 1}
+    
+    def test_invalidate_ignores_params(self, cache):
+        """Тест: invalidate удаляет ответы конечной точки с любыми параметрами"""
+        cache.set('/subscriptions', None, {'subscriptions': []})
+        cache.set('/subscriptions', {'count': 1}, {'subscriptions': []})
+        cache.set('/messages/1', None, {'id': 1})
+        cache.invalidate('/subscriptions')
+        
+        assert cache.get('/subscriptions') is MISSING
+        assert cache.get('/subscriptions', {'count': 1}) is MISSING
+        assert cache.get('/messages/1') == {'id': 1}
+    
+    def test_set_skips_stale_generation(self, cache):
+        """Тест: ответ, полученный до invalidate, не сохраняется"""
+        generation = cache.generation('/messages/1')
+        cache.invalidate('/messages/1')
+        cache.set('/messages/1', None, {'id': 1}, generation=generation)
+        assert cache.get('/messages/1') is MISSING
+        
+        cache.set('/messages/1', None, {'id': 2}, generation=cache.generation('/messages/1'))
+        assert cache.get('/messages/1') == {'id': 2}
+    
+    def test_generation_is_per_path(self, cache):
+        """Тест: сброс другого пути той же группы не отбрасывает ответ"""
+        generation = cache.generation('/messages/1')
+        cache.invalidate('/messages')
+        cache.invalidate('/messages/2')
+        cache.set('/messages/1', None, {'id': 1}, generation=generation)
+        assert cache.get('/messages/1') == {'id': 1}
+    
+    def test_forgotten_invalidations_are_conservative(self, cache, monkeypatch):
+        """Тест: после вытеснения истории сбросов старые ответы не сохраняются"""
+        monkeypatch.setattr(ResponseCache, 'MAX_TRACKED_INVALIDATIONS', 2)
+        generation = cache.generation('/messages/1')
+        for n in range(2, 5):
+            cache.invalidate(f'/messages/{n}')
+        cache.set('/messages/1', None, {'id': 1}, generation=generation)
+        assert cache.get('/messages/1') is MISSING
+
+
+class _SlowMessage:
+    """Обработчик /messages/mid.1: первый GET ждёт release, отдавая текст до изменения"""
+    
+    def __init__(self):
+        self.text = 'a'
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.gets = 0
+    
+    def __call__(self, request):
+        if request.method == 'POST':
+            return TransportResponse(200, b'{"message": {}}')
+        if request.method == 'PUT':
+            self.text = 'b'
+            return TransportResponse(200, b'{"success": true}')
+        
+        self.gets += 1
+        text = self.text
+        if self.gets == 1:
+            self.started.set()
+            self.release.wait(5)
+        return TransportResponse(200, json.dumps({'body': {'text': text}}).encode('utf-8'))
+
+
+class TestClientCache:
+    """Тесты кэширования в MAXClient"""
+    
+    @responses.activate
+    def test_get_message_cached(self, client, cache):
+        """Тест: повторный get_message берётся из кэша"""
+        responses.add(responses.GET, f"{API}/messages/mid.1", json={"body": {"text": "a"}}, status=200)
+        
+        client.get_message("mid.1")
+        result = client.get_message("mid.1")
+        
+        assert result == {"body": {"text": "a"}}
+        assert len(responses.calls) == 1
+        stats = cache.get_stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['endpoints']['/messages']['size'] == 1
+    
+    @responses.activate
+    def test_edit_invalidates_message(self, client):
+        """Тест: edit_message сбрасывает кэш сообщения"""
+        responses.add(responses.GET, f"{API}/messages/mid.1", json={"body": {"text": "a"}}, status=200)
+        responses.add(responses.PUT, f"{API}/messages/mid.1", json={"success": True}, status=200)
+        responses.add(responses.GET, f"{API}/messages/mid.1", json={"body": {"text": "b"}}, status=200)
+        
+        client.get_message("mid.1")
+        client.edit_message("mid.1", text="b")
+        
+        assert client.get_message("mid.1") == {"body": {"text": "b"}}
+    
+    def test_get_during_edit_not_cached(self, cache):
+        """Тест: GET, начатый до edit_message и завершившийся после него, не попадает в кэш"""
+        handler = _SlowMessage()
+        client = MAXClient(token="test_token", cache=cache, transport=InMemoryTransport(handler))
+        
+        reader = threading.Thread(target=client.get_message, args=("mid.1",))
+        reader.start()
+        assert handler.started.wait(5)
+        client.edit_message("mid.1", text="b")
+        handler.release.set()
+        reader.join(5)
+        
+        assert client.get_message("mid.1") == {"body": {"text": "b"}}
+        assert handler.gets == 2
+    
+    def test_send_does_not_discard_get(self, cache):
+        """Тест: send_message (POST /messages) не отбрасывает выполняющийся get_message"""
+        handler = _SlowMessage()
+        client = MAXClient(token="test_token", cache=cache, transport=InMemoryTransport(handler))
+        
+        reader = threading.Thread(target=client.get_message, args=("mid.1",))
+        reader.start()
+        assert handler.started.wait(5)
+        client.send_message(chat_id=1, text="hi")
+        handler.release.set()
+        reader.join(5)
+        
+        assert client.get_message("mid.1") == {"body": {"text": "a"}}
+        assert handler.gets == 1
+    
+    @responses.activate
+    def test_failed_delete_still_invalidates(self, client, cache):
+        """Тест: кэш сбрасывается даже при ошибке изменяющего запроса"""
+        responses.add(responses.GET, f"{API}/messages/mid.1", json={"body": {}}, status=200)
+        responses.add(responses.DELETE, f"{API}/messages/mid.1", json={"message": "err"}, status=400)
+        
+        client.get_message("mid.1")
+        with pytest.raises(Exception):
+            client.delete_message("mid.1")
+        
+        assert cache.get('/messages/mid.1') is MISSING
+    
+    @responses.activate
+    def test_subscription_changes_invalidate_list(self, client):
+        """Тест: create_subscription сбрасывает кэш get_subscriptions"""
+        responses.add(responses.GET, f"{API}/subscriptions", json={"subscriptions": []}, status=200)
+        responses.add(responses.POST, f"{API}/subscriptions", json={"success": True}, status=200)
+        responses.add(
+            responses.GET, f"{API}/subscriptions",
+            json={"subscriptions": [{"url": "https://example.com/hook"}]}, status=200
+        )
+        
+        assert client.get_subscriptions() == []
+        assert client.get_subscriptions() == []
+        client.create_subscription("https://example.com/hook")
+        
+        assert client.get_subscriptions() == [{"url": "https://example.com/hook"}]
+        assert len(responses.calls) == 3
+    
+    @responses.activate
+    def test_updates_not_cached(self, client):
+        """Тест: get_updates всегда идёт в сеть"""
+        responses.add(responses.GET, f"{API}/updates", json={"updates": [], "marker": 1}, status=200)
+        
+        client.get_updates(timeout=0)
+        client.get_updates(timeout=0)
+        
+        assert len(responses.calls) == 2
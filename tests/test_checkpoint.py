@@ -0,0 +1,81 @@
+"""
+Тесты для хранилищ маркера
+"""
+
+import os
+import stat
+import pytest
+from max_api.checkpoint import (
+    MemoryCheckpointStore,
+    FileCheckpointStore,
+    SQLiteCheckpointStore,
+)
+
+
+@pytest.fixture(params=["memory", "file", "sqlite"])
+def store_factory(request, tmp_path):
+    """Фабрика хранилищ: повторный вызов открывает то же хранилище"""
+    memory = MemoryCheckpointStore()
+    
+    def factory():
+        if request.param == "memory":
+            return memory
+        if request.param == "file":
+            return FileCheckpointStore(str(tmp_path / "marker.json"))
+        return SQLiteCheckpointStore(str(tmp_path / "marker.db"), key="bot")
+    
+    return factory
+
+
+class TestCheckpointStores:
+    """Тесты для хранилищ маркера"""
+    
+    def test_empty_store(self, store_factory):
+        """Тест: пустое хранилище возвращает None"""
+        assert store_factory().load() is None
+    
+    def test_save_and_reload(self, store_factory):
+        """Тест: маркер переживает пересоздание хранилища"""
+        store = store_factory()
+        store.save(100)
+        store.save(200)
+        store.close()
+        
+        reopened = store_factory()
+        assert reopened.load() == 200
+    
+    def test_file_store_leaves_no_temp_files(self, tmp_path):
+        """Тест: атомарная запись не оставляет временных файлов"""
+        store = FileCheckpointStore(str(tmp_path / "marker.json"))
+        for marker in range(10):
+            store.save(marker)
+        
+        assert os.listdir(tmp_path) == ["marker.json"]
+        assert store.load() == 9
+    
+    @pytest.mark.skipif(os.name == "nt", reason="директорию нельзя открыть на Windows")
+    def test_file_store_syncs_directory(self, tmp_path, monkeypatch):
+        """Тест: после переименования на диск сбрасывается и директория"""
+        synced = []
+        fsync = os.fsync
+        
+        def recording_fsync(fd):
+            synced.append(stat.S_ISDIR(os.fstat(fd).st_mode))
+            fsync(fd)
+        
+        monkeypatch.setattr(os, "fsync", recording_fsync)
+        FileCheckpointStore(str(tmp_path / "marker.json")).save(1)
+        
+        assert synced == [False, True]
+    
+    def test_sqlite_keys_are_independent(self, tmp_path):
+        """Тест: маркеры разных ботов в одной базе не пересекаются"""
+        path = str(tmp_path / "markers.db")
+        first = SQLiteCheckpointStore(path, key="bot1")
+        second = SQLiteCheckpointStore(path, key="bot2")
+        
+        first.save(1)
+        second.save(2)
+        
+        assert first.load() == 1
+        assert second.load() == 2
@@ -0,0 +1,171 @@
+"""
+Тесты для автоматического выключателя
+"""
+
+import time
+import pytest
+import responses
+from max_api import MAXClient, CircuitBreaker, CircuitState
+from max_api.exceptions import MAXAPIException, CircuitOpenError, NotFoundError, ServiceUnavailableError
+
+
+def fail():
+    raise MAXAPIException("Ошибка подключения к серверу MAX API")
+
+
+class TestCircuitBreaker:
+    """Тесты для CircuitBreaker"""
+    
+    def test_opens_after_threshold(self):
+        """Тест размыкания после серии ошибок"""
+        breaker = CircuitBreaker(failure_threshold=3, recovery_timeout=60)
+        
+        for _ in range(3):
+            with pytest.raises(MAXAPIException):
+                breaker.call('POST', '/messages', fail)
+        
+        assert breaker.state('POST', '/messages') is CircuitState.OPEN
+        with pytest.raises(CircuitOpenError) as exc_info:
+            breaker.call('POST', '/messages', lambda: 'ok')
+        assert exc_info.value.retry_after > 0
+    
+    def test_success_resets_failures(self):
+        """Тест: успешный запрос сбрасывает счётчик ошибок подряд"""
+        breaker = CircuitBreaker(failure_threshold=2)
+        
+        with pytest.raises(MAXAPIException):
+            breaker.call('GET', '/me', fail)
+        breaker.call('GET', '/me', lambda: 'ok')
+        with pytest.raises(MAXAPIException):
+            breaker.call('GET', '/me', fail)
+        
+        assert breaker.state('GET', '/me') is CircuitState.CLOSED
+    
+    def test_client_errors_do_not_open(self):
+        """Тест: ответы 4xx не размыкают цепь"""
+        breaker = CircuitBreaker(failure_threshold=1)
+        
+        def not_found():
+            raise NotFoundError()
+        
+        with pytest.raises(NotFoundError):
+            breaker.call('GET', '/messages/1', not_found)
+        assert breaker.state('GET', '/messages/1') is CircuitState.CLOSED
+    
+    def test_keyed_by_method_and_endpoint_group(self):
+        """Тест: цепи раздельные для методов и групп конечных точек"""
+        breaker = CircuitBreaker(failure_threshold=1)
+        
+        with pytest.raises(MAXAPIException):
+            breaker.call('GET', '/messages/mid.1', fail)
+        
+        assert breaker.state('GET', '/messages/mid.2') is CircuitState.OPEN
+        assert breaker.state('POST', '/messages') is CircuitState.CLOSED
+        assert breaker.state('GET', '/me') is CircuitState.CLOSED
+    
+    def test_half_open_recovery(self):
+        """Тест: после recovery_timeout пробный запрос замыкает цепь"""
+        changes = []
+        breaker = CircuitBreaker(
+            failure_threshold=1,
+            recovery_timeout=0.05,
+            on_state_change=lambda key, old, new: changes.append((key, old, new))
+        )
+        
+        with pytest.raises(MAXAPIException):
+            breaker.call('GET', '/me', fail)
+        time.sleep(0.06)
+        assert breaker.call('GET', '/me', lambda: 'ok') == 'ok'
+        
+        assert breaker.state('GET', '/me') is CircuitState.CLOSED
+        assert [(old, new) for _, old, new in changes] == [
+            (CircuitState.CLOSED, CircuitState.OPEN),
+            (CircuitState.OPEN, CircuitState.HALF_OPEN),
+            (CircuitState.HALF_OPEN, CircuitState.CLOSED),
+        ]
+        assert changes[0][0] == ('GET', '/me')
+    
+    def test_half_open_failure_reopens(self):
+        """Тест: ошибка пробного запроса снова размыкает цепь"""
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.05)
+        
+        with pytest.raises(MAXAPIException):
+            breaker.call('GET', '/me', fail)
+        time.sleep(0.06)
+        with pytest.raises(MAXAPIException):
+            breaker.call('GET', '/me', fail)
+        
+        assert breaker.state('GET', '/me') is CircuitState.OPEN
+    
+    def test_half_open_limits_probes(self):
+        """Тест: в half_open пропускается ограниченное число пробных запросов"""
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.05, half_open_max_calls=1)
+        
+        with pytest.raises(MAXAPIException):
+            breaker.call('GET', '/me', fail)
+        time.sleep(0.06)
+        
+        def probe():
+            with pytest.raises(CircuitOpenError):
+                breaker.call('GET', '/me', lambda: 'ok')
+            return 'ok'
+        
+        assert breaker.call('GET', '/me', probe) == 'ok'
+        assert breaker.get_stats()['GET /me']['rejected'] == 1
+    
+    def test_interrupted_probe_releases_slot(self):
+        """Тест: прерванный пробный запрос (KeyboardInterrupt) освобождает слот"""
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.05, half_open_max_calls=1)
+        
+        with pytest.raises(MAXAPIException):
+            breaker.call('GET', '/me', fail)
+        time.sleep(0.06)
+        
+        def interrupted():
+            raise KeyboardInterrupt
+        
+        with pytest.raises(KeyboardInterrupt):
+            breaker.call('GET', '/me', interrupted)
+        
+        assert breaker.state('GET', '/me') is CircuitState.HALF_OPEN
+        assert breaker.call('GET', '/me', lambda: 'ok') == 'ok'
+        assert breaker.state('GET', '/me') is CircuitState.CLOSED
+
+
+class TestClientCircuitBreaker:
+    """Тесты выключателя в MAXClient"""
+    
+    @responses.activate
+    def test_fast_fail_without_request(self):
+        """Тест: при разомкнутой цепи запрос не отправляется"""
+        responses.add(
+            responses.POST, "https://platform-api.max.ru/messages",
+            json={"message": "unavailable"}, status=503
+        )
+        client = MAXClient(
+            token="test_token",
+            circuit_breaker=CircuitBreaker(failure_threshold=2, recovery_timeout=60)
+        )
+        
+        for _ in range(2):
+            with pytest.raises(ServiceUnavailableError):
+                client.send_message(chat_id=1, text="hi")
+        with pytest.raises(CircuitOpenError):
+            client.send_message(chat_id=1, text="hi")
+        
+        assert len(responses.calls) == 2
+    
+    @responses.activate
+    def test_other_endpoints_unaffected(self):
+        """Тест: разомкнутая цепь не влияет на другие конечные точки"""
+        responses.add(
+            responses.POST, "https://platform-api.max.ru/messages",
+            json={"message": "unavailable"}, status=503
+        )
+        responses.add(responses.GET, "https://platform-api.max.ru/me", json={"name": "Bot"}, status=200)
+        client = MAXClient(token="test_token", circuit_breaker=CircuitBreaker(failure_threshold=1))
+        
+        with pytest.raises(ServiceUnavailableError):
+            client.send_message(chat_id=1, text="hi")
+        
+        assert client.get_me() == {"name": "Bot"}
@@ -2,10 +2,16 @@
 Тесты для MAXClient
 """
 
+import os
+import json
+import signal
+import threading
 import pytest
+import requests
 import responses
-from max_api import MAXClient
+from max_api import MAXClient, HedgePolicy, ResponseCache
 from max_api.exceptions import (
+    MAXAPIException,
     AuthenticationError,
     BadRequestError,
     NotFoundError,
@@ -131,6 +137,70 @@ class TestMAXClient:
         result = client.get_updates()
         assert len(result) == 1
         assert result[0]['update_type'] == "message_created"
+        assert result.marker == 100
+    
+    @responses.activate
+    def test_get_updates_uses_poll_lane(self, client):
+        """Тест: Long Polling не расходует лимит отправки и не занимает её пул"""
+        responses.add(
+            responses.GET,
+            "https://platform-api.max.ru/updates",
+            json={"updates": [], "marker": 1},
+            status=200
+        )
+        
+        client.get_updates(timeout=5)
+        
+        assert client._poll_transport is not client._transport
+        assert client.rate_limiter.get_stats()['acquired'] == 0
+        assert client.poll_rate_limiter is None
+    
+    @responses.activate
+    def test_poll_lane_own_rate_limit(self):
+        """Тест отдельного лимита для Long Polling"""
+        responses.add(
+            responses.GET,
+            "https://platform-api.max.ru/updates",
+            json={"updates": [], "marker": 1},
+            status=200
+        )
+        client = MAXClient(token="test_token", poll_requests_per_second=2)
+        
+        client.get_updates(timeout=5)
+        
+        assert client.poll_rate_limiter.get_stats()['acquired'] == 1
+        assert client.rate_limiter.get_stats()['acquired'] == 0
+    
+    def test_poll_read_timeout_from_server_timeout(self, client):
+        """Тест: таймаут чтения Long Polling = серверный таймаут + запас"""
+        assert client._poll_read_timeout(30) == 35
+        assert client._poll_read_timeout(10) == 15
+        
+        fixed = MAXClient(token="test_token", poll_read_timeout=60)
+        assert fixed._poll_read_timeout(30) == 60
+    
+    @responses.activate
+    def test_expired_poll_returns_empty_batch(self, client):
+        """Тест: истёкший Long Polling возвращает пустой список"""
+        responses.add(
+            responses.GET,
+            "https://platform-api.max.ru/updates",
+            body=requests.exceptions.ReadTimeout()
+        )
+        
+        assert client.get_updates(timeout=30) == []
+    
+    @responses.activate
+    def test_poll_connect_timeout_raises(self, client):
+        """Тест: таймаут соединения при Long Polling остаётся ошибкой"""
+        responses.add(
+            responses.GET,
+            "https://platform-api.max.ru/updates",
+            body=requests.exceptions.ConnectTimeout()
+        )
+        
+        with pytest.raises(MAXAPIException, match="Превышено время ожидания"):
+            client.get_updates(timeout=30)
     
     @responses.activate
     def test_rate_limit_error(self, client):
@@ -163,3 +233,134 @@ class TestMAXClient:
         
         with pytest.raises(ValueError):
             validate_chat_id("invalid")
+
+
+class TestThreadSafety:
+    """Тесты использования одного клиента из многих потоков"""
+    
+    @responses.activate
+    def test_session_per_thread(self, client):
+        """Тест: каждый поток получает свою сессию поверх общего пула"""
+        responses.add(responses.POST, "https://platform-api.max.ru/messages", json={"message": {}})
+        sessions = []
+        errors = []
+        
+        def worker():
+            try:
+                for _ in range(10):
+                    client.send_message(chat_id=-5, text="Привет")
+                sessions.append(client._transport.session)
+            except Exception as e:
+                errors.append(e)
+        
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert errors == []
+        assert len(responses.calls) == 80
+        assert len({id(session) for session in sessions}) == 8
+        assert all(session.get_adapter("https://platform-api.max.ru") is client._transport.adapter for session in sessions)
+        assert client.rate_limiter.get_stats()['acquired'] == 80
+    
+    def test_hedge_executor_created_once(self):
+        """Тест: пул потоков хеджирования создаётся один раз при гонке потоков"""
+        client = MAXClient(token="test_token", hedge_policy=HedgePolicy())
+        executors = []
+        barrier = threading.Barrier(8)
+        
+        def worker():
+            barrier.wait()
+            executors.append(client._get_hedge_executor())
+        
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        client.close()
+        
+        assert len({id(executor) for executor in executors}) == 1
+
+
+def _run_in_child(func):
+    """Выполнение func() в дочернем процессе после os.fork(); результат через pipe"""
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        # Зависание из-за унаследованной блокировки завершит процесс по таймеру
+        signal.alarm(5)
+        try:
+            result = func()
+        except BaseException as e:
+            result = {'error': repr(e)}
+        os.write(write_fd, json.dumps(result).encode('utf-8'))
+        os._exit(0)
+    
+    os.close(write_fd)
+    data = b''
+    while True:
+        chunk = os.read(read_fd, 65536)
+        if not chunk:
+            break
+        data += chunk
+    os.close(read_fd)
+    os.waitpid(pid, 0)
+    assert data, "дочерний процесс завершился без результата"
+    return json.loads(data)
+
+
+@pytest.mark.skipif(not hasattr(os, 'register_at_fork'), reason="нет os.fork")
+class TestFork:
+    """Тесты восстановления клиента в дочернем процессе"""
+    
+    def test_child_rebuilds_transports(self):
+        """Тест: дочерний процесс получает новые пулы соединений"""
+        client = MAXClient(token="test_token")
+        parent = (id(client._transport), id(client._poll_transport))
+        
+        def child():
+            return [id(client._transport), id(client._poll_transport)]
+        
+        result = _run_in_child(child)
+        
+        assert result[0] != parent[0]
+        assert result[1] != parent[1]
+        # В родителе транспорты прежние
+        assert (id(client._transport), id(client._poll_transport)) == parent
+    
+    def test_child_does_not_inherit_held_locks(self):
+        """Тест: блокировки, захваченные в момент fork, не блокируют дочерний процесс"""
+        cache = ResponseCache()
+        client = MAXClient(token="test_token", cache=cache)
+        started = threading.Event()
+        finish = threading.Event()
+        
+        def in_flight():
+            started.set()
+            finish.wait()
+            return {}
+        
+        leader = threading.Thread(target=client.single_flight.do, args=('key', in_flight))
+        leader.start()
+        started.wait()
+        
+        def child():
+            client.rate_limiter.acquire()
+            cache.set('/me', None, {'user_id': 1})
+            return {
+                'in_flight': client.single_flight.in_flight,
+                'cached': cache.get('/me'),
+            }
+        
+        client.rate_limiter._lock.acquire()
+        try:
+            result = _run_in_child(child)
+        finally:
+            client.rate_limiter._lock.release()
+            finish.set()
+            leader.join()
+        
+        assert result == {'in_flight': 0, 'cached': {'user_id': 1}}
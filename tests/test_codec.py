@@ -0,0 +1,86 @@
+"""
+Тесты для JSON кодеков
+"""
+
+import json
+import pytest
+import responses
+from max_api import MAXClient
+from max_api.codec import JSONCodec, get_codec, PREFERRED
+from max_api.exceptions import MAXAPIException
+
+
+def installed_codecs():
+    """Названия установленных кодеков"""
+    names = []
+    for name in PREFERRED:
+        try:
+            get_codec(name)
+            names.append(name)
+        except ImportError:
+            pass
+    return names
+
+
+class TestCodec:
+    """Тесты для get_codec и JSONCodec"""
+    
+    @pytest.mark.parametrize("name", installed_codecs())
+    def test_roundtrip(self, name):
+        """Тест: кодек возвращает bytes и разбирает bytes"""
+        codec = get_codec(name)
+        data = {"text": "Привет", "attachments": [{"payload": {"id": 1}}], "flag": True, "none": None}
+        
+        encoded = codec.dumps(data)
+        assert isinstance(encoded, bytes)
+        assert json.loads(encoded) == data
+        assert codec.loads(encoded) == data
+    
+    def test_stdlib_compact_utf8(self):
+        """Тест: стандартный кодек пишет UTF-8 без экранирования и пробелов"""
+        assert get_codec('json').dumps({"a": "я"}) == '{"a":"я"}'.encode('utf-8')
+    
+    def test_default_prefers_fast_codec(self):
+        """Тест: по умолчанию выбирается первый установленный кодек"""
+        assert get_codec().name == installed_codecs()[0]
+    
+    def test_unknown_codec(self):
+        """Тест: неизвестное название кодека"""
+        with pytest.raises(ValueError):
+            get_codec('yaml')
+    
+    def test_custom_codec(self):
+        """Тест: передача собственного кодека"""
+        codec = JSONCodec('custom', lambda obj: b'{}', lambda data: {'custom': True})
+        assert get_codec(codec) is codec
+
+
+class TestClientCodec:
+    """Тесты использования кодека в MAXClient"""
+    
+    @responses.activate
+    @pytest.mark.parametrize("name", installed_codecs())
+    def test_send_message_body(self, name):
+        """Тест: тело отправляется заранее закодированными байтами"""
+        responses.add(
+            responses.POST, "https://platform-api.max.ru/messages",
+            json={"message": {"body": {"text": "Привет"}}}, status=200
+        )
+        client = MAXClient(token="test_token", json_codec=name)
+        
+        result = client.send_message(chat_id=1, text="Привет")
+        
+        request = responses.calls[0].request
+        assert request.headers['Content-Type'] == 'application/json'
+        assert isinstance(request.body, bytes)
+        assert json.loads(request.body)['text'] == "Привет"
+        assert result == {"message": {"body": {"text": "Привет"}}}
+    
+    @responses.activate
+    def test_invalid_json_response(self):
+        """Тест: некорректный JSON в ответе"""
+        responses.add(responses.GET, "https://platform-api.max.ru/me", body="not json", status=200)
+        client = MAXClient(token="test_token")
+        
+        with pytest.raises(MAXAPIException, match="JSON"):
+            client.get_me()
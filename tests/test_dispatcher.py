@@ -0,0 +1,167 @@
+"""
+Тесты для Dispatcher
+"""
+
+import threading
+import pytest
+from max_api import Dispatcher, UpdateManager, UpdatesBatch
+from max_api.checkpoint import MemoryCheckpointStore
+from max_api.exceptions import ServiceUnavailableError
+
+
+def message(text):
+    """Обновление message_created с текстом"""
+    return {"update_type": "message_created", "message": {"body": {"text": text}}}
+
+
+def callback(payload):
+    """Обновление message_callback с payload"""
+    return {"update_type": "message_callback", "callback": {"payload": payload}}
+
+
+class TestDispatcher:
+    """Тесты для класса Dispatcher"""
+    
+    def test_route_by_update_type(self):
+        """Тест маршрутизации по типу обновления"""
+        dp = Dispatcher()
+        dp.add_handler("bot_started", lambda u: "started")
+        dp.add_handler("message_created", lambda u: "message")
+        
+        assert dp.dispatch({"update_type": "bot_started"}) == "started"
+        assert dp.dispatch(message("hello")) == "message"
+        assert dp.dispatch({"update_type": "unknown"}) is None
+    
+    def test_route_by_command(self):
+        """Тест маршрутизации по команде"""
+        dp = Dispatcher()
+        
+        @dp.command("start")
+        def start(update):
+            return "start"
+        
+        @dp.on("message_created")
+        def fallback(update):
+            return "text"
+        
+        assert dp.dispatch(message("/start")) == "start"
+        assert dp.dispatch(message("/Start@my_bot now")) == "start"
+        assert dp.dispatch(message("/help")) == "text"
+        assert dp.dispatch(message("start")) == "text"
+        assert dp.dispatch(message("/")) == "text"
+    
+    def test_route_by_callback_payload(self):
+        """Тест маршрутизации по payload: точное совпадение важнее префикса"""
+        dp = Dispatcher()
+        dp.add_callback(lambda u: "rating", prefix="rating_")
+        dp.add_callback(lambda u: "rating_top", prefix="rating_top_")
+        dp.add_callback(lambda u: "exact", payload="rating_5")
+        dp.set_default(lambda u: "default")
+        
+        assert dp.dispatch(callback("rating_1")) == "rating"
+        assert dp.dispatch(callback("rating_top_3")) == "rating_top"
+        assert dp.dispatch(callback("rating_5")) == "exact"
+        assert dp.dispatch(callback("stats")) == "default"
+    
+    def test_add_callback_requires_one_matcher(self):
+        """Тест: нужно указать либо payload, либо prefix"""
+        dp = Dispatcher()
+        
+        with pytest.raises(ValueError):
+            dp.add_callback(lambda u: None)
+        with pytest.raises(ValueError):
+            dp.add_callback(lambda u: None, payload="a", prefix="b")
+    
+    def test_middleware_chain(self):
+        """Тест: middleware вызываются по порядку и могут остановить обработку"""
+        dp = Dispatcher()
+        calls = []
+        dp.add_handler("message_created", lambda u: calls.append("handler") or "done")
+        
+        @dp.middleware
+        def first(update, call_next):
+            calls.append("first")
+            return call_next(update)
+        
+        @dp.middleware
+        def block_spam(update, call_next):
+            calls.append("second")
+            if "spam" in update["message"]["body"]["text"]:
+                return None
+            return call_next(update)
+        
+        assert dp.dispatch(message("hi")) == "done"
+        assert calls == ["first", "second", "handler"]
+        
+        calls.clear()
+        assert dp.dispatch(message("spam")) is None
+        assert calls == ["first", "second"]
+    
+    def test_feed_with_error_handler(self):
+        """Тест: ошибка одного обработчика не прерывает пачку"""
+        errors = []
+        dp = Dispatcher(error_handler=lambda update, exc: errors.append(exc))
+        handled = []
+        
+        def handler(update):
+            if update["message"]["body"]["text"] == "bad":
+                raise RuntimeError("boom")
+            handled.append(update)
+        
+        dp.add_handler("message_created", handler)
+        
+        assert dp.feed([message("a"), message("bad"), message("b")]) == 3
+        assert len(handled) == 2
+        assert len(errors) == 1
+
+
+class _FlakyClient:
+    """Клиент-заглушка: первый запрос /updates завершается 503, затем приходит пачка"""
+    
+    def __init__(self, stop_event):
+        self.stop_event = stop_event
+        self.calls = 0
+    
+    def get_updates(self, timeout=30, marker=None):
+        self.calls += 1
+        if self.calls == 1:
+            raise ServiceUnavailableError()
+        if self.calls == 2:
+            return UpdatesBatch([message("after 503")], marker=10)
+        self.stop_event.set()
+        return UpdatesBatch()
+
+
+class TestRunPolling:
+    """Тесты цикла Long Polling"""
+    
+    def test_survives_api_error(self):
+        """Тест: ошибка /updates не завершает цикл, после паузы опрос продолжается"""
+        stop_event = threading.Event()
+        client = _FlakyClient(stop_event)
+        store = MemoryCheckpointStore()
+        manager = UpdateManager(client, checkpoint_store=store)
+        handled = []
+        dp = Dispatcher()
+        dp.add_handler("message_created", handled.append)
+        
+        dp.run_polling(manager, stop_event=stop_event, error_delay=0.01)
+        
+        assert client.calls == 3
+        assert handled == [message("after 503")]
+        assert store.load() == 10
+    
+    def test_handler_error_propagates(self):
+        """Тест: ошибка обработчика без error_handler по-прежнему завершает цикл"""
+        stop_event = threading.Event()
+        client = _FlakyClient(stop_event)
+        client.calls = 1
+        dp = Dispatcher()
+        
+        def handler(update):
+            raise RuntimeError("boom")
+        
+        dp.add_handler("message_created", handler)
+        
+        with pytest.raises(RuntimeError):
+            dp.run_polling(UpdateManager(client), stop_event=stop_event, error_delay=0.01)
@@ -0,0 +1,117 @@
+"""
+Тесты для ShardedExecutor
+"""
+
+import time
+import threading
+import pytest
+from max_api import ShardedExecutor
+
+
+def update(chat_id, n):
+    """Обновление из чата chat_id с порядковым номером n"""
+    return {"chat_id": chat_id, "n": n}
+
+
+class TestShardedExecutor:
+    """Тесты для класса ShardedExecutor"""
+    
+    def test_order_within_chat(self):
+        """Тест: обновления одного чата обрабатываются по порядку"""
+        seen = {}
+        lock = threading.Lock()
+        
+        def handler(u):
+            time.sleep(0.001)
+            with lock:
+                seen.setdefault(u["chat_id"], []).append(u["n"])
+        
+        with ShardedExecutor(handler, num_workers=4) as executor:
+            for n in range(20):
+                for chat_id in (1, 2, 3, 4, 5):
+                    executor.submit(update(chat_id, n))
+            executor.join()
+        
+        assert set(seen) == {1, 2, 3, 4, 5}
+        for numbers in seen.values():
+            assert numbers == list(range(20))
+    
+    def test_slow_chat_does_not_block_others(self):
+        """Тест: медленный обработчик одного чата не задерживает другие шарды"""
+        release = threading.Event()
+        fast_done = threading.Event()
+        
+        def handler(u):
+            if u["chat_id"] == 0:
+                release.wait(2)
+            else:
+                fast_done.set()
+        
+        executor = ShardedExecutor(handler, num_workers=2)
+        with executor:
+            executor.submit(update(0, 0))
+            executor.submit(update(1, 0))
+            
+            assert fast_done.wait(1)
+            release.set()
+    
+    def test_batch_callback_after_all_updates(self):
+        """Тест: on_done пачки вызывается после обработки всех её обновлений"""
+        processed = []
+        done = threading.Event()
+        
+        with ShardedExecutor(processed.append, num_workers=3) as executor:
+            count = executor.submit_batch(
+                [update(chat_id, 0) for chat_id in range(10)],
+                on_done=done.set
+            )
+            assert done.wait(1)
+        
+        assert count == 10
+        assert len(processed) == 10
+    
+    def test_failed_batch_not_acked(self):
+        """Тест: ошибка обработчика одного обновления не даёт подтвердить пачку"""
+        acked = []
+        
+        def handler(u):
+            if u["chat_id"] == 3:
+                raise ValueError("boom")
+        
+        executor = ShardedExecutor(handler, num_workers=3, error_handler=lambda u, exc: None)
+        with executor:
+            executor.submit_batch([update(chat_id, 0) for chat_id in range(5)], on_done=lambda: acked.append("bad"))
+            executor.submit_batch([update(chat_id, 1) for chat_id in (1, 2)], on_done=lambda: acked.append("good"))
+            executor.submit(update(3, 2), on_done=lambda: acked.append("single"))
+            executor.join()
+        
+        assert acked == ["good"]
+    
+    def test_stats_and_errors(self):
+        """Тест метрик шардов и обработки ошибок"""
+        errors = []
+        
+        def handler(u):
+            if u["n"] == 1:
+                raise ValueError("boom")
+        
+        executor = ShardedExecutor(
+            handler, num_workers=2,
+            error_handler=lambda u, exc: errors.append(exc)
+        )
+        with executor:
+            for n in range(3):
+                executor.submit(update(7, n))
+            executor.join()
+            stats = executor.get_stats()
+        
+        assert stats['processed'] == 3
+        assert stats['errors'] == 1
+        assert len(errors) == 1
+        assert len(stats['shards']) == 2
+        assert sum(s['processed'] for s in stats['shards']) == 3
+    
+    def test_invalid_workers(self):
+        """Тест: нужен хотя бы один рабочий поток"""
+        with pytest.raises(ValueError):
+            ShardedExecutor(lambda u: None, num_workers=0)
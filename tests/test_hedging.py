@@ -0,0 +1,172 @@
+"""
+Тесты для хеджирования GET запросов
+"""
+
+import time
+import threading
+import pytest
+import responses
+from max_api import MAXClient, HedgePolicy
+from max_api.exceptions import NotFoundError
+from max_api.utils import RateLimiter
+
+
+URL = "https://platform-api.max.ru/messages/mid.1"
+
+
+def slow_first_callback(delay):
+    """Ответ сервера: первый запрос медленный, остальные быстрые"""
+    lock = threading.Lock()
+    calls = []
+    
+    def callback(request):
+        with lock:
+            calls.append(1)
+            number = len(calls)
+        if number == 1:
+            time.sleep(delay)
+            return 200, {}, '{"body": {"text": "slow"}}'
+        return 200, {}, '{"body": {"text": "fast"}}'
+    
+    return callback
+
+
+def close_client(client):
+    """Закрытие клиента с ожиданием проигравших попыток (иначе они попадут в следующий тест)"""
+    if client._hedge_executor is not None:
+        client._hedge_executor.shutdown(wait=True)
+    client.close()
+
+
+class TestHedgePolicy:
+    """Тесты для HedgePolicy"""
+    
+    def test_initial_delay(self):
+        """Тест задержки до накопления замеров"""
+        policy = HedgePolicy(initial_delay=0.3, min_samples=5)
+        assert policy.delay('/messages/1') == 0.3
+    
+    def test_percentile_delay(self):
+        """Тест расчёта задержки по перцентилю"""
+        policy = HedgePolicy(percentile=90, min_samples=10, min_delay=0)
+        for i in range(1, 101):
+            policy.record('/messages/1', i / 100)
+        
+        assert policy.delay('/messages/2') == pytest.approx(0.91)
+        assert policy.delay('/me') == policy.initial_delay
+    
+    def test_delay_bounds(self):
+        """Тест ограничения задержки"""
+        policy = HedgePolicy(min_samples=1, min_delay=0.1, max_delay=0.5)
+        policy.record('/me', 0.01)
+        assert policy.delay('/me') == 0.1
+        policy.record('/me', 10.0)
+        assert policy.delay('/me') == 0.5
+    
+    def test_invalid_percentile(self):
+        """Тест валидации перцентиля"""
+        with pytest.raises(ValueError):
+            HedgePolicy(percentile=0)
+
+
+class TestRateLimiterTryAcquire:
+    """Тесты для RateLimiter.try_acquire"""
+    
+    def test_try_acquire_does_not_queue(self):
+        """Тест: try_acquire не уходит в минус и не ждёт"""
+        limiter = RateLimiter(max_requests=2, time_window=10.0)
+        assert limiter.try_acquire()
+        assert limiter.try_acquire()
+        assert not limiter.try_acquire()
+        assert limiter.get_stats()['acquired'] == 2
+
+
+class TestClientHedging:
+    """Тесты хеджирования в MAXClient"""
+    
+    @responses.activate
+    def test_hedge_wins_on_slow_response(self):
+        """Тест: при медленном ответе используется ответ копии"""
+        responses.add_callback(responses.GET, URL, callback=slow_first_callback(0.5))
+        client = MAXClient(token="test_token", hedge_policy=HedgePolicy(initial_delay=0.05))
+        
+        started = time.monotonic()
+        result = client.get_message("mid.1")
+        elapsed = time.monotonic() - started
+        close_client(client)
+        
+        assert result == {"body": {"text": "fast"}}
+        assert elapsed < 0.4
+        stats = client.hedge_policy.get_stats()
+        assert stats['hedged'] == 1
+        assert stats['hedge_wins'] == 1
+        assert stats['hedge_win_rate'] == 1.0
+        # Копия получает разрешение через планировщик полос
+        assert client.scheduler.get_stats()['interactive']['granted'] == 2
+    
+    @responses.activate
+    def test_delay_counted_from_start(self):
+        """Тест: ожидание свободного потока в пуле не засчитывается в задержку"""
+        def callback(request):
+            time.sleep(0.05)
+            return 200, {}, '{"body": {"text": "ok"}}'
+        
+        responses.add_callback(responses.GET, URL, callback=callback)
+        client = MAXClient(token="test_token", hedge_policy=HedgePolicy(initial_delay=0.2, max_workers=1))
+        client._get_hedge_executor().submit(time.sleep, 0.3)
+        
+        assert client.get_message("mid.1") == {"body": {"text": "ok"}}
+        close_client(client)
+        
+        assert len(responses.calls) == 1
+        assert client.hedge_policy.get_stats()['hedged'] == 0
+    
+    @responses.activate
+    def test_no_hedge_on_fast_response(self):
+        """Тест: быстрый ответ не порождает копию"""
+        responses.add(responses.GET, URL, json={"body": {"text": "ok"}}, status=200)
+        client = MAXClient(token="test_token", hedge_policy=HedgePolicy(initial_delay=1.0))
+        
+        assert client.get_message("mid.1") == {"body": {"text": "ok"}}
+        close_client(client)
+        
+        assert len(responses.calls) == 1
+        assert client.hedge_policy.get_stats()['hedged'] == 0
+    
+    @responses.activate
+    def test_hedge_capped_by_rate_limit(self):
+        """Тест: копия не отправляется, если в лимитере нет токена"""
+        responses.add_callback(responses.GET, URL, callback=slow_first_callback(0.2))
+        client = MAXClient(
+            token="test_token",
+            max_requests_per_second=1,
+            hedge_policy=HedgePolicy(initial_delay=0.05)
+        )
+        
+        result = client.get_message("mid.1")
+        close_client(client)
+        
+        assert result == {"body": {"text": "slow"}}
+        assert len(responses.calls) == 1
+        assert client.hedge_policy.get_stats()['rate_limited'] == 1
+    
+    @responses.activate
+    def test_errors_propagate(self):
+        """Тест: ошибка API возвращается вызывающему"""
+        responses.add(responses.GET, URL, json={"message": "not found"}, status=404)
+        client = MAXClient(token="test_token", hedge_policy=HedgePolicy())
+        
+        with pytest.raises(NotFoundError):
+            client.get_message("mid.1")
+        close_client(client)
+    
+    @responses.activate
+    def test_writes_not_hedged(self):
+        """Тест: изменяющие запросы не хеджируются"""
+        responses.add(responses.DELETE, URL, json={"success": True}, status=200)
+        client = MAXClient(token="test_token", hedge_policy=HedgePolicy(initial_delay=0.01))
+        
+        client.delete_message("mid.1")
+        close_client(client)
+        
+        assert client.hedge_policy.get_stats()['requests'] == 0
@@ -0,0 +1,97 @@
+"""
+Тесты ленивого импорта пакета
+
+Каждая проверка выполняется в отдельном интерпретаторе: в процессе pytest
+модули пакета уже импортированы другими тестами.
+"""
+
+import os
+import sys
+import json
+import subprocess
+import pytest
+
+import max_api
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = (
+    'requests', 'urllib3', 'aiohttp', 'httpx', 'asyncio',
+    'sqlite3', 'mmap', 'concurrent.futures',
+)
+
+
+def _run(code):
+    """Выполнение кода в новом интерпретаторе; код печатает JSON"""
+    output = subprocess.run(
+        [sys.executable, '-c', code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def _loaded_after(statement):
+    """Какие из тяжёлых модулей загружены после выполнения statement"""
+    return _run(
+        f"import sys, json\n{statement}\n"
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    )
+
+
+class TestLazyImport:
+    """Тесты ленивой загрузки max_api"""
+    
+    def test_package_import_is_light(self):
+        """Тест: import max_api не загружает HTTP библиотеки и asyncio"""
+        assert _loaded_after("import max_api") == []
+    
+    def test_helpers_do_not_load_transports(self):
+        """Тест: исключения и утилиты не тянут за собой клиентов"""
+        loaded = _loaded_after(
+            "from max_api import MAXAPIException, RateLimitError, UpdatesBatch, RetryPolicy, Dispatcher\n"
+            "from max_api.utils import validate_chat_id"
+        )
+        assert loaded == []
+    
+    def test_client_import_is_light(self):
+        """Тест: импорт MAXClient не загружает HTTP библиотеки, asyncio и sqlite3"""
+        assert _loaded_after("from max_api import MAXClient") == []
+    
+    def test_client_loads_only_its_transport(self):
+        """Тест: MAXClient загружает только библиотеку своего транспорта"""
+        loaded = _loaded_after("from max_api import MAXClient\nMAXClient(token='test')")
+        
+        assert 'requests' in loaded
+        assert 'aiohttp' not in loaded
+        assert 'httpx' not in loaded
+        assert 'asyncio' not in loaded
+        assert 'sqlite3' not in loaded
+    
+    def test_urllib3_transport_skips_requests(self):
+        """Тест: транспорт urllib3 не загружает requests"""
+        loaded = _loaded_after("from max_api import MAXClient\nMAXClient(token='test', transport='urllib3')")
+        
+        assert 'urllib3' in loaded
+        assert 'requests' not in loaded
+    
+    def test_attributes(self):
+        """Тест: все имена из __all__ доступны"""
+        for name in max_api.__all__:
+            assert getattr(max_api, name) is not None
+        assert set(max_api.__all__) <= set(dir(max_api))
+    
+    def test_unknown_attribute(self):
+        """Тест: неизвестное имя - AttributeError"""
+        with pytest.raises(AttributeError):
+            max_api.NoSuchClient
+    
+    def test_star_import(self):
+        """Тест: from max_api import * импортирует все публичные имена"""
+        names = _run(
+            "import json\nfrom max_api import *\n"
+            "print(json.dumps(sorted(n for n in dir() if not n.startswith('_') and n != 'json')))"
+        )
+        assert names == sorted(max_api.__all__)
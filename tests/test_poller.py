@@ -0,0 +1,87 @@
+"""
+Тесты для Poller
+"""
+
+import time
+import threading
+from max_api import UpdateManager, UpdatesBatch, Poller
+from max_api.checkpoint import MemoryCheckpointStore
+
+
+class SequenceClient:
+    """Клиент-заглушка: каждая пачка содержит одно обновление и маркер"""
+    
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+        self.lock = threading.Lock()
+    
+    def get_updates(self, timeout=30, marker=None):
+        time.sleep(self.delay)
+        with self.lock:
+            self.calls += 1
+            n = self.calls
+        return UpdatesBatch([{"n": n}], marker=n)
+
+
+def wait_for(condition, timeout=2.0):
+    """Ожидание выполнения условия"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestPoller:
+    """Тесты для класса Poller"""
+    
+    def test_prefetch_and_ack(self):
+        """Тест: пачки приходят по порядку, маркер фиксируется после ack"""
+        store = MemoryCheckpointStore()
+        manager = UpdateManager(SequenceClient(), checkpoint_store=store)
+        
+        with Poller(manager, max_queue_size=2) as poller:
+            first = poller.get(timeout=1)
+            second = poller.get(timeout=1)
+            assert first[0]["n"] == 1
+            assert second[0]["n"] == 2
+            
+            # Подтверждение не по порядку не сдвигает маркер за необработанную пачку
+            poller.ack(second)
+            assert store.load() is None
+            
+            poller.ack(first)
+            assert store.load() == 2
+    
+    def test_backpressure(self):
+        """Тест: при заполненной очереди новые пачки не запрашиваются"""
+        client = SequenceClient()
+        manager = UpdateManager(client)
+        
+        with Poller(manager, max_queue_size=2) as poller:
+            assert wait_for(lambda: poller.queue_depth == 2)
+            time.sleep(0.2)
+            
+            # 2 пачки в очереди + 1, ожидающая места
+            assert client.calls == 3
+            
+            poller.get(timeout=1)
+            assert wait_for(lambda: client.calls == 4)
+    
+    def test_stats(self):
+        """Тест метрик очереди и задержки"""
+        manager = UpdateManager(SequenceClient(delay=0.01))
+        
+        with Poller(manager, max_queue_size=1) as poller:
+            assert wait_for(lambda: poller.queue_depth == 1)
+            time.sleep(0.05)
+            batch = poller.get(timeout=1)
+            poller.ack(batch)
+            stats = poller.get_stats()
+        
+        assert stats['dispatched_batches'] == 1
+        assert stats['fetched_batches'] >= 1
+        assert stats['max_lag'] >= 0.05
+        assert not poller.is_running
@@ -0,0 +1,137 @@
+"""
+Тесты для политики повторных запросов
+"""
+
+import pytest
+import responses
+from max_api import MAXClient, RetryPolicy, RetryBudget
+from max_api.exceptions import (
+    MAXAPIException,
+    BadRequestError,
+    RateLimitError,
+    ServiceUnavailableError,
+)
+from max_api.retry import parse_retry_after
+
+
+class TestRetryPolicy:
+    """Тесты для RetryPolicy"""
+    
+    def test_exponential_backoff_without_jitter(self):
+        """Тест экспоненциального роста задержки"""
+        policy = RetryPolicy(backoff_base=0.5, backoff_max=3.0, jitter=False)
+        
+        assert [policy.backoff(n) for n in range(1, 6)] == [0.5, 1.0, 2.0, 3.0, 3.0]
+    
+    def test_backoff_with_jitter(self):
+        """Тест: задержка с jitter не превышает экспоненциальную"""
+        policy = RetryPolicy(backoff_base=1.0, jitter=True)
+        
+        for _ in range(100):
+            assert 0 <= policy.backoff(3) <= 4.0
+    
+    def test_retry_after_is_respected(self):
+        """Тест использования Retry-After"""
+        policy = RetryPolicy(max_attempts=3, jitter=False)
+        error = RateLimitError(retry_after=7)
+        
+        assert policy.next_delay('GET', error, 1) == 7
+    
+    def test_long_retry_after_not_retried(self):
+        """Тест: Retry-After больше max_retry_after не ожидается"""
+        policy = RetryPolicy(max_attempts=3, total_timeout=None, backoff_max=10.0)
+        
+        assert policy.next_delay('GET', RateLimitError(retry_after=10), 1) == 10
+        assert policy.next_delay('GET', RateLimitError(retry_after=3600), 1) is None
+        assert RetryPolicy(total_timeout=None, max_retry_after=7200).next_delay(
+            'GET', RateLimitError(retry_after=3600), 1
+        ) == 3600
+    
+    def test_no_retry_for_non_idempotent(self):
+        """Тест: POST повторяется только по явному согласию"""
+        error = ServiceUnavailableError()
+        
+        assert RetryPolicy().next_delay('POST', error, 1) is None
+        assert RetryPolicy(retry_non_idempotent=True).next_delay('POST', error, 1) is not None
+    
+    def test_no_retry_for_other_errors(self):
+        """Тест: ошибки клиента не повторяются"""
+        assert RetryPolicy().next_delay('GET', BadRequestError(), 1) is None
+    
+    def test_max_attempts_and_deadline(self):
+        """Тест ограничения по числу попыток и общему времени"""
+        policy = RetryPolicy(max_attempts=2, total_timeout=1.0, jitter=False)
+        deadline = policy.start()
+        
+        assert policy.next_delay('GET', RateLimitError(), 2, deadline) is None
+        assert policy.next_delay('GET', RateLimitError(retry_after=5), 1, deadline) is None
+    
+    def test_budget_stops_retry_storm(self):
+        """Тест: общий бюджет ограничивает количество повторов"""
+        budget = RetryBudget(ratio=0.5, max_tokens=2)
+        policy = RetryPolicy(max_attempts=10, jitter=False, budget=budget)
+        
+        assert policy.next_delay('GET', RateLimitError(), 1) is not None
+        assert policy.next_delay('GET', RateLimitError(), 2) is not None
+        assert policy.next_delay('GET', RateLimitError(), 3) is None
+        
+        # Успешные исходные запросы снова пополняют бюджет
+        policy.start()
+        policy.start()
+        assert policy.next_delay('GET', RateLimitError(), 1) is not None
+    
+    def test_parse_retry_after(self):
+        """Тест разбора заголовка Retry-After"""
+        assert parse_retry_after("3") == 3.0
+        assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+        assert parse_retry_after("garbage") is None
+        assert parse_retry_after(None) is None
+
+
+class TestClientRetry:
+    """Тесты повторов в MAXClient"""
+    
+    @responses.activate
+    def test_retry_then_success(self):
+        """Тест повтора после 503 с Retry-After"""
+        responses.add(
+            responses.GET, "https://platform-api.max.ru/me",
+            json={"error": "busy"}, status=503, headers={"Retry-After": "0"}
+        )
+        responses.add(
+            responses.GET, "https://platform-api.max.ru/me",
+            json={"name": "Test Bot"}, status=200
+        )
+        
+        client = MAXClient(token="t", retry_policy=RetryPolicy(max_attempts=3))
+        assert client.get_me() == {"name": "Test Bot"}
+        assert len(responses.calls) == 2
+    
+    @responses.activate
+    def test_retry_exhausted(self):
+        """Тест: после исчерпания попыток выбрасывается исходное исключение"""
+        responses.add(
+            responses.GET, "https://platform-api.max.ru/me",
+            json={"error": "slow down"}, status=429, headers={"Retry-After": "0"}
+        )
+        
+        client = MAXClient(token="t", retry_policy=RetryPolicy(max_attempts=3))
+        with pytest.raises(RateLimitError) as exc_info:
+            client.get_me()
+        
+        assert exc_info.value.retry_after == 0
+        assert len(responses.calls) == 3
+    
+    @responses.activate
+    def test_post_not_retried_by_default(self):
+        """Тест: send_message не повторяется без retry_non_idempotent"""
+        responses.add(
+            responses.POST, "https://platform-api.max.ru/messages",
+            json={"error": "busy"}, status=503, headers={"Retry-After": "0"}
+        )
+        
+        client = MAXClient(token="t", retry_policy=RetryPolicy(max_attempts=3))
+        with pytest.raises(MAXAPIException):
+            client.send_message(chat_id=1, text="Hi")
+        
+        assert len(responses.calls) == 1
@@ -0,0 +1,251 @@
+"""
+Тесты для приоритетного планировщика
+"""
+
+import time
+import threading
+import pytest
+
+from max_api import MAXClient, InMemoryTransport
+from max_api.scheduler import PriorityScheduler
+from max_api.utils import RateLimiter, RecipientRateLimiter
+
+
+class _GateLimiter(RateLimiter):
+    """Лимитер, который записывает порядок разрешений и держит первое до открытия ворот"""
+    
+    def __init__(self):
+        super().__init__()
+        self.gate = threading.Event()
+        self.order = []
+    
+    def acquire(self):
+        self.order.append(threading.current_thread().name)
+        self.gate.wait(5)
+
+
+def _start(scheduler, lane, name, recipient=None):
+    """Запуск потока, ожидающего разрешения в полосе"""
+    thread = threading.Thread(target=scheduler.acquire, args=(lane, recipient), name=name)
+    thread.start()
+    return thread
+
+
+def _wait_depth(scheduler, depth, lane=None):
+    """Ожидание, пока в очереди не окажется depth запросов"""
+    deadline = time.monotonic() + 5
+    while scheduler.depth(lane) < depth:
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def _hold(scheduler, lane):
+    """Запрос, занимающий лимитер до открытия ворот"""
+    thread = _start(scheduler, lane, 'holder')
+    deadline = time.monotonic() + 5
+    while not scheduler.limiter.order:
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+    return thread
+
+
+def _join(threads):
+    for thread in threads:
+        thread.join(5)
+
+
+class TestPriorityScheduler:
+    """Тесты для PriorityScheduler"""
+    
+    def test_fast_path(self):
+        """Тест: без очереди разрешение запрашивается сразу"""
+        scheduler = PriorityScheduler(RateLimiter(10, 1.0))
+        
+        scheduler.acquire()
+        scheduler.acquire('bulk')
+        
+        stats = scheduler.get_stats()
+        assert stats['interactive']['granted'] == 1
+        assert stats['bulk']['granted'] == 1
+        assert scheduler.depth() == 0
+    
+    def test_try_acquire(self):
+        """Тест: разрешение без ожидания не обгоняет очередь и не ждёт токена"""
+        limiter = _GateLimiter()
+        scheduler = PriorityScheduler(limiter)
+        holder = _hold(scheduler, 'bulk')
+        
+        assert scheduler.try_acquire('interactive') is False
+        limiter.gate.set()
+        _join([holder])
+        
+        assert scheduler.try_acquire('interactive') is True
+        assert scheduler.get_stats()['interactive']['granted'] == 1
+        
+        empty = PriorityScheduler(RateLimiter(1, 60.0))
+        assert empty.try_acquire() is True
+        assert empty.try_acquire() is False
+        assert empty.get_stats()['interactive']['granted'] == 1
+    
+    def test_interactive_ahead_of_bulk(self):
+        """Тест: интерактивный запрос обгоняет очередь рассылки"""
+        limiter = _GateLimiter()
+        scheduler = PriorityScheduler(limiter)
+        threads = [_hold(scheduler, 'bulk')]
+        threads += [_start(scheduler, 'bulk', f'bulk-{i}') for i in range(10)]
+        _wait_depth(scheduler, 10, 'bulk')
+        threads.append(_start(scheduler, 'interactive', 'reply'))
+        _wait_depth(scheduler, 1, 'interactive')
+        
+        assert scheduler.depth() == 11
+        
+        limiter.gate.set()
+        _join(threads)
+        
+        assert limiter.order[:2] == ['holder', 'reply']
+        assert scheduler.depth() == 0
+    
+    def test_weighted_shares(self):
+        """Тест: при занятости всех полос разрешения делятся по весам"""
+        limiter = _GateLimiter()
+        scheduler = PriorityScheduler(limiter, lanes={'a': 3, 'b': 1})
+        threads = [_hold(scheduler, 'a')]
+        threads += [_start(scheduler, 'a', f'a-{i}') for i in range(20)]
+        threads += [_start(scheduler, 'b', f'b-{i}') for i in range(20)]
+        _wait_depth(scheduler, 40)
+        
+        limiter.gate.set()
+        _join(threads)
+        
+        first = limiter.order[1:21]
+        assert 14 <= sum(name.startswith('a-') for name in first) <= 16
+    
+    def test_starvation_timeout(self):
+        """Тест: долго ждущий запрос обслуживается вне очереди"""
+        limiter = _GateLimiter()
+        scheduler = PriorityScheduler(limiter, starvation_timeout=0.05)
+        threads = [_hold(scheduler, 'bulk')]
+        threads.append(_start(scheduler, 'bulk', 'old-bulk'))
+        _wait_depth(scheduler, 1, 'bulk')
+        time.sleep(0.06)
+        threads += [_start(scheduler, 'interactive', f'reply-{i}') for i in range(20)]
+        _wait_depth(scheduler, 20, 'interactive')
+        
+        limiter.gate.set()
+        _join(threads)
+        
+        assert limiter.order[1] == 'old-bulk'
+        assert scheduler.get_stats()['bulk']['starved'] == 1
+    
+    def test_no_starvation_protection(self):
+        """Тест: без starvation_timeout рассылка ждёт по весам"""
+        limiter = _GateLimiter()
+        scheduler = PriorityScheduler(limiter, starvation_timeout=None)
+        threads = [_hold(scheduler, 'bulk')]
+        threads.append(_start(scheduler, 'bulk', 'old-bulk'))
+        _wait_depth(scheduler, 1, 'bulk')
+        threads += [_start(scheduler, 'interactive', f'reply-{i}') for i in range(20)]
+        _wait_depth(scheduler, 20, 'interactive')
+        
+        limiter.gate.set()
+        _join(threads)
+        
+        # Вес 8 к 1: рассылка получает очередь после девяти ответов (восемь + равенство)
+        assert limiter.order.index('old-bulk') == 10
+    
+    def test_round_robin_recipients(self):
+        """Тест: «горячий» чат не задерживает сообщения другим получателям полосы"""
+        limiter = _GateLimiter()
+        scheduler = PriorityScheduler(limiter)
+        threads = [_hold(scheduler, 'bulk')]
+        threads += [_start(scheduler, 'bulk', f'hot-{i}', recipient=-100) for i in range(10)]
+        _wait_depth(scheduler, 10)
+        for user_id in range(3):
+            threads.append(_start(scheduler, 'bulk', f'user-{user_id}', recipient=user_id))
+            _wait_depth(scheduler, 11 + user_id)
+        
+        limiter.gate.set()
+        _join(threads)
+        
+        # Каждый получатель обслуживается по одному запросу за круг
+        assert limiter.order[1:5] == ['hot-0', 'user-0', 'user-1', 'user-2']
+        assert limiter.order[5:] == [f'hot-{i}' for i in range(1, 10)]
+    
+    def test_stats(self):
+        """Тест: метрики ожидания по полосам"""
+        limiter = _GateLimiter()
+        scheduler = PriorityScheduler(limiter)
+        threads = [_hold(scheduler, 'bulk')]
+        threads += [_start(scheduler, 'callback', f'cb-{i}') for i in range(3)]
+        _wait_depth(scheduler, 3, 'callback')
+        time.sleep(0.02)
+        
+        limiter.gate.set()
+        _join(threads)
+        
+        stats = scheduler.get_stats()['callback']
+        assert stats['weight'] == 4.0
+        assert stats['depth'] == 0
+        assert stats['granted'] == 3
+        assert stats['max_wait'] >= 0.02
+        assert 0 < stats['avg_wait'] <= stats['max_wait']
+    
+    def test_unknown_lane(self):
+        """Тест: неизвестная полоса - ошибка"""
+        scheduler = PriorityScheduler(RateLimiter())
+        
+        with pytest.raises(ValueError):
+            scheduler.acquire('express')
+    
+    def test_invalid_lanes(self):
+        """Тест: неположительный вес и неизвестная полоса по умолчанию"""
+        with pytest.raises(ValueError):
+            PriorityScheduler(RateLimiter(), lanes={'a': 1, 'b': 0})
+        with pytest.raises(ValueError):
+            PriorityScheduler(RateLimiter(), default_lane='express')
+
+
+class TestClientLanes:
+    """Тесты полос в MAXClient"""
+    
+    def test_lane_parameter(self):
+        """Тест: lane= направляет запрос в полосу"""
+        transport = InMemoryTransport()
+        transport.add('POST', '/messages', json={'message': {}})
+        client = MAXClient(token="test", transport=transport)
+        
+        client.send_message(chat_id=1, text="Ответ")
+        client.send_message(chat_id=1, text="Новости", lane='bulk')
+        
+        stats = client.scheduler.get_stats()
+        assert stats['interactive']['granted'] == 1
+        assert stats['bulk']['granted'] == 1
+    
+    def test_custom_lanes(self):
+        """Тест: свои полосы клиента"""
+        transport = InMemoryTransport()
+        transport.add('GET', '/messages/m1', json={'message_id': 'm1'})
+        client = MAXClient(token="test", transport=transport, priority_lanes={'fast': 10, 'slow': 1})
+        
+        client.get_message('m1', lane='slow')
+        
+        assert client.scheduler.lanes == {'fast': 10.0, 'slow': 1.0}
+        assert client.scheduler.get_stats()['slow']['granted'] == 1
+        with pytest.raises(ValueError):
+            client.get_message('m1', lane='bulk')
+    
+    def test_recipient_limiter(self):
+        """Тест: send_message ждёт корзины получателя, другие получатели не ждут"""
+        transport = InMemoryTransport()
+        transport.add('POST', '/messages', json={'message': {}})
+        limiter = RecipientRateLimiter(max_requests=1, time_window=0.1)
+        client = MAXClient(token="test", transport=transport, recipient_limiter=limiter)
+        
+        start = time.monotonic()
+        client.send_message(chat_id=-100, text="1")
+        client.send_message(chat_id=42, text="2")
+        assert time.monotonic() - start < 0.05
+        
+        client.send_message(chat_id=-100, text="3")
+        assert time.monotonic() - start >= 0.09
+        assert limiter.get_stats()['delayed'] == 1
@@ -0,0 +1,205 @@
+"""
+Тесты для общего лимита запросов
+"""
+
+import os
+import time
+import threading
+import multiprocessing
+import pytest
+
+from max_api import MAXClient
+from max_api.shared_limiter import (
+    SharedRateLimiter,
+    FileRateLimitStore,
+    KeyValueRateLimitStore,
+    MemoryKeyValueBackend,
+    token_key,
+)
+
+
+def _burst(limiter, attempts=100):
+    """Количество запросов, разрешённых без ожидания"""
+    return sum(limiter.try_acquire() for _ in range(attempts))
+
+
+def _worker(directory, count, results):
+    """Процесс, выполняющий count запросов через общий лимит"""
+    limiter = SharedRateLimiter(20, 1.0, store=FileRateLimitStore(directory), key='bot')
+    for _ in range(count):
+        limiter.acquire()
+    results.put(time.time())
+
+
+class TestFileRateLimitStore:
+    """Тесты лимита, общего для процессов хоста"""
+    
+    def test_burst(self, tmp_path):
+        """Тест: всплеск не больше max_requests"""
+        limiter = SharedRateLimiter(5, 1.0, store=FileRateLimitStore(str(tmp_path)), key='bot')
+        
+        assert _burst(limiter) == 5
+    
+    def test_limiters_share_budget(self, tmp_path):
+        """Тест: лимитеры с одним ключом делят лимит, с разными - нет"""
+        store = FileRateLimitStore(str(tmp_path))
+        first = SharedRateLimiter(5, 1.0, store=store, key='bot')
+        second = SharedRateLimiter(5, 1.0, store=FileRateLimitStore(str(tmp_path)), key='bot')
+        other = SharedRateLimiter(5, 1.0, store=store, key='other-bot')
+        
+        assert _burst(first, 3) == 3
+        assert _burst(second) == 2
+        assert _burst(other) == 5
+    
+    def test_refill(self, tmp_path):
+        """Тест: разрешения восстанавливаются со временем"""
+        limiter = SharedRateLimiter(10, 1.0, store=FileRateLimitStore(str(tmp_path)), key='bot')
+        _burst(limiter)
+        
+        time.sleep(0.25)
+        
+        assert 1 <= _burst(limiter) <= 3
+    
+    def test_acquire_waits(self, tmp_path):
+        """Тест: acquire() ждёт, когда лимит исчерпан"""
+        limiter = SharedRateLimiter(10, 1.0, store=FileRateLimitStore(str(tmp_path)), key='bot')
+        
+        start = time.monotonic()
+        for _ in range(15):
+            limiter.acquire()
+        elapsed = time.monotonic() - start
+        
+        assert elapsed >= 0.4
+        assert limiter.get_stats()['delayed'] == 5
+    
+    def test_key_file_does_not_contain_token(self, tmp_path):
+        """Тест: токен бота не попадает в имя файла"""
+        limiter = SharedRateLimiter(5, 1.0, store=FileRateLimitStore(str(tmp_path)), key=token_key("secret-token"))
+        limiter.acquire()
+        
+        names = os.listdir(tmp_path)
+        assert len(names) == 1
+        assert "secret" not in names[0]
+    
+    @pytest.mark.skipif(not hasattr(os, 'fork'), reason="нет os.fork")
+    def test_processes_share_budget(self, tmp_path):
+        """Тест: процессы вместе не превышают общий лимит"""
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+        start = time.time()
+        processes = [
+            context.Process(target=_worker, args=(str(tmp_path), 10, results))
+            for _ in range(4)
+        ]
+        for process in processes:
+            process.start()
+        finished = [results.get(timeout=10) for _ in processes]
+        for process in processes:
+            process.join()
+        
+        # 40 запросов при лимите 20/с и всплеске 20: не быстрее (40 - 20) / 20 = 1 с
+        assert max(finished) - start >= 0.95
+    
+    @pytest.mark.skipif(not hasattr(os, 'fork'), reason="нет os.fork")
+    def test_reopen_after_fork(self, tmp_path):
+        """Тест: дочерний процесс использует свои дескрипторы файла"""
+        store = FileRateLimitStore(str(tmp_path))
+        limiter = SharedRateLimiter(5, 1.0, store=store, key='bot')
+        limiter.acquire()
+        parent_mapping = store._files['bot'][1]
+        
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            limiter.acquire()
+            os.write(write_fd, str(store._files['bot'][1] is not parent_mapping and parent_mapping.closed).encode())
+            os._exit(0)
+        os.close(write_fd)
+        reopened = os.read(read_fd, 16)
+        os.close(read_fd)
+        os.waitpid(pid, 0)
+        
+        assert reopened == b'True'
+        # Запрос потомка учтён в общем лимите
+        assert _burst(limiter) == 3
+
+
+class _ConflictingBackend(MemoryKeyValueBackend):
+    """Хранилище, в котором первые попытки записи проигрывают другому процессу"""
+    
+    def __init__(self, conflicts):
+        super().__init__()
+        self.remaining = conflicts
+    
+    def compare_and_set(self, key, expected, value, ttl):
+        if self.remaining:
+            self.remaining -= 1
+            return False
+        return super().compare_and_set(key, expected, value, ttl)
+
+
+class TestKeyValueRateLimitStore:
+    """Тесты лимита через сетевое хранилище (локальная замена)"""
+    
+    def test_hosts_share_budget(self):
+        """Тест: несколько «хостов» с одним хранилищем делят лимит"""
+        backend = MemoryKeyValueBackend()
+        hosts = [
+            SharedRateLimiter(10, 1.0, store=KeyValueRateLimitStore(backend), key='bot')
+            for _ in range(3)
+        ]
+        allowed = []
+        
+        def run(limiter):
+            allowed.append(_burst(limiter, 20))
+        
+        threads = [threading.Thread(target=run, args=(limiter,)) for limiter in hosts]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert sum(allowed) == 10
+    
+    def test_conflict_retry(self):
+        """Тест: при конфликте compare-and-set шаг повторяется"""
+        store = KeyValueRateLimitStore(_ConflictingBackend(conflicts=3))
+        limiter = SharedRateLimiter(5, 1.0, store=store, key='bot')
+        
+        assert limiter.try_acquire()
+        assert store.conflicts == 3
+    
+    def test_too_many_conflicts(self):
+        """Тест: бесконечные конфликты - ошибка, а не зависание"""
+        store = KeyValueRateLimitStore(_ConflictingBackend(conflicts=1000), max_attempts=5)
+        limiter = SharedRateLimiter(5, 1.0, store=store, key='bot')
+        
+        with pytest.raises(RuntimeError):
+            limiter.acquire()
+    
+    def test_state_expires(self):
+        """Тест: устаревшее состояние удаляется хранилищем"""
+        backend = MemoryKeyValueBackend()
+        limiter = SharedRateLimiter(50, 1.0, store=KeyValueRateLimitStore(backend), key='bot')
+        limiter.acquire()
+        
+        time.sleep(0.1)
+        
+        assert backend.get('bot') is None
+
+
+class TestClientSharedLimit:
+    """Тесты MAXClient с общим лимитом"""
+    
+    def test_clients_share_limit(self):
+        """Тест: клиенты с одним токеном делят лимит, с разными - нет"""
+        backend = MemoryKeyValueBackend()
+        first = MAXClient(token="token-1", max_requests_per_second=5, rate_limit_store=KeyValueRateLimitStore(backend))
+        second = MAXClient(token="token-1", max_requests_per_second=5, rate_limit_store=KeyValueRateLimitStore(backend))
+        other = MAXClient(token="token-2", max_requests_per_second=5, rate_limit_store=KeyValueRateLimitStore(backend))
+        
+        assert isinstance(first.rate_limiter, SharedRateLimiter)
+        assert _burst(first.rate_limiter, 3) == 3
+        assert _burst(second.rate_limiter) == 2
+        assert _burst(other.rate_limiter) == 5
+        assert "token-1" not in first.rate_limiter.key
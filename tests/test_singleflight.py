@@ -0,0 +1,269 @@
+"""
+Тесты для объединения одинаковых одновременных запросов
+"""
+
+import time
+import asyncio
+import threading
+import json
+import responses
+from max_api import MAXClient, InMemoryTransport
+from max_api.singleflight import SingleFlight, AsyncSingleFlight
+from max_api.transport import TransportResponse
+
+
+class TestSingleFlight:
+    """Тесты для SingleFlight"""
+    
+    def test_concurrent_calls_share_result(self):
+        """Тест: одновременные вызовы с одним ключом выполняют функцию один раз"""
+        flight = SingleFlight()
+        calls = []
+        started = threading.Event()
+        
+        def func():
+            calls.append(1)
+            started.set()
+            time.sleep(0.1)
+            return {'value': 42}
+        
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(flight.do('key', func)))
+            for _ in range(5)
+        ]
+        threads[0].start()
+        started.wait()
+        for thread in threads[1:]:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert len(calls) == 1
+        assert results == [{'value': 42}] * 5
+        assert flight.get_stats() == {'executed': 1, 'shared': 4, 'in_flight': 0}
+    
+    def test_followers_get_copies(self):
+        """Тест: ожидающие получают копию результата"""
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        
+        def func():
+            started.set()
+            release.wait()
+            return {'value': 1}
+        
+        results = []
+        leader = threading.Thread(target=lambda: results.append(flight.do('key', func)))
+        leader.start()
+        started.wait()
+        follower = threading.Thread(target=lambda: results.append(flight.do('key', func)))
+        follower.start()
+        while flight.shared == 0:
+            time.sleep(0.001)
+        release.set()
+        leader.join()
+        follower.join()
+        
+        assert results[0] == results[1]
+        assert results[0] is not results[1]
+    
+    def test_exception_shared(self):
+        """Тест: исключение получают все ожидающие"""
+        flight = SingleFlight()
+        started = threading.Event()
+        
+        def func():
+            started.set()
+            time.sleep(0.1)
+            raise ValueError("boom")
+        
+        errors = []
+        
+        def call():
+            try:
+                flight.do('key', func)
+            except ValueError as e:
+                errors.append(e)
+        
+        threads = [threading.Thread(target=call) for _ in range(3)]
+        threads[0].start()
+        started.wait()
+        for thread in threads[1:]:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert len(errors) == 3
+        assert flight.executed == 1
+    
+    def test_sequential_calls_not_cached(self):
+        """Тест: после завершения вызов выполняется заново"""
+        flight = SingleFlight()
+        assert flight.do('key', lambda: 1) == 1
+        assert flight.do('key', lambda: 2) == 2
+        assert flight.executed == 2
+    
+    def test_forget_where(self):
+        """Тест: после forget_where новый вызов не присоединяется к старому"""
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        results = []
+        
+        def slow():
+            started.set()
+            release.wait(5)
+            return 'old'
+        
+        thread = threading.Thread(target=lambda: results.append(flight.do('key', slow)))
+        thread.start()
+        assert started.wait(5)
+        
+        assert flight.forget_where(lambda key: key == 'key') == 1
+        assert flight.do('key', lambda: 'new') == 'new'
+        
+        release.set()
+        thread.join()
+        assert results == ['old']
+        assert flight.get_stats() == {'executed': 2, 'shared': 0, 'in_flight': 0}
+
+
+class TestAsyncSingleFlight:
+    """Тесты для AsyncSingleFlight"""
+    
+    def test_concurrent_calls_share_result(self):
+        """Тест: одновременные корутины с одним ключом выполняют запрос один раз"""
+        flight = AsyncSingleFlight()
+        calls = []
+        
+        async def func():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return {'value': 42}
+        
+        async def scenario():
+            return await asyncio.gather(*(flight.do('key', func) for _ in range(5)))
+        
+        results = asyncio.run(scenario())
+        
+        assert len(calls) == 1
+        assert results == [{'value': 42}] * 5
+        assert flight.get_stats() == {'executed': 1, 'shared': 4, 'in_flight': 0}
+    
+    def test_cancelled_waiter_does_not_cancel_request(self):
+        """Тест: отмена одного ожидающего не отменяет запрос для остальных"""
+        flight = AsyncSingleFlight()
+        
+        async def func():
+            await asyncio.sleep(0.05)
+            return 'ok'
+        
+        async def scenario():
+            first = asyncio.ensure_future(flight.do('key', func))
+            second = asyncio.ensure_future(flight.do('key', func))
+            await asyncio.sleep(0)
+            first.cancel()
+            return await second
+        
+        assert asyncio.run(scenario()) == 'ok'
+    
+    def test_exception_shared(self):
+        """Тест: исключение получают все ожидающие"""
+        flight = AsyncSingleFlight()
+        
+        async def func():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+        
+        async def scenario():
+            return await asyncio.gather(
+                *(flight.do('key', func) for _ in range(3)),
+                return_exceptions=True
+            )
+        
+        results = asyncio.run(scenario())
+        assert all(isinstance(r, ValueError) for r in results)
+        assert flight.executed == 1
+
+
+class TestClientCoalescing:
+    """Тесты объединения запросов в MAXClient"""
+    
+    @responses.activate
+    def test_concurrent_get_message_single_request(self):
+        """Тест: одновременные get_message одного сообщения - один запрос к API"""
+        def callback(request):
+            time.sleep(0.1)
+            return 200, {}, '{"body": {"text": "hi"}}'
+        
+        responses.add_callback(
+            responses.GET, "https://platform-api.max.ru/messages/mid.1", callback=callback
+        )
+        client = MAXClient(token="test_token")
+        
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(client.get_message("mid.1")))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert results == [{"body": {"text": "hi"}}] * 5
+        assert len(responses.calls) < 5
+        assert client.rate_limiter.get_stats()['acquired'] == len(responses.calls)
+    
+    @responses.activate
+    def test_writes_not_coalesced(self):
+        """Тест: изменяющие запросы не объединяются"""
+        responses.add(
+            responses.DELETE, "https://platform-api.max.ru/messages/mid.1",
+            json={"success": True}, status=200
+        )
+        client = MAXClient(token="test_token")
+        
+        client.delete_message("mid.1")
+        client.delete_message("mid.1")
+        
+        assert len(responses.calls) == 2
+        assert client.single_flight.executed == 0
+    
+    def test_get_after_write_not_joined(self):
+        """Тест: GET после edit_message не получает ответ чтения, начатого до изменения"""
+        state = {'text': 'a', 'gets': 0}
+        started = threading.Event()
+        release = threading.Event()
+        
+        def handler(request):
+            if request.method == 'PUT':
+                state['text'] = 'b'
+                return TransportResponse(200, b'{"success": true}')
+            state['gets'] += 1
+            text = state['text']
+            if state['gets'] == 1:
+                started.set()
+                release.wait(5)
+            return TransportResponse(200, json.dumps({'body': {'text': text}}).encode('utf-8'))
+        
+        client = MAXClient(token="test_token", transport=InMemoryTransport(handler))
+        results = []
+        reader = threading.Thread(target=lambda: results.append(client.get_message("mid.1")))
+        reader.start()
+        assert started.wait(5)
+        
+        client.edit_message("mid.1", text="b")
+        assert client.get_message("mid.1") == {"body": {"text": "b"}}
+        
+        release.set()
+        reader.join()
+        assert results == [{"body": {"text": "a"}}]
+        assert state['gets'] == 2
+    
+    def test_disabled(self):
+        """Тест отключения объединения"""
+        client = MAXClient(token="test_token", coalesce_requests=False)
+        assert client.single_flight is None
@@ -0,0 +1,422 @@
+"""
+Тесты для транспортного слоя
+"""
+
+import json
+import time
+import importlib.util
+import asyncio
+import threading
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from max_api import MAXClient, AsyncMAXClient
+from max_api import transport as transport_module
+from max_api.exceptions import MAXAPIException, RateLimitError
+from max_api.transport import (
+    InMemoryTransport,
+    RequestsTransport,
+    Urllib3Transport,
+    HTTPXTransport,
+    TransportResponse,
+    ConnectTimeout,
+    ReadTimeout,
+    TransportConnectionError,
+    create_transport,
+)
+
+
+requires_httpx = pytest.mark.skipif(importlib.util.find_spec("httpx") is None, reason="httpx не установлен")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Локальный сервер: возвращает метод, путь, заголовки и тело запроса"""
+    
+    protocol_version = 'HTTP/1.1'
+    
+    # Учёт одновременных запросов к /busy
+    lock = threading.Lock()
+    active = 0
+    max_active = 0
+    
+    def _reply(self):
+        if self.path.startswith('/slow'):
+            time.sleep(0.5)
+        if self.path.startswith('/busy'):
+            with _Handler.lock:
+                _Handler.active += 1
+                _Handler.max_active = max(_Handler.max_active, _Handler.active)
+            time.sleep(0.05)
+            with _Handler.lock:
+                _Handler.active -= 1
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        payload = json.dumps({
+            'method': self.command,
+            'path': self.path,
+            'authorization': self.headers.get('Authorization'),
+            'content_type': self.headers.get('Content-Type'),
+            'body': body.decode('utf-8'),
+        }).encode('utf-8')
+        status = 429 if self.path.startswith('/limited') else 200
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        if status == 429:
+            self.send_header('Retry-After', '3')
+        self.end_headers()
+        try:
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            # Клиент уже закрыл соединение по таймауту
+            pass
+    
+    do_GET = do_POST = do_PUT = do_DELETE = _reply
+    
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def server_url():
+    """Локальный HTTP сервер"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+class TestInMemoryTransport:
+    """Тесты для InMemoryTransport"""
+    
+    def test_routes(self):
+        """Тест заранее заданных ответов"""
+        transport = InMemoryTransport()
+        transport.add('GET', '/me', json={'user_id': 1})
+        client = MAXClient(token="test_token", transport=transport)
+        
+        assert client.get_me() == {'user_id': 1}
+        assert transport.calls[0].method == 'GET'
+        assert transport.calls[0].url == "https://platform-api.max.ru/me"
+    
+    def test_handler(self):
+        """Тест обработчика запросов"""
+        def handler(request):
+            body = json.loads(request.data)
+            return TransportResponse(200, json.dumps({'echo': body['text']}).encode('utf-8'))
+        
+        client = MAXClient(token="test_token", transport=InMemoryTransport(handler))
+        
+        assert client.send_message(chat_id=1, text="Привет") == {'echo': "Привет"}
+    
+    def test_error_headers(self):
+        """Тест: заголовки ответа доступны клиенту (Retry-After)"""
+        transport = InMemoryTransport()
+        transport.add('GET', '/me', status=429, json={'message': 'slow down'}, headers={'Retry-After': '2'})
+        client = MAXClient(token="test_token", transport=transport, coalesce_requests=False)
+        
+        with pytest.raises(RateLimitError) as exc_info:
+            client.get_me()
+        assert exc_info.value.retry_after == 2
+    
+    def test_unknown_route(self):
+        """Тест: запрос без заданного ответа получает 404"""
+        client = MAXClient(token="test_token", transport=InMemoryTransport())
+        with pytest.raises(MAXAPIException):
+            client.get_me()
+
+
+class TestCreateTransport:
+    """Тесты для create_transport"""
+    
+    def test_by_name(self):
+        """Тест создания по названию"""
+        assert isinstance(create_transport('requests', {}), RequestsTransport)
+        assert isinstance(create_transport('urllib3', {}), Urllib3Transport)
+    
+    def test_unknown_name(self):
+        """Тест неизвестного названия"""
+        with pytest.raises(ValueError):
+            create_transport('curl', {})
+    
+    def test_factory_per_lane(self):
+        """Тест: фабрика вызывается для каждой полосы с заголовками авторизации"""
+        created = []
+        
+        def factory(headers):
+            created.append(headers)
+            return InMemoryTransport()
+        
+        client = MAXClient(token="test_token", transport=factory)
+        
+        assert len(created) == 2
+        assert created[0]['Authorization'] == "test_token"
+        assert client._transport is not client._poll_transport
+
+
+@pytest.mark.parametrize("name", [
+    'requests',
+    'urllib3',
+    pytest.param('http2', marks=requires_httpx),
+])
+class TestNetworkTransports:
+    """Тесты транспортов с настоящим HTTP сервером"""
+    
+    def test_request(self, name, server_url):
+        """Тест запроса: метод, путь, query, заголовки и тело"""
+        client = MAXClient(token="test_token", base_url=server_url, transport=name)
+        
+        result = client.send_message(chat_id=-5, text="Привет")
+        client.close()
+        
+        assert result['method'] == 'POST'
+        assert result['path'] == '/messages?chat_id=-5'
+        assert result['authorization'] == "test_token"
+        assert result['content_type'] == 'application/json'
+        assert json.loads(result['body'])['text'] == "Привет"
+    
+    def test_error_status(self, name, server_url):
+        """Тест обработки кода ошибки и заголовков ответа"""
+        client = MAXClient(token="test_token", base_url=server_url, transport=name)
+        
+        with pytest.raises(RateLimitError) as exc_info:
+            client._make_request('GET', '/limited')
+        client.close()
+        
+        assert exc_info.value.retry_after == 3
+    
+    def test_read_timeout(self, name, server_url):
+        """Тест: таймаут чтения приводится к ReadTimeout"""
+        transport = create_transport(name, {})
+        
+        with pytest.raises(ReadTimeout):
+            transport.request('GET', f"{server_url}/slow", timeout=0.1)
+        transport.close()
+    
+    def test_expired_poll_returns_empty(self, name, server_url):
+        """Тест: истёкший Long Polling - пустой ответ для любого транспорта"""
+        client = MAXClient(token="test_token", base_url=server_url, transport=name, poll_read_timeout=0.1)
+        
+        assert client._make_request('GET', '/slow', long_poll=True, read_timeout=0.1) == {}
+        client.close()
+    
+    def test_connection_error(self, name):
+        """Тест: отказ в соединении приводится к ошибке подключения"""
+        transport = create_transport(name, {})
+        
+        with pytest.raises((TransportConnectionError, ConnectTimeout)):
+            transport.request('GET', "http://127.0.0.1:9/me", timeout=1)
+        transport.close()
+
+
+@requires_httpx
+class TestHTTP2Transport:
+    """Тесты HTTP/2 транспорта"""
+    
+    def test_fallback_to_http11(self, server_url):
+        """Тест: сервер без HTTP/2 обслуживается по HTTP/1.1"""
+        client = MAXClient(token="test_token", base_url=server_url, transport='http2')
+        
+        assert client._make_request('GET', '/me')['authorization'] == "test_token"
+        assert client._transport.http_version == 'HTTP/1.1'
+        client.close()
+    
+    def test_poll_lane_shares_multiplexed_transport(self, monkeypatch):
+        """Тест: Long Polling идёт через общее соединение, только когда согласован HTTP/2"""
+        client = MAXClient(token="test_token", transport='http2')
+        used = []
+        
+        def record(transport):
+            def request(method, url, params=None, data=None, timeout=None):
+                used.append(transport)
+                return TransportResponse(200, b'{}')
+            return request
+        
+        for transport in (client._transport, client._poll_transport):
+            monkeypatch.setattr(transport, 'request', record(transport))
+        
+        assert not client._transport.multiplexed
+        client._make_request('GET', '/updates', long_poll=True, read_timeout=1)
+        client._transport.http_version = 'HTTP/2'
+        assert client._transport.multiplexed
+        client._make_request('GET', '/updates', long_poll=True, read_timeout=1)
+        
+        assert used == [client._poll_transport, client._transport]
+        client.close()
+    
+    def test_plain_http_not_multiplexed(self, server_url):
+        """Тест: по http:// HTTP/2 не согласуется, Long Polling идёт отдельным пулом"""
+        client = MAXClient(token="test_token", base_url=server_url, transport='http2')
+        
+        client._make_request('GET', '/me')
+        assert client._transport.http_version == 'HTTP/1.1'
+        assert not client._transport.multiplexed
+        assert client._poll_transport is not client._transport
+        client.close()
+    
+    def test_without_h2_package(self, monkeypatch):
+        """Тест: без пакета h2 транспорт работает по HTTP/1.1 с отдельными полосами"""
+        monkeypatch.setattr(transport_module, '_h2_available', lambda: False)
+        client = MAXClient(token="test_token", transport='http2')
+        
+        assert not client._transport.http2
+        assert client._poll_transport is not client._transport
+        client.close()
+    
+    def test_max_streams(self, server_url):
+        """Тест: количество одновременных запросов ограничено max_streams"""
+        transport = HTTPXTransport(http2=True, max_streams=2)
+        _Handler.max_active = 0
+        
+        threads = [
+            threading.Thread(target=transport.request, args=('GET', f"{server_url}/busy"), kwargs={'timeout': 5})
+            for _ in range(6)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        transport.close()
+        
+        assert 1 <= _Handler.max_active <= 2
+    
+    def test_async_client_http2(self, server_url):
+        """Тест: AsyncMAXClient с http2=True"""
+        async def scenario():
+            async with AsyncMAXClient(token="test_token", base_url=server_url, http2=True) as client:
+                return await asyncio.gather(
+                    client._make_request('GET', '/me'),
+                    client.send_message(chat_id=-5, text="Привет"),
+                )
+        
+        me, sent = asyncio.run(scenario())
+        assert me['authorization'] == "test_token"
+        assert json.loads(sent['body'])['text'] == "Привет"
+    
+    def test_async_expired_poll(self, server_url):
+        """Тест: истёкший Long Polling по HTTP/2 транспорту - пустой ответ"""
+        async def scenario():
+            async with AsyncMAXClient(token="test_token", base_url=server_url, http2=True) as client:
+                return await client._make_request('GET', '/slow', long_poll=True, read_timeout=0.1)
+        
+        assert asyncio.run(scenario()) == {}
+
+
+class _CountingServer(ThreadingHTTPServer):
+    """Сервер, считающий принятые соединения"""
+    
+    accepted = 0
+    
+    def get_request(self):
+        request = super().get_request()
+        self.accepted += 1
+        return request
+
+
+@pytest.fixture
+def counting_server():
+    """Локальный HTTP сервер со счётчиком соединений"""
+    server = _CountingServer(('127.0.0.1', 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def _wait_accepted(server, count, timeout=2.0):
+    """Ожидание, пока сервер примет count соединений"""
+    deadline = time.monotonic() + timeout
+    while server.accepted < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return server.accepted
+
+
+@pytest.mark.parametrize('name', ['requests', 'urllib3'])
+class TestConnectionPool:
+    """Тесты прогрева и переоткрытия соединений пула"""
+    
+    def test_warm_up(self, name, counting_server):
+        """Тест: warm_up открывает соединения, запросы используют их"""
+        server, url = counting_server
+        client = MAXClient(token="test_token", base_url=url, transport=name, pool_maxsize=4)
+        
+        assert client.warm_up(3) == 3
+        assert _wait_accepted(server, 3) == 3
+        
+        client.get_me()
+        client.close()
+        
+        assert server.accepted == 3
+    
+    def test_warm_up_limited_by_pool_size(self, name, counting_server):
+        """Тест: прогревается не больше pool_maxsize соединений"""
+        server, url = counting_server
+        client = MAXClient(token="test_token", base_url=url, transport=name, pool_maxsize=2)
+        
+        assert client.warm_up(5) == 2
+        client.close()
+    
+    def test_warm_connections_on_init(self, name, counting_server):
+        """Тест: warm_connections прогревает пул при создании клиента"""
+        server, url = counting_server
+        client = MAXClient(token="test_token", base_url=url, transport=name, warm_connections=2)
+        
+        assert _wait_accepted(server, 2) == 2
+        client.close()
+    
+    def test_warm_up_connection_error(self, name):
+        """Тест: ошибка подключения при прогреве не прерывает работу"""
+        transport = create_transport(name, {})
+        
+        assert transport.warm_up("http://127.0.0.1:9", 2) == 0
+        transport.close()
+    
+    def test_idle_connection_recycled(self, name, counting_server):
+        """Тест: соединение, простоявшее дольше idle_timeout, переоткрывается"""
+        server, url = counting_server
+        transport = create_transport(name, {}, idle_timeout=0.05)
+        
+        transport.request('GET', f"{url}/me", timeout=5)
+        time.sleep(0.1)
+        transport.request('GET', f"{url}/me", timeout=5)
+        transport.close()
+        
+        assert transport.recycled == 1
+        assert server.accepted == 2
+    
+    def test_connection_reused_without_idle_timeout(self, name, counting_server):
+        """Тест: без idle_timeout соединение используется повторно"""
+        server, url = counting_server
+        transport = create_transport(name, {})
+        
+        transport.request('GET', f"{url}/me", timeout=5)
+        time.sleep(0.1)
+        transport.request('GET', f"{url}/me", timeout=5)
+        transport.close()
+        
+        assert transport.recycled == 0
+        assert server.accepted == 1
+
+
+class TestWarmUpWithoutPool:
+    """Тесты warm_up для транспортов без пула urllib3"""
+    
+    def test_in_memory(self):
+        """Тест: InMemoryTransport ничего не прогревает"""
+        client = MAXClient(token="test_token", transport=InMemoryTransport(), warm_connections=2)
+        
+        assert client.warm_up() == 0
+    
+    @requires_httpx
+    def test_http2_fallback(self, counting_server):
+        """Тест: HTTPX транспорт открывает соединения запросом HEAD"""
+        server, url = counting_server
+        transport = HTTPXTransport({}, http2=False, pool_maxsize=2)
+        
+        assert transport.warm_up(url, 2) == 2
+        transport.close()
+        
+        assert server.accepted == 2
@@ -3,10 +3,25 @@
 """
 
 import pytest
-from max_api import MAXClient, UpdateManager, UpdateMode
+from max_api import MAXClient, UpdateManager, UpdateMode, UpdatesBatch
+from max_api.checkpoint import MemoryCheckpointStore
 from max_api.exceptions import MAXAPIException
 
 
+class FakeClient:
+    """Клиент-заглушка, возвращающий заранее заданные пачки обновлений"""
+    
+    def __init__(self, batches):
+        self.batches = list(batches)
+        self.markers = []
+    
+    def get_updates(self, timeout=30, marker=None):
+        self.markers.append(marker)
+        if not self.batches:
+            return UpdatesBatch()
+        return self.batches.pop(0)
+
+
 class TestUpdateManager:
     """Тесты для UpdateManager"""
     
@@ -63,3 +78,61 @@ class TestUpdateManager:
         manager = UpdateManager(client)
         
         assert "LongPolling" in repr(manager)
+    
+    def test_marker_from_batch(self):
+        """Тест: маркер берётся с верхнего уровня ответа /updates"""
+        client = FakeClient([
+            UpdatesBatch([{"update_type": "message_created"}], marker=10),
+            UpdatesBatch([], marker=None),
+        ])
+        manager = UpdateManager(client)
+        
+        manager.get_updates()
+        manager.get_updates()
+        manager.get_updates()
+        
+        # Пустой ответ без маркера не сбрасывает маркер
+        assert client.markers == [None, 10, 10]
+        assert manager.last_marker == 10
+    
+    def test_checkpoint_committed_after_processing(self):
+        """Тест: маркер сохраняется только после обработки пачки"""
+        store = MemoryCheckpointStore(marker=5)
+        client = FakeClient([
+            UpdatesBatch([{"n": 1}], marker=10),
+            UpdatesBatch([{"n": 2}], marker=20),
+        ])
+        manager = UpdateManager(client, checkpoint_store=store)
+        
+        manager.get_updates()
+        assert client.markers == [5]
+        assert store.load() == 5
+        
+        # Следующий вызов означает, что предыдущая пачка обработана
+        manager.get_updates()
+        assert store.load() == 10
+        
+        manager.commit()
+        assert store.load() == 20
+        assert manager.get_status()['committed_marker'] == 20
+    
+    def test_handle_updates_rolls_back_on_error(self):
+        """Тест: при ошибке обработчика маркер не сохраняется и пачка запрашивается снова"""
+        store = MemoryCheckpointStore()
+        client = FakeClient([
+            UpdatesBatch([{"n": 1}], marker=10),
+            UpdatesBatch([{"n": 1}], marker=10),
+        ])
+        manager = UpdateManager(client, checkpoint_store=store)
+        
+        def failing_handler(update):
+            raise ValueError("boom")
+        
+        with pytest.raises(ValueError):
+            manager.handle_updates(failing_handler)
+        assert store.load() is None
+        
+        handled = []
+        assert manager.handle_updates(handled.append) == 1
+        assert client.markers == [None, None]
+        assert store.load() == 10
@@ -2,14 +2,21 @@
 Тесты для утилит
 """
 
+import time
+import threading
 import pytest
 from max_api.utils import (
+    RateLimiter,
+    AdaptiveRateLimiter,
+    RecipientRateLimiter,
     build_inline_keyboard,
     build_attachment,
     format_user_mention,
     parse_update_type,
     extract_message_text,
     extract_chat_id,
+    extract_callback_payload,
+    extract_user_id,
     validate_chat_id,
 )
 
@@ -113,3 +120,216 @@ class TestUtils:
         # Пустое обновление
         empty_update = {}
         assert extract_chat_id(empty_update) is None
+    
+    def test_extract_callback_payload(self):
+        """Тест извлечения payload callback-кнопки"""
+        update = {"update_type": "message_callback", "callback": {"payload": "btn1"}}
+        assert extract_callback_payload(update) == "btn1"
+        assert extract_callback_payload({}) is None
+    
+    def test_extract_user_id(self):
+        """Тест извлечения user_id инициатора обновления"""
+        message = {"message": {"sender": {"user_id": 1}}}
+        callback = {"callback": {"user": {"user_id": 2}}}
+        started = {"update_type": "bot_started", "user": {"user_id": 3}}
+        
+        assert extract_user_id(message) == 1
+        assert extract_user_id(callback) == 2
+        assert extract_user_id(started) == 3
+        assert extract_user_id({}) is None
+
+
+class TestRateLimiter:
+    """Тесты для RateLimiter"""
+    
+    def test_burst_within_limit(self):
+        """Тест: запросы в пределах лимита проходят без ожидания"""
+        limiter = RateLimiter(max_requests=5, time_window=1.0)
+        
+        for _ in range(5):
+            assert limiter._reserve() == 0.0
+        
+        stats = limiter.get_stats()
+        assert stats['acquired'] == 5
+        assert stats['delayed'] == 0
+    
+    def test_wait_when_limit_exceeded(self):
+        """Тест: сверх лимита запросы ждут пропорционально скорости пополнения"""
+        limiter = RateLimiter(max_requests=10, time_window=1.0)
+        
+        for _ in range(10):
+            limiter._reserve()
+        
+        wait = limiter._reserve()
+        assert 0.09 <= wait <= 0.1
+        
+        # Следующий запрос встаёт в очередь за предыдущим
+        assert limiter._reserve() == pytest.approx(wait + 0.1, abs=0.005)
+        
+        stats = limiter.get_stats()
+        assert stats['delayed'] == 2
+        assert stats['max_wait_time'] >= wait
+    
+    def test_thread_safety(self):
+        """Тест: несколько потоков вместе не превышают лимит"""
+        limiter = RateLimiter(max_requests=20, time_window=0.2)
+        timestamps = []
+        lock = threading.Lock()
+        
+        def worker():
+            for _ in range(10):
+                limiter.acquire()
+                with lock:
+                    timestamps.append(time.monotonic())
+        
+        threads = [threading.Thread(target=worker) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        # 60 запросов: 20 сразу, остальные 40 со скоростью 100 в секунду
+        elapsed = max(timestamps) - min(timestamps)
+        assert len(timestamps) == 60
+        assert elapsed >= 0.38
+        assert limiter.get_stats()['delayed'] == 40
+
+
+class TestAdaptiveRateLimiter:
+    """Тесты для AdaptiveRateLimiter"""
+    
+    def test_decrease_on_429(self):
+        """Тест: 429 снижает частоту мультипликативно и сбрасывает запас токенов"""
+        limiter = AdaptiveRateLimiter(max_requests=30, decrease_cooldown=0)
+        
+        limiter.on_rate_limited()
+        assert limiter.rate == 15
+        assert limiter._reserve() > 0
+        
+        limiter.on_rate_limited()
+        assert limiter.rate == 7.5
+        assert limiter.get_stats()['decreases'] == 2
+    
+    def test_min_rate(self):
+        """Тест: частота не опускается ниже min_rate"""
+        limiter = AdaptiveRateLimiter(max_requests=30, min_rate=10, decrease_cooldown=0)
+        
+        for _ in range(5):
+            limiter.on_rate_limited()
+        
+        assert limiter.rate == 10
+    
+    def test_cooldown(self):
+        """Тест: пачка одновременных 429 снижает частоту один раз"""
+        limiter = AdaptiveRateLimiter(max_requests=30, decrease_cooldown=10)
+        
+        for _ in range(5):
+            limiter.on_rate_limited(retry_after=1)
+        
+        assert limiter.rate == 15
+    
+    def test_increase_after_sustained_success(self):
+        """Тест: после increase_interval без 429 под нагрузкой частота растёт аддитивно"""
+        limiter = AdaptiveRateLimiter(
+            max_requests=10, max_rate=20, increase_step=2, increase_interval=0.05
+        )
+        limiter.on_rate_limited()
+        assert limiter.rate == 5
+        
+        for _ in range(3):
+            time.sleep(0.06)
+            for _ in range(5):
+                limiter.on_success()
+        
+        assert limiter.rate == 11
+        assert limiter.get_stats()['increases'] == 3
+    
+    def test_max_rate(self):
+        """Тест: частота не превышает max_rate"""
+        limiter = AdaptiveRateLimiter(max_requests=10, max_rate=12, increase_step=5, increase_interval=0.01)
+        
+        for _ in range(3):
+            time.sleep(0.02)
+            for _ in range(10):
+                limiter.on_success()
+        
+        assert limiter.rate == 12
+        assert limiter.max_requests == 12
+    
+    def test_no_increase_when_idle(self):
+        """Тест: редкие успешные запросы не поднимают частоту"""
+        limiter = AdaptiveRateLimiter(max_requests=50, max_rate=100, increase_interval=0.1)
+        
+        for _ in range(3):
+            time.sleep(0.11)
+            limiter.on_success()
+        
+        assert limiter.rate == 50
+    
+    def test_client_feedback(self):
+        """Тест: MAXClient сообщает лимитеру об ответах 429"""
+        from max_api import MAXClient, InMemoryTransport
+        from max_api.exceptions import RateLimitError
+        
+        transport = InMemoryTransport()
+        transport.add('GET', '/me', status=429, json={'message': 'Too many requests'})
+        limiter = AdaptiveRateLimiter(max_requests=30)
+        client = MAXClient(token="test_token", transport=transport, rate_limiter=limiter)
+        
+        with pytest.raises(RateLimitError):
+            client.get_me()
+        
+        assert client.rate_limiter is limiter
+        assert limiter.get_stats()['rate'] == 15
+
+
+class TestRecipientRateLimiter:
+    """Тесты для RecipientRateLimiter"""
+    
+    def test_separate_buckets(self):
+        """Тест: у каждого получателя своя корзина"""
+        limiter = RecipientRateLimiter(max_requests=2, time_window=1.0)
+        
+        assert limiter.try_acquire(-100)
+        assert limiter.try_acquire(-100)
+        assert not limiter.try_acquire(-100)
+        assert limiter.try_acquire(42)
+        assert len(limiter) == 2
+    
+    def test_acquire_waits(self):
+        """Тест: acquire() ждёт корзины получателя"""
+        limiter = RecipientRateLimiter(max_requests=1, time_window=0.05)
+        
+        start = time.monotonic()
+        for _ in range(3):
+            limiter.acquire(-100)
+        elapsed = time.monotonic() - start
+        
+        assert elapsed >= 0.09
+        assert limiter.get_stats()['delayed'] == 2
+    
+    def test_evict_idle(self):
+        """Тест: наполнившиеся корзины удаляются, память ограничена активными получателями"""
+        limiter = RecipientRateLimiter(max_requests=1, time_window=0.02)
+        for user_id in range(1000):
+            limiter.acquire(user_id)
+        
+        time.sleep(0.03)
+        limiter.acquire(-100)
+        
+        assert len(limiter) == 1
+        assert limiter.get_stats()['evicted'] == 1000
+    
+    def test_active_not_evicted(self):
+        """Тест: корзина, которая ещё пополняется, не удаляется"""
+        limiter = RecipientRateLimiter(max_requests=1, time_window=10)
+        limiter.acquire(-100)
+        limiter.acquire(42)
+        
+        assert len(limiter) == 2
+        assert not limiter.try_acquire(-100)
+    
+    def test_invalid(self):
+        """Тест: неположительные параметры - ошибка"""
+        with pytest.raises(ValueError):
+            RecipientRateLimiter(max_requests=0)
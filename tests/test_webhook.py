@@ -0,0 +1,204 @@
+"""
+Тесты для приёма webhook-обновлений
+"""
+
+import json
+import socket
+import asyncio
+import http.client
+import pytest
+from max_api import WebhookReceiver
+from max_api.webhook import parse_webhook_payload
+
+
+def post(address, path, body, method="POST"):
+    """Синхронный HTTP-запрос к локальному серверу"""
+    conn = http.client.HTTPConnection(*address, timeout=5)
+    try:
+        conn.request(method, path, body=body, headers={"Content-Type": "application/json"})
+        response = conn.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        conn.close()
+
+
+def raw(address, data):
+    """Отправка произвольных байтов и получение кода ответа"""
+    with socket.create_connection(address, timeout=5) as sock:
+        sock.sendall(data)
+        status_line = sock.makefile('rb').readline()
+    return int(status_line.split()[1])
+
+
+async def run_server(receiver, requests):
+    """Запуск сервера на свободном порту и выполнение запросов"""
+    await receiver.start(host="127.0.0.1", port=0)
+    loop = asyncio.get_running_loop()
+    try:
+        results = []
+        for path, body, method in requests:
+            results.append(await loop.run_in_executor(None, post, receiver.address, path, body, method))
+        await receiver.join()
+        return results
+    finally:
+        await receiver.stop()
+
+
+class TestParseWebhookPayload:
+    """Тесты разбора тела запроса"""
+    
+    def test_single_update(self):
+        """Тест: одно обновление"""
+        assert parse_webhook_payload(b'{"update_type": "bot_started"}') == [{"update_type": "bot_started"}]
+    
+    def test_batch(self):
+        """Тест: список обновлений и объект с updates"""
+        assert len(parse_webhook_payload(b'[{"a": 1}, {"b": 2}]')) == 2
+        assert len(parse_webhook_payload(b'{"updates": [{"a": 1}]}')) == 1
+    
+    def test_invalid(self):
+        """Тест: невалидное тело"""
+        with pytest.raises(ValueError):
+            parse_webhook_payload(b'not json')
+        with pytest.raises(ValueError):
+            parse_webhook_payload(b'[1, 2]')
+
+
+class TestWebhookReceiver:
+    """Тесты для WebhookReceiver"""
+    
+    def test_http_server_dispatches_updates(self):
+        """Тест: сервер подтверждает запрос и передаёт обновления обработчику"""
+        handled = []
+        receiver = WebhookReceiver(handled.append, path="/hook")
+        
+        results = asyncio.run(run_server(receiver, [
+            ("/hook", json.dumps({"update_type": "message_created"}), "POST"),
+            ("/hook", "broken", "POST"),
+            ("/other", "{}", "POST"),
+            ("/hook", "", "GET"),
+        ]))
+        
+        assert [status for status, _ in results] == [200, 400, 404, 405]
+        assert handled == [{"update_type": "message_created"}]
+        assert receiver.get_stats()['processed'] == 1
+    
+    def test_malformed_requests(self):
+        """Тест: некорректные заголовки получают ответ 4xx, а не обрыв соединения"""
+        handled = []
+        receiver = WebhookReceiver(handled.append, path="/hook")
+        body = b'{"update_type": "message_created"}'
+        requests = [
+            b"POST /hook HTTP/1.1\r\nContent-Length: abc\r\n\r\n",
+            b"POST /hook HTTP/1.1\r\nContent-Length: -5\r\n\r\n",
+            b"POST /hook HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n"
+            b"%x\r\n%s\r\n0\r\n\r\n" % (len(body), body),
+            b"POST /hook HTTP/1.1\r\n" + b"X-Header: 1\r\n" * (WebhookReceiver.MAX_HEADERS + 1) + b"\r\n",
+            b"POST /hook HTTP/1.1\r\nX-Long: " + b"a" * WebhookReceiver.MAX_LINE_SIZE + b"\r\n\r\n",
+            b"POST /" + b"a" * WebhookReceiver.MAX_LINE_SIZE + b" HTTP/1.1\r\n\r\n",
+            b"POST /hook HTTP/1.1\r\nContent-Length: %d\r\n\r\n%s" % (len(body), body),
+        ]
+        
+        async def scenario():
+            await receiver.start(host="127.0.0.1", port=0)
+            loop = asyncio.get_running_loop()
+            try:
+                results = []
+                for data in requests:
+                    results.append(await loop.run_in_executor(None, raw, receiver.address, data))
+                await receiver.join()
+                return results
+            finally:
+                await receiver.stop()
+        
+        assert asyncio.run(scenario()) == [400, 400, 411, 431, 431, 400, 200]
+        assert handled == [{"update_type": "message_created"}]
+    
+    def test_async_handler(self):
+        """Тест: обработчик-корутина"""
+        handled = []
+        
+        async def handler(update):
+            handled.append(update)
+        
+        receiver = WebhookReceiver(handler)
+        asyncio.run(run_server(receiver, [
+            ("/webhook", json.dumps([{"n": 1}, {"n": 2}]), "POST"),
+        ]))
+        
+        assert handled == [{"n": 1}, {"n": 2}]
+    
+    def test_queue_full_returns_503(self):
+        """Тест: при заполненной очереди запрос отклоняется целиком"""
+        async def scenario():
+            release = asyncio.Event()
+            
+            async def handler(update):
+                await release.wait()
+            
+            receiver = WebhookReceiver(handler, max_queue_size=2, workers=1)
+            first = await receiver.accept("POST", "/webhook", b'[{"n": 1}, {"n": 2}]')
+            await asyncio.sleep(0)
+            second = await receiver.accept("POST", "/webhook", b'[{"n": 3}, {"n": 4}]')
+            release.set()
+            await receiver.join()
+            await receiver.stop()
+            return first, second, receiver.get_stats()
+        
+        first, second, stats = asyncio.run(scenario())
+        
+        assert first[0] == 200
+        assert second[0] == 503
+        assert stats['accepted'] == 2
+        assert stats['rejected'] == 2
+    
+    def test_stop_drains_queue(self):
+        """Тест: stop() дообрабатывает уже подтверждённые обновления и отклоняет новые"""
+        handled = []
+        
+        async def scenario():
+            async def handler(update):
+                await asyncio.sleep(0.01)
+                handled.append(update)
+            
+            receiver = WebhookReceiver(handler, workers=1)
+            status, _ = await receiver.accept("POST", "/webhook", json.dumps([{"n": n} for n in range(5)]).encode())
+            stopping = asyncio.ensure_future(receiver.stop())
+            await asyncio.sleep(0)
+            late, _ = await receiver.accept("POST", "/webhook", b'{"n": 5}')
+            await stopping
+            return status, late
+        
+        assert asyncio.run(scenario()) == (200, 503)
+        assert handled == [{"n": n} for n in range(5)]
+    
+    def test_asgi_app(self):
+        """Тест ASGI-приложения"""
+        handled = []
+        receiver = WebhookReceiver(handled.append)
+        app = receiver.asgi_app()
+        
+        async def scenario():
+            sent = []
+            messages = [
+                {"type": "http.request", "body": b'{"update_type": ', "more_body": True},
+                {"type": "http.request", "body": b'"bot_started"}', "more_body": False},
+            ]
+            
+            async def receive():
+                return messages.pop(0)
+            
+            async def send(message):
+                sent.append(message)
+            
+            scope = {"type": "http", "method": "POST", "path": "/webhook"}
+            await app(scope, receive, send)
+            await receiver.join()
+            await receiver.stop()
+            return sent
+        
+        sent = asyncio.run(scenario())
+        
+        assert sent[0]["status"] == 200
+        assert json.loads(sent[1]["body"]) == {"ok": True}
+        assert handled == [{"update_type": "bot_started"}]